@@ -63,4 +63,10 @@ def create_app(config_class=Config):
     from app.routes.profile_routes import profile_bp
     app.register_blueprint(profile_bp)
 
+    from app.routes.api_routes import api_bp
+    app.register_blueprint(api_bp)
+
+    from app.commands import register_commands
+    register_commands(app)
+
     return app
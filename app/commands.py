@@ -0,0 +1,140 @@
+"""
+Maintenance commands registered on the Flask CLI.
+
+    flask search-reindex            Rebuild the quiz full-text search index
+    flask quiz-counters-reconcile   Repair drift in the denormalized quiz counters
+    flask leaderboard-rebuild       Recompute the leaderboard tables from attempts
+    flask leaderboard-compact       Compact old daily leaderboard buckets into months
+    flask rank-snapshot             Rebuild the rank boards and write a warm-start snapshot
+    flask answers-flush             Write buffered (write-behind) answers to the database
+    flask attempts-sweep            Finalize timed attempts whose deadline has passed
+    flask user-stats-rebuild        Recompute the per-user dashboard stats rollup
+    flask activity-archive          Archive activity-log months past retention to compressed files
+"""
+
+import click
+from flask.cli import with_appcontext
+
+
+@click.command('search-reindex')
+@with_appcontext
+def search_reindex_command():
+    """Rebuild the quiz full-text search index from the quizzes table."""
+    from app.services.search_service import SearchService, get_backend
+
+    count = SearchService.rebuild_index()
+    click.echo(f'✅  Indexed {count} quizzes with the "{get_backend().name}" search backend.')
+
+
+@click.command('quiz-counters-reconcile')
+@click.option('--batch-size', default=500, show_default=True, help='Quizzes checked per batch.')
+@with_appcontext
+def quiz_counters_reconcile_command(batch_size):
+    """Recompute question / attempt / completion counters and fix any drift."""
+    from app.services.quiz_service import QuizService
+
+    repaired = QuizService.reconcile_counters(batch_size=batch_size)
+    click.echo(f'✅  Repaired counters on {repaired} quizzes.')
+
+
+@click.command('leaderboard-rebuild')
+@with_appcontext
+def leaderboard_rebuild_command():
+    """Recompute all-time leaderboard entries and period buckets from submitted attempts."""
+    from app.services.leaderboard_service import LeaderboardService
+
+    count = LeaderboardService.rebuild()
+    click.echo(f'✅  Rebuilt leaderboard entries for {count} users.')
+
+
+@click.command('leaderboard-compact')
+@click.option('--retention-days', type=int, default=None,
+              help='Keep daily buckets this many days (default: LEADERBOARD_BUCKET_RETENTION_DAYS).')
+@with_appcontext
+def leaderboard_compact_command(retention_days):
+    """Merge daily leaderboard buckets past retention into monthly buckets."""
+    from app.services.leaderboard_service import LeaderboardService
+
+    removed = LeaderboardService.compact_buckets(retention_days)
+    click.echo(f'✅  Compacted {removed} daily buckets.')
+
+
+@click.command('rank-snapshot')
+@with_appcontext
+def rank_snapshot_command():
+    """Reload the rank boards from the database and save the warm-start snapshot."""
+    from flask import current_app
+    from app.services.rank_service import RankService
+
+    size = RankService.rebuild()
+    if not RankService.save_snapshot():
+        raise click.ClickException('RANK_SNAPSHOT_PATH is not configured.')
+    click.echo(f'✅  Saved a rank snapshot of {size} users to {current_app.config["RANK_SNAPSHOT_PATH"]}.')
+
+
+@click.command('answers-flush')
+@with_appcontext
+def answers_flush_command():
+    """Flush every buffered answer to the answers table (periodic flush / crash recovery)."""
+    from app.services.answer_buffer_service import AnswerBufferService
+
+    if not AnswerBufferService.enabled():
+        click.echo('ANSWER_BUFFER is off; nothing to flush.')
+        return
+    flushed = AnswerBufferService.flush_all()
+    click.echo(f'✅  Flushed {flushed} buffered answers.')
+
+
+@click.command('attempts-sweep')
+@click.option('--batch-size', default=500, show_default=True, help='Attempts finalized per transaction.')
+@click.option('--pause', default=0.0, show_default=True, help='Seconds to wait between batches.')
+@click.option('--grace-seconds', type=int, default=None,
+              help='Only sweep attempts this long past their deadline (default: ATTEMPT_SWEEP_GRACE_SECONDS).')
+@with_appcontext
+def attempts_sweep_command(batch_size, pause, grace_seconds):
+    """Auto-submit abandoned timed attempts in set-based batches."""
+    from app.services.attempt_service import AttemptService
+
+    finalized = AttemptService.sweep_expired(batch_size=batch_size, grace_seconds=grace_seconds, pause=pause)
+    click.echo(f'✅  Finalized {finalized} expired attempts.')
+
+
+@click.command('user-stats-rebuild')
+@with_appcontext
+def user_stats_rebuild_command():
+    """Recompute every user's dashboard stats rollup from attempts and quizzes."""
+    from app.services.user_stats_service import UserStatsService
+
+    count = UserStatsService.rebuild()
+    click.echo(f'✅  Rebuilt dashboard stats for {count} users.')
+
+
+@click.command('activity-archive')
+@click.option('--retention-months', type=int, default=None,
+              help='Months kept in the database, current one included (default: ACTIVITY_RETENTION_MONTHS).')
+@with_appcontext
+def activity_archive_command(retention_months):
+    """Create upcoming activity partitions and archive months past retention."""
+    from flask import current_app
+    from app.services.activity_archive_service import ActivityArchiveService
+
+    if retention_months is not None:
+        current_app.config['ACTIVITY_RETENTION_MONTHS'] = retention_months
+    for name in ActivityArchiveService.ensure_partitions():
+        click.echo(f'Created partition {name}.')
+    archived = ActivityArchiveService.archive_expired()
+    for month, rows in archived.items():
+        click.echo(f'Archived {rows} rows from {month}.')
+    click.echo(f'✅  Archived {len(archived)} months to {ActivityArchiveService.archive_dir()}.')
+
+
+def register_commands(app):
+    app.cli.add_command(search_reindex_command)
+    app.cli.add_command(quiz_counters_reconcile_command)
+    app.cli.add_command(leaderboard_rebuild_command)
+    app.cli.add_command(leaderboard_compact_command)
+    app.cli.add_command(rank_snapshot_command)
+    app.cli.add_command(answers_flush_command)
+    app.cli.add_command(attempts_sweep_command)
+    app.cli.add_command(user_stats_rebuild_command)
+    app.cli.add_command(activity_archive_command)
@@ -53,8 +53,91 @@ class Config:
     GEMINI_FALLBACK_ENABLED = True
     GEMINI_MAX_RETRIES = 3
     GEMINI_TIMEOUT = 60          # seconds per API call
-    GEMINI_COOLDOWN_MINUTES = 5  # cooldown after rate-limit hit
+    # Adaptive routing: models are tried in order of expected time to a valid quiz
+    GEMINI_ROUTING_ALPHA = 0.2          # EWMA weight of the newest call in latency / success / validity
+    GEMINI_ROUTING_EXPLORE = 0.05       # share of generations that lead with a random other model
+    # Per-model circuit breaker (replaces the fixed cooldown)
+    GEMINI_CIRCUIT_FAILURES = 3         # consecutive API errors that open a circuit (a rate-limit opens it at once)
+    GEMINI_CIRCUIT_OPEN_SECONDS = 60    # first open period, then one half-open probe
+    GEMINI_CIRCUIT_MAX_OPEN_SECONDS = 900  # open period doubles per failed probe up to this
+    # Where routing scores and circuits live: 'database' (shared by every worker and host),
+    # 'sqlite' (file shared by one host's workers) or 'memory' (per process)
+    GEMINI_STATE_BACKEND = os.environ.get('GEMINI_STATE_BACKEND', 'database')
+    GEMINI_STATE_PATH = os.environ.get('GEMINI_STATE_PATH', os.path.join('instance', 'model_state.db'))
+    GEMINI_STATE_CACHE_SECONDS = 1.0    # how stale a worker's copy of the shared state may get
+    # Hedged fallback: ask the next model too if no valid quiz arrived after this many
+    # seconds (0 races them; None = strictly sequential fallback)
+    GEMINI_HEDGE_DELAY = None
+    GEMINI_HEDGE_MAX_IN_FLIGHT = 2      # concurrent requests per generation when hedging
+    GEMINI_BASE_URL = os.environ.get('GEMINI_BASE_URL', '')  # API endpoint override (proxy / local stub)
+    # Pooled Gemini clients: one per API key per process, reused across requests
+    GEMINI_POOL_MAX_CONNECTIONS = 10    # concurrent HTTP connections per client
+    GEMINI_POOL_KEEPALIVE = 5           # idle connections kept open for reuse
+    GEMINI_POOL_KEEPALIVE_EXPIRY = 60   # seconds an idle connection stays open
+    GEMINI_POOL_MAX_AGE = 3600          # seconds before a client is rebuilt
     AI_DAILY_LIMIT = 10          # max AI generations per user per day
+    # Seconds an in-flight generation holds quota if its worker dies; None = the longest a
+    # generation can run (GEMINI_TIMEOUT × len(GEMINI_MODELS) × GEMINI_MAX_RETRIES)
+    AI_QUOTA_RESERVATION_TTL = None
+
+    # Quiz search: 'auto' picks the indexed backend for the database dialect
+    # (postgres → tsvector + GIN, sqlite → FTS5); 'like' disables indexing
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'auto')
+    EXPLORE_PAGE_SIZE = 24       # quiz cards per explore page / infinite-scroll fetch
+    EXPLORE_SEARCH_WINDOW = 240  # deepest ranked search result a user can page to
+    ADMIN_PAGE_SIZE = 50         # rows per admin users / quizzes / activity-log page
+    ACTIVITY_COUNT_CAP = 10000   # filtered activity-log totals stop counting here ("10,000+")
+    ACTIVITY_COUNT_TTL = 60      # seconds an activity-log total is cached
+
+    # Leaderboard windows are merged from per-user daily buckets
+    LEADERBOARD_BUCKET_RETENTION_DAYS = 35     # older days are compacted into monthly buckets
+    LEADERBOARD_WINDOW_CACHE_SECONDS = 60      # windowed boards are recomputed at most this often
+
+    # Compiled quiz snapshots (question payload + answer key) used while taking quizzes
+    QUIZ_SNAPSHOT_CACHE_SIZE = 256             # quizzes kept per worker, least recently used evicted
+
+    # Per-user page fragment cache (dashboard): 'off', 'memory' (per-process LRU — single
+    # worker only) or 'sqlite' (local file shared by the host's workers)
+    FRAGMENT_CACHE = os.environ.get('FRAGMENT_CACHE', 'off')
+    FRAGMENT_CACHE_PATH = os.environ.get('FRAGMENT_CACHE_PATH', os.path.join('instance', 'fragment_cache.db'))
+    FRAGMENT_CACHE_SIZE = 2000                 # users kept by the memory backend, least recently used evicted
+    FRAGMENT_CACHE_TTL = 300                   # seconds; bounds staleness from changes no hook sees
+
+    # Activity log: 'async' queues events and bulk-inserts them from a
+    # background thread; 'sync' commits each one on the request path.
+    # Serverless platforms freeze or kill the process after the response,
+    # which would lose queued events, so 'sync' is the default there.
+    _serverless = os.environ.get('VERCEL') == '1' or 'AWS_LAMBDA_FUNCTION_NAME' in os.environ
+    ACTIVITY_LOG = os.environ.get('ACTIVITY_LOG', 'sync' if _serverless else 'async')
+    ACTIVITY_QUEUE_SIZE = 10000      # queued events per process before ACTIVITY_QUEUE_FULL applies
+    ACTIVITY_QUEUE_FULL = 'inline'   # full queue: 'inline' writes synchronously, 'drop' discards
+    ACTIVITY_FLUSH_SIZE = 200        # rows per bulk insert; a full batch wakes the writer early
+    ACTIVITY_FLUSH_SECONDS = 1.0     # longest a queued event waits to be written
+    ACTIVITY_SHUTDOWN_TIMEOUT = 10   # seconds to drain the queue at process exit
+
+    # Activity retention: months kept in the database (current month included);
+    # `flask activity-archive` moves older months to gzip JSON Lines files
+    ACTIVITY_RETENTION_MONTHS = 6
+    ACTIVITY_ARCHIVE_DIR = os.environ.get('ACTIVITY_ARCHIVE_DIR', os.path.join('instance', 'activity_archive'))
+    ACTIVITY_PARTITIONS_AHEAD = 2    # Postgres: monthly partitions created ahead of time
+
+    # Write-behind answer buffer for live exams: 'off', 'memory' (per process — single
+    # worker only) or 'sqlite' (crash-safe local file shared by the host's workers)
+    ANSWER_BUFFER = os.environ.get('ANSWER_BUFFER', 'off')
+    ANSWER_BUFFER_PATH = os.environ.get('ANSWER_BUFFER_PATH', os.path.join('instance', 'answer_buffer.db'))
+    ANSWER_BUFFER_MAX_PENDING = 25             # flush an attempt inline once this many answers are buffered
+
+    # `flask attempts-sweep` finalizes timed attempts this long after their deadline
+    ATTEMPT_SWEEP_GRACE_SECONDS = 30
+
+    # Attempts a student may start per quiz (enforced atomically on start)
+    MAX_ATTEMPTS_PER_QUIZ = 3
+
+    # "My rank" / per-quiz boards are in-process sorted sets synced from the database
+    RANK_SYNC_SECONDS = 15                     # pull other workers' changes at most this often
+    RANK_SNAPSHOT_SECONDS = 300                # persist the boards for warm starts, off the request path (0 = only via CLI)
+    RANK_SNAPSHOT_PATH = os.environ.get('RANK_SNAPSHOT_PATH', os.path.join('instance', 'rank_snapshot.json'))
+    RANK_MAX_QUIZ_BOARDS = 500                 # per-quiz boards kept in memory (oldest evicted)
     
     # Authentication mode: must be set via environment variable (no hardcoded default)
     AUTH_EMAIL_ENABLED = os.environ.get('AUTH_EMAIL_ENABLED', '').lower() == 'true'
@@ -1,8 +1,10 @@
 from .user import User
 from .quiz import Quiz
 from .question import Question
-from .attempt import Attempt, Answer
+from .attempt import Attempt, Answer, QuizAttemptCounter
 from .support import SupportTicket
 from .activity import Activity
 from .category import Category
-from .ai_usage import AIModelUsage
+from .ai_usage import AIModelUsage, AIQuotaUsage, AIQuotaReservation, AIModelHealth
+from .leaderboard import LeaderboardEntry, LeaderboardBucket
+from .user_stats import UserStats
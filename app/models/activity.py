@@ -1,6 +1,18 @@
 from app import db
 from datetime import datetime
 
+
+# Every action_type the app logs — the admin log filter matches these exactly
+ACTION_TYPES = (
+    'Registered', 'Logged In', 'Google Login', 'Logged Out',
+    'Profile Updated', 'Password Changed', 'Avatar Updated',
+    'Created Quiz', 'Deleted Quiz', 'AI Generate', 'AI Quiz Saved', 'AI Quiz Published',
+    'Attempted Quiz',
+    'Created Support Ticket', 'Support Reply', 'Closed Ticket',
+    'Admin Action',
+)
+
+
 class Activity(db.Model):
     __tablename__ = 'activities'
 
@@ -8,7 +20,15 @@ class Activity(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     action_type = db.Column(db.String(50), nullable=False) # Created Quiz, Attempted Quiz, etc.
     description = db.Column(db.String(255))
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    # Postgres partitions the table by month on timestamp (see activity_archive_service)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # Admin activity log: keyset pages on (timestamp, id), unfiltered or per action / per user
+        db.Index('ix_activities_timestamp_id', 'timestamp', 'id'),
+        db.Index('ix_activities_action_type_timestamp_id', 'action_type', 'timestamp', 'id'),
+        db.Index('ix_activities_user_id_timestamp_id', 'user_id', 'timestamp', 'id'),
+    )
 
     def __repr__(self):
         return f'<Activity {self.action_type} User {self.user_id}>'
@@ -3,7 +3,7 @@ from datetime import datetime, date
 
 
 class AIModelUsage(db.Model):
-    """Tracks daily success/failure counts per Gemini model."""
+    """Tracks daily success/failure/cancelled counts per Gemini model."""
     __tablename__ = 'ai_model_usage'
 
     id = db.Column(db.Integer, primary_key=True)
@@ -11,6 +11,7 @@ class AIModelUsage(db.Model):
     date = db.Column(db.Date, nullable=False, default=date.today, index=True)
     success_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     failure_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    cancelled_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)  # hedged requests abandoned for a faster model
     last_failure_at = db.Column(db.DateTime, nullable=True)
     status = db.Column(db.String(20), default='active')  # active | degraded
 
@@ -20,7 +21,57 @@ class AIModelUsage(db.Model):
 
     @property
     def total_calls(self):
-        return self.success_count + self.failure_count
+        return self.success_count + self.failure_count + self.cancelled_count
 
     def __repr__(self):
         return f'<AIModelUsage {self.model_name} {self.date}>'
+
+
+class AIQuotaUsage(db.Model):
+    """A user's finished AI generations on one UTC day; also the row reservations lock."""
+    __tablename__ = 'ai_quota_usage'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    used = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+
+    def __repr__(self):
+        return f'<AIQuotaUsage User {self.user_id} {self.day} {self.used}>'
+
+
+class AIQuotaReservation(db.Model):
+    """One in-flight AI generation, holding quota until it is charged, refunded or expires."""
+    __tablename__ = 'ai_quota_reservations'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)  # stops counting if its worker died
+
+    __table_args__ = (
+        db.Index('ix_ai_quota_reservations_user_day', 'user_id', 'day', 'expires_at'),
+    )
+
+    def __repr__(self):
+        return f'<AIQuotaReservation {self.id} User {self.user_id} {self.day}>'
+
+
+class AIModelHealth(db.Model):
+    """Routing estimates and circuit-breaker state of one Gemini model, shared by every worker."""
+    __tablename__ = 'ai_model_health'
+
+    model_name = db.Column(db.String(64), primary_key=True)
+    latency = db.Column(db.Float, nullable=True)  # EWMA seconds per answered call
+    success = db.Column(db.Float, default=1.0, server_default='1', nullable=False)
+    validity = db.Column(db.Float, default=1.0, server_default='1', nullable=False)
+    calls = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    state = db.Column(db.String(16), default='closed', server_default='closed', nullable=False)  # closed | open | half-open
+    failures = db.Column(db.Integer, default=0, server_default='0', nullable=False)  # consecutive API errors
+    open_until = db.Column(db.DateTime, nullable=True)
+    open_seconds = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    probe_started = db.Column(db.DateTime, nullable=True)
+    version = db.Column(db.Integer, default=0, server_default='0', nullable=False)  # bumped by every write (compare-and-set)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<AIModelHealth {self.model_name} {self.state}>'
@@ -11,12 +11,45 @@ class Attempt(db.Model):
     accuracy = db.Column(db.Float, default=0.0)
     started_at = db.Column(db.DateTime, default=datetime.utcnow)
     submitted_at = db.Column(db.DateTime)
+    deadline_at = db.Column(db.DateTime)  # started_at + quiz time limit; NULL for untimed quizzes
 
     answers = db.relationship('Answer', backref='attempt', lazy='dynamic')
 
+    __table_args__ = (
+        # Per-quiz rank boards: load one quiz's attempts, sync recent submissions
+        db.Index('ix_attempts_quiz_id_submitted_at', 'quiz_id', 'submitted_at'),
+        # Dashboard: a user's most recent submissions
+        db.Index('ix_attempts_user_id_submitted_at', 'user_id', 'submitted_at'),
+        # Expiry sweeper: open timed attempts by deadline (partial — finished rows drop out)
+        db.Index('ix_attempts_open_deadline', 'deadline_at',
+                 postgresql_where=db.text('submitted_at IS NULL AND deadline_at IS NOT NULL'),
+                 sqlite_where=db.text('submitted_at IS NULL AND deadline_at IS NOT NULL')),
+    )
+
     def __repr__(self):
         return f'<Attempt {self.id} User {self.user_id} Quiz {self.quiz_id}>'
 
+class QuizAttemptCounter(db.Model):
+    """
+    Per-(user, quiz) admission row: attempts started so far and the attempt
+    still in progress.  Starting an attempt is one guarded UPDATE on this row,
+    so parallel starts can neither exceed the cap nor open two attempts.
+    """
+    __tablename__ = 'quiz_attempt_counters'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id'), primary_key=True)
+    attempt_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    open_attempt_id = db.Column(db.Integer, db.ForeignKey('attempts.id'))
+
+    __table_args__ = (
+        # Finishing an attempt clears its pointer by attempt id
+        db.Index('ix_quiz_attempt_counters_open_attempt_id', 'open_attempt_id', unique=True),
+    )
+
+    def __repr__(self):
+        return f'<QuizAttemptCounter User {self.user_id} Quiz {self.quiz_id} {self.attempt_count}>'
+
 class Answer(db.Model):
     __tablename__ = 'answers'
 
@@ -28,5 +61,10 @@ class Answer(db.Model):
 
     question = db.relationship('Question')
 
+    __table_args__ = (
+        # One answer per question per attempt; batch saves update in place
+        db.UniqueConstraint('attempt_id', 'question_id', name='uq_answers_attempt_question'),
+    )
+
     def __repr__(self):
         return f'<Answer {self.id} Attempt {self.attempt_id}>'
@@ -0,0 +1,43 @@
+from app import db
+from datetime import datetime
+
+
+class LeaderboardEntry(db.Model):
+    """Per-user running totals for the global leaderboard, updated on each finished attempt."""
+    __tablename__ = 'leaderboard_entries'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    attempt_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    accuracy_sum = db.Column(db.Float, default=0.0, server_default='0', nullable=False)
+    avg_accuracy = db.Column(db.Float, default=0.0, server_default='0', nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    user = db.relationship('User', backref=db.backref('leaderboard_entry', uselist=False))
+
+    __table_args__ = (
+        # Ranking key: average accuracy, then volume
+        db.Index('ix_leaderboard_entries_rank', 'avg_accuracy', 'attempt_count'),
+        # Rank boards sync entries changed since their last sync
+        db.Index('ix_leaderboard_entries_updated_at', 'updated_at'),
+    )
+
+    def __repr__(self):
+        return f'<LeaderboardEntry User {self.user_id} {self.avg_accuracy:.1f}%>'
+
+
+class LeaderboardBucket(db.Model):
+    """
+    Per-user score rollup for one period. Recent activity is kept in 'day'
+    buckets so windowed boards merge a handful of small rows; days older than
+    LEADERBOARD_BUCKET_RETENTION_DAYS are compacted into 'month' buckets.
+    """
+    __tablename__ = 'leaderboard_buckets'
+
+    granularity = db.Column(db.String(8), primary_key=True)  # day | month
+    period_start = db.Column(db.Date, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    attempt_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    accuracy_sum = db.Column(db.Float, default=0.0, server_default='0', nullable=False)
+
+    def __repr__(self):
+        return f'<LeaderboardBucket {self.granularity} {self.period_start} User {self.user_id}>'
@@ -1,5 +1,6 @@
 from app import db
 from datetime import datetime
+from sqlalchemy import event
 
 class Quiz(db.Model):
     __tablename__ = 'quizzes'
@@ -15,11 +16,51 @@ class Quiz(db.Model):
     suspension_reason = db.Column(db.String(255))
     suspension_end = db.Column(db.DateTime)
     is_ai_generated = db.Column(db.Boolean, default=False, server_default='0')
+    # Denormalized counters — maintained by QuizService / AttemptService,
+    # repaired by `flask quiz-counters-reconcile`
+    question_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    attempt_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    completion_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    # Bumped on every question / settings change; keys the compiled quiz snapshots
+    version = db.Column(db.Integer, default=1, server_default='1', nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     questions = db.relationship('Question', backref='quiz', lazy='dynamic')
     attempts = db.relationship('Attempt', backref='quiz', lazy='dynamic')
 
+    __table_args__ = (
+        # Explore listing: keyset pagination on (created_at, id) within a status
+        db.Index('ix_quizzes_status_created_at_id', 'status', 'created_at', 'id'),
+        # Explore "popular" sort: keyset pagination on (attempt_count, id)
+        db.Index('ix_quizzes_status_attempt_count_id', 'status', 'attempt_count', 'id'),
+        # Dashboard "My Quizzes" strip: a creator's newest quizzes
+        db.Index('ix_quizzes_creator_id_created_at', 'creator_id', 'created_at'),
+        # Admin quiz table across all statuses: newest / oldest and popular
+        db.Index('ix_quizzes_created_at_id', 'created_at', 'id'),
+        db.Index('ix_quizzes_attempt_count_id', 'attempt_count', 'id'),
+    )
+
     def __repr__(self):
         return f'<Quiz {self.title}>'
+
+
+# ── Full-text search index (see app/services/search_service.py) ──────
+# Not mapped on the model: Postgres keeps a tsvector column on quizzes,
+# SQLite a separate FTS5 table. Created here for databases built with
+# db.create_all(); migrated databases get them from 3f8c1d2e9a47.
+
+SQLITE_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS quiz_search "
+    "USING fts5(title, description, tokenize='porter unicode61 remove_diacritics 2', prefix='2 3')"
+)
+
+POSTGRES_SEARCH_DDL = (
+    "ALTER TABLE quizzes ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    "CREATE INDEX IF NOT EXISTS ix_quizzes_search_vector ON quizzes USING gin (search_vector)",
+)
+
+event.listen(Quiz.__table__, 'after_create', db.DDL(SQLITE_SEARCH_DDL).execute_if(dialect='sqlite'))
+event.listen(Quiz.__table__, 'after_drop', db.DDL('DROP TABLE IF EXISTS quiz_search').execute_if(dialect='sqlite'))
+for statement in POSTGRES_SEARCH_DDL:
+    event.listen(Quiz.__table__, 'after_create', db.DDL(statement).execute_if(dialect='postgresql'))
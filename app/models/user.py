@@ -24,6 +24,17 @@ class User(UserMixin, db.Model):
     attempts = db.relationship('Attempt', backref='user', lazy='dynamic')
     activities = db.relationship('Activity', backref='user', lazy='dynamic')
 
+    __table_args__ = (
+        # Admin user table: keyset pagination / date filter on (joined_at, id)
+        db.Index('ix_users_joined_at_id', 'joined_at', 'id'),
+        # Admin user search / typeahead: case-insensitive prefix match, lower(col) LIKE 'abc%'.
+        # text_pattern_ops lets Postgres use the index for LIKE under any collation.
+        db.Index('ix_users_username_lower', db.func.lower(username).label('username_lower'),
+                 postgresql_ops={'username_lower': 'text_pattern_ops'}),
+        db.Index('ix_users_email_lower', db.func.lower(email).label('email_lower'),
+                 postgresql_ops={'email_lower': 'text_pattern_ops'}),
+    )
+
     def __repr__(self):
         return f'<User {self.username}>'
 
@@ -0,0 +1,45 @@
+from app import db
+from datetime import datetime
+
+
+# quizzes.status → UserStats column counting the creator's quizzes in that status
+QUIZ_STATUS_COLUMNS = {
+    'draft': 'quizzes_draft',
+    'scheduled': 'quizzes_scheduled',
+    'active': 'quizzes_active',
+    'closed': 'quizzes_closed',
+    'suspended': 'quizzes_suspended',
+}
+
+
+class UserStats(db.Model):
+    """
+    Per-user dashboard rollup, maintained incrementally by the attempt and
+    quiz services: finished-attempt totals, answer totals and the user's
+    quizzes counted by status.
+    """
+    __tablename__ = 'user_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    attempt_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    accuracy_sum = db.Column(db.Float, default=0.0, server_default='0', nullable=False)
+    best_accuracy = db.Column(db.Float, default=0.0, server_default='0', nullable=False)
+    correct_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    wrong_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    quizzes_draft = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    quizzes_scheduled = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    quizzes_active = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    quizzes_closed = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    quizzes_suspended = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @property
+    def avg_accuracy(self):
+        return self.accuracy_sum / self.attempt_count if self.attempt_count else 0.0
+
+    @property
+    def quizzes_created(self):
+        return sum(getattr(self, column) or 0 for column in QUIZ_STATUS_COLUMNS.values())
+
+    def __repr__(self):
+        return f'<UserStats User {self.user_id} {self.attempt_count} attempts>'
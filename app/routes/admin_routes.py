@@ -1,37 +1,50 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, current_app
 from flask_login import login_required, current_user
 from app.utils.decorators import admin_required
 from app import db
 from app.models.user import User
 from app.models.quiz import Quiz
 from app.models.attempt import Attempt
-from app.models.activity import Activity
+from app.models.activity import ACTION_TYPES
 from app.models.support import SupportTicket
 from app.services.support_service import SupportService
 from app.services.activity_service import ActivityService
+from app.services.rank_service import RankService
+from app.services.user_stats_service import UserStatsService
+from app.services.fragment_cache_service import FragmentCacheService
+from app.services.quiz_snapshot_service import QuizSnapshotService
+from app.services.listing_service import QuizListing, TicketListing, AttemptListing
+from app.services.activity_archive_service import ActivityArchiveService, month_key, parse_month
+from app.services.admin_service import AdminService, QUIZ_STATUSES, parse_date
+from app.utils.pagination import InvalidCursor
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
 @admin_bp.route('/')
 @admin_required
 def index():
-    users = User.query.order_by(User.id.desc()).all()
-    quizzes = Quiz.query.order_by(Quiz.id.desc()).all()
+    # Bounded reads only: counts plus the newest few rows — full tables live on their own pages
+    users = User.query.order_by(User.joined_at.desc(), User.id.desc()).limit(5).all()
     
-    total_users = len(users)
-    total_quizzes = len(quizzes)
+    total_users = User.query.count()
+    total_quizzes = Quiz.query.count()
     total_attempts = Attempt.query.count()
-    open_ticket_list = SupportTicket.query.filter_by(status='open').order_by(SupportTicket.created_at.desc()).all()
-    open_tickets = len(open_ticket_list)
+    open_tickets = SupportTicket.query.filter_by(status='open').count()
+    open_ticket_list = (TicketListing.query().filter_by(status='open')
+                        .order_by(SupportTicket.created_at.desc()).limit(5).all())
     
     return render_template('admin/index.html', 
         users=users, 
-        quizzes=quizzes,
         total_users=total_users,
         total_quizzes=total_quizzes,
         total_attempts=total_attempts,
         open_tickets=open_tickets,
         open_ticket_list=open_ticket_list,
+        cache_stats={
+            'fragments': FragmentCacheService.stats(),
+            'snapshots': QuizSnapshotService.stats(),
+        },
+        activity_stats=ActivityService.stats(),
     )
 
 @admin_bp.route('/user/<int:user_id>/toggle_status', methods=['POST'])
@@ -56,6 +69,7 @@ def toggle_user_status(user_id):
         flash(f'User {user.username} has been suspended.', 'warning')
         
     db.session.commit()
+    RankService.user_status_changed(user.id)
     return redirect(url_for('admin.index'))
 
 @admin_bp.route('/quiz/<int:quiz_id>/toggle_status', methods=['POST'])
@@ -67,16 +81,19 @@ def toggle_quiz_status(quiz_id):
         return redirect(url_for('admin.index'))
         
     if quiz.status == 'suspended':
+        UserStatsService.quiz_status_changed(quiz.creator_id, quiz.status, 'draft')
         quiz.status = 'draft'
         ActivityService.log_activity(current_user.id, 'Admin Action', f'Restored suspended quiz "{quiz.title}"')
         flash(f'Quiz "{quiz.title}" has been restored to draft status.', 'success')
     else:
+        UserStatsService.quiz_status_changed(quiz.creator_id, quiz.status, 'suspended')
         quiz.status = 'suspended'
         quiz.suspension_reason = request.form.get('reason', 'Violation of terms')
         ActivityService.log_activity(current_user.id, 'Admin Action', f'Suspended quiz "{quiz.title}"')
         flash(f'Quiz "{quiz.title}" has been suspended.', 'warning')
         
     db.session.commit()
+    FragmentCacheService.invalidate_user(quiz.creator_id)
     return redirect(url_for('admin.index'))
 
 @admin_bp.route('/support')
@@ -91,7 +108,7 @@ def support_tickets():
 def user_detail(user_id):
     user = User.query.get_or_404(user_id)
     quizzes = Quiz.query.filter_by(creator_id=user.id).all()
-    attempts = Attempt.query.filter_by(user_id=user.id).all()
+    attempts = AttemptListing.query().filter_by(user_id=user.id).all()
     total_quizzes = len(quizzes)
     active_quizzes = len([q for q in quizzes if q.status == 'active'])
     completed_attempts = [a for a in attempts if a.submitted_at is not None]
@@ -108,39 +125,182 @@ def user_detail(user_id):
 @admin_bp.route('/activity')
 @admin_required
 def activity_logs():
-    page = request.args.get('page', 1, type=int)
-    user_filter = request.args.get('user_id', None, type=int)
+    user_filter = request.args.get('user', '', type=str).strip()
+    user_id = request.args.get('user_id', None, type=int)
     action_filter = request.args.get('action', '', type=str)
+    if action_filter not in ACTION_TYPES:
+        action_filter = ''
+    if user_filter and user_id is None:
+        # Unknown names resolve to no user, and so to no rows
+        user_id = User.query.with_entities(User.id).filter_by(username=user_filter).scalar() or 0
+    elif user_id is not None and not user_filter:
+        user_filter = User.query.with_entities(User.username).filter_by(id=user_id).scalar() or ''
 
-    query = Activity.query.order_by(Activity.timestamp.desc())
-    if user_filter:
-        query = query.filter_by(user_id=user_filter)
-    if action_filter:
-        query = query.filter(Activity.action_type.ilike(f'%{action_filter}%'))
+    filters = {k: v for k, v in (('user', user_filter), ('action', action_filter)) if v}
+    try:
+        page = AdminService.activity_page(user_id, action_filter, request.args.get('cursor'),
+                                          per_page=current_app.config.get('ADMIN_PAGE_SIZE', 50))
+    except InvalidCursor:
+        return redirect(url_for('admin.activity_logs', **filters))
 
-    pagination = query.paginate(page=page, per_page=50, error_out=False)
-    users = User.query.order_by(User.username).all()
     return render_template('admin/activity.html',
-        logs=pagination.items,
-        pagination=pagination,
-        users=users,
+        logs=page.items,
+        next_cursor=page.next_cursor,
+        paged=bool(request.args.get('cursor')),
+        total=AdminService.activity_count(user_id, action_filter),
+        action_types=ACTION_TYPES,
+        filters=filters,
         user_filter=user_filter,
         action_filter=action_filter
     )
 
+@admin_bp.route('/activity/archive')
+@admin_required
+def activity_archive():
+    """Archived (past-retention) months of the activity log, searched one month at a time."""
+    months = ActivityArchiveService.archived_months()
+    month = parse_month(request.args.get('month', ''))
+    user_filter = request.args.get('user', '', type=str).strip()
+    action_filter = request.args.get('action', '', type=str)
+    if action_filter not in ACTION_TYPES:
+        action_filter = ''
+    text_filter = request.args.get('q', '', type=str).strip()
+
+    logs, truncated, usernames = [], False, {}
+    if month:
+        user_id = None
+        if user_filter:
+            user_id = User.query.with_entities(User.id).filter_by(username=user_filter).scalar() or 0
+        logs, truncated = ActivityArchiveService.search(
+            month, user_id, action_filter, text_filter,
+            limit=current_app.config.get('ADMIN_PAGE_SIZE', 50) * 4,
+        )
+        user_ids = {log['user_id'] for log in logs}
+        if user_ids:
+            usernames = dict(User.query.with_entities(User.id, User.username).filter(User.id.in_(user_ids)))
+
+    return render_template('admin/activity_archive.html',
+        months=months,
+        month=month_key(month) if month else '',
+        logs=logs,
+        truncated=truncated,
+        usernames=usernames,
+        action_types=ACTION_TYPES,
+        user_filter=user_filter,
+        action_filter=action_filter,
+        text_filter=text_filter,
+    )
+
+@admin_bp.route('/users/lookup')
+@admin_required
+def users_lookup():
+    """Typeahead for the user pickers."""
+    matches = AdminService.lookup_users(request.args.get('q', ''))
+    return jsonify({
+        'success': True,
+        'users': [{'id': m.id, 'username': m.username, 'email': m.email} for m in matches],
+    })
+
 # ── Dedicated section pages ──────────────────────────────────────────
 
+def _table_filters(*names):
+    """Non-empty filter / sort query args, echoed back into forms and feed URLs."""
+    return {name: request.args.get(name, '').strip() for name in names if request.args.get(name, '').strip()}
+
+USER_FILTERS = ('q', 'status', 'role', 'from', 'to', 'sort')
+QUIZ_FILTERS = ('q', 'status', 'creator', 'from', 'to', 'sort')
+
+def _users_page(filters):
+    return AdminService.users_page(
+        q=filters.get('q', ''),
+        status=filters.get('status', ''),
+        role=filters.get('role', ''),
+        date_from=parse_date(filters.get('from')),
+        date_to=parse_date(filters.get('to')),
+        sort=filters.get('sort', 'newest'),
+        cursor=request.args.get('cursor'),
+        per_page=current_app.config.get('ADMIN_PAGE_SIZE', 50),
+    )
+
+def _quizzes_page(filters):
+    return AdminService.quizzes_page(
+        q=filters.get('q', ''),
+        status=filters.get('status', ''),
+        creator=filters.get('creator', ''),
+        date_from=parse_date(filters.get('from')),
+        date_to=parse_date(filters.get('to')),
+        sort=filters.get('sort', 'newest'),
+        cursor=request.args.get('cursor'),
+        per_page=current_app.config.get('ADMIN_PAGE_SIZE', 50),
+    )
+
 @admin_bp.route('/users')
 @admin_required
 def users_page():
-    users = User.query.order_by(User.id.desc()).all()
-    return render_template('admin/users.html', users=users)
+    filters = _table_filters(*USER_FILTERS)
+    try:
+        page = _users_page(filters)
+    except InvalidCursor:
+        return redirect(url_for('admin.users_page', **filters))
+    return render_template('admin/users.html', users=page.items, next_cursor=page.next_cursor, filters=filters)
+
+@admin_bp.route('/users/feed')
+@admin_required
+def users_feed():
+    """JSON variant of the user table: rows plus their rendered HTML for "load more"."""
+    filters = _table_filters(*USER_FILTERS)
+    try:
+        page = _users_page(filters)
+    except InvalidCursor as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return jsonify({
+        'success': True,
+        'users': [{
+            'id': user.id,
+            'username': user.username,
+            'email': user.email,
+            'is_admin': bool(user.is_admin),
+            'is_suspended': bool(user.is_suspended),
+            'joined_at': user.joined_at.isoformat() if user.joined_at else None,
+        } for user in page.items],
+        'html': render_template('admin/_user_rows.html', users=page.items),
+        'next_cursor': page.next_cursor,
+    })
 
 @admin_bp.route('/quizzes')
 @admin_required
 def quizzes_page():
-    quizzes = Quiz.query.order_by(Quiz.id.desc()).all()
-    return render_template('admin/quizzes.html', quizzes=quizzes)
+    filters = _table_filters(*QUIZ_FILTERS)
+    try:
+        page = _quizzes_page(filters)
+    except InvalidCursor:
+        return redirect(url_for('admin.quizzes_page', **filters))
+    return render_template('admin/quizzes.html', quizzes=page.items, next_cursor=page.next_cursor,
+                           filters=filters, statuses=QUIZ_STATUSES)
+
+@admin_bp.route('/quizzes/feed')
+@admin_required
+def quizzes_feed():
+    """JSON variant of the quiz table: rows plus their rendered HTML for "load more"."""
+    filters = _table_filters(*QUIZ_FILTERS)
+    try:
+        page = _quizzes_page(filters)
+    except InvalidCursor as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return jsonify({
+        'success': True,
+        'quizzes': [{
+            'id': quiz.id,
+            'title': quiz.title,
+            'status': quiz.status,
+            'creator': quiz.creator.username,
+            'question_count': quiz.question_count,
+            'attempt_count': quiz.attempt_count,
+            'created_at': quiz.created_at.isoformat() if quiz.created_at else None,
+        } for quiz in page.items],
+        'html': render_template('admin/_quiz_rows.html', quizzes=page.items),
+        'next_cursor': page.next_cursor,
+    })
 
 @admin_bp.route('/tickets')
 @admin_required
@@ -155,6 +315,7 @@ def tickets_page():
 def ai_usage():
     from app.models.ai_usage import AIModelUsage
     from app.services.ai_quiz_service import AIQuizService
+    from app.services.gemini_client_pool import get_client_pool
     from datetime import date
     from sqlalchemy import func
 
@@ -168,10 +329,11 @@ def ai_usage():
         AIModelUsage.model_name,
         func.sum(AIModelUsage.success_count).label('total_success'),
         func.sum(AIModelUsage.failure_count).label('total_failure'),
+        func.sum(AIModelUsage.cancelled_count).label('total_cancelled'),
         func.max(AIModelUsage.last_failure_at).label('last_failure'),
     ).group_by(AIModelUsage.model_name).all()
 
-    total_calls = sum(r.total_success + r.total_failure for r in all_time) if all_time else 0
+    total_calls = sum(r.total_success + r.total_failure + r.total_cancelled for r in all_time) if all_time else 0
     total_failures = sum(r.total_failure for r in all_time) if all_time else 0
     active_models = len([r for r in all_time if r.total_success and r.total_success > 0])
 
@@ -184,5 +346,8 @@ def ai_usage():
         total_failures=total_failures,
         active_models=active_models,
         cooldowns=cooldowns,
+        client_pool=get_client_pool().stats(),
+        model_scores=AIQuizService.get_model_scores(),
+        state_backend=current_app.config.get('GEMINI_STATE_BACKEND', 'database'),
     )
 
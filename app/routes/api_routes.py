@@ -0,0 +1,235 @@
+"""
+Quiz-taking JSON API (v1)
+─────────────────────────
+For client-rendered players: the quiz payload is fetched once and answers
+are saved in batches, instead of a POST + redirect + full page render per
+question.
+
+    POST /api/v1/quizzes/<id>/attempts     start, or resume the attempt in progress
+    GET  /api/v1/quizzes/<id>              quiz payload (no answer key), ETag'd
+    GET  /api/v1/attempts/<id>             state + server timer (heartbeat)
+    POST /api/v1/attempts/<id>/answers     {"answers": {"<question_id>": "A", ...}}
+    POST /api/v1/attempts/<id>/finish      optional final {"answers": ...}, then score
+
+Questions are served only to the quiz's creator and to a user holding an
+open, unexpired attempt on it, so a scheduled or timed exam cannot be read
+before it opens: start the attempt first, then fetch the payload.
+
+The payload ETag is the quiz id + `quizzes.version`, which QuizService bumps
+on every edit, so `If-None-Match` revalidation is answered with a 304 from
+the quiz row alone.  Payloads are per-user and `Cache-Control: private`, so
+only the user's own browser may keep them.
+"""
+
+from datetime import datetime
+
+from flask import Blueprint, current_app, jsonify, request, url_for
+from flask_login import current_user
+
+from app import db
+from app.models.attempt import Attempt, QuizAttemptCounter
+from app.services.activity_service import ActivityService
+from app.services.attempt_service import AttemptService
+from app.services.quiz_service import QuizService
+from app.services.quiz_snapshot_service import QuizSnapshotService
+from app.utils.decorators import api_login_required
+
+api_bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+
+def _error(message, status=400):
+    return jsonify({'success': False, 'error': message}), status
+
+
+def _json_body():
+    """The request's JSON object: {} without a body, None if it is an array or scalar."""
+    payload = request.get_json(silent=True)
+    if payload is None:
+        return {}
+    return payload if isinstance(payload, dict) else None
+
+
+def _quiz_etag(quiz):
+    return f'quiz-{quiz.id}-v{quiz.version or 0}'
+
+
+def _attempt_state(attempt):
+    submitted = attempt.submitted_at is not None
+    return {
+        'id': attempt.id,
+        'quiz_id': attempt.quiz_id,
+        'quiz_version': attempt.quiz.version or 0,
+        'started_at': attempt.started_at.isoformat(),
+        'deadline_at': attempt.deadline_at.isoformat() if attempt.deadline_at else None,
+        'time_remaining': None if submitted else AttemptService.time_remaining(attempt),
+        'submitted': submitted,
+        'answers': {} if submitted else {
+            str(qid): option for qid, option in AttemptService.get_selections(attempt).items()
+        },
+        'score': attempt.score if submitted else None,
+        'accuracy': attempt.accuracy if submitted else None,
+        'result_url': url_for('attempt.result', attempt_id=attempt.id) if submitted else None,
+    }
+
+
+def _state_response(attempt, status=200):
+    return jsonify({
+        'success': True,
+        'server_time': datetime.utcnow().isoformat(),
+        'attempt': _attempt_state(attempt),
+    }), status
+
+
+def _finish(attempt, expired=False):
+    finished, error = AttemptService.finish_attempt(attempt.id, current_user.id)
+    if finished:
+        prefix = 'Time expired. ' if expired else ''
+        ActivityService.log_activity(current_user.id, 'Attempted Quiz',
+                                     f'{prefix}Scored {finished.accuracy}% on quiz "{finished.quiz.title}"')
+    return finished, error
+
+
+def _open_attempt(attempt_id):
+    """(attempt, error_response); an overdue attempt is auto-submitted first."""
+    attempt = AttemptService.get_attempt(attempt_id, current_user.id)
+    if not attempt:
+        return None, _error('Invalid attempt.', 404)
+    if attempt.submitted_at is None:
+        remaining = AttemptService.time_remaining(attempt)
+        if remaining is not None and remaining <= 0:
+            _finish(attempt, expired=True)
+            db.session.refresh(attempt)
+    return attempt, None
+
+
+# ── Quiz payload ─────────────────────────────────────────────────────
+
+def _holds_open_attempt(quiz):
+    """Whether the current user has an unsubmitted attempt on the quiz with time left."""
+    counter = db.session.get(QuizAttemptCounter, (current_user.id, quiz.id))
+    if counter is None or counter.open_attempt_id is None:
+        return False
+    attempt = db.session.get(Attempt, counter.open_attempt_id)
+    if attempt is None or attempt.submitted_at is not None:
+        return False
+    remaining = AttemptService.time_remaining(attempt)
+    return remaining is None or remaining > 0
+
+
+@api_bp.route('/quizzes/<int:quiz_id>')
+@api_login_required
+def quiz_payload(quiz_id):
+    quiz = QuizService.get_quiz(quiz_id)
+    if not quiz:
+        return _error('Quiz not found.', 404)
+    if quiz.creator_id != current_user.id and not _holds_open_attempt(quiz):
+        return _error('Start an attempt to load this quiz.', 403)
+
+    etag = _quiz_etag(quiz)
+    if request.if_none_match.contains(etag):
+        # Revalidation costs one quiz row read: no snapshot, no serialization
+        response = current_app.response_class(status=304)
+    else:
+        snapshot = QuizSnapshotService.for_quiz(quiz)
+        response = jsonify({
+            'success': True,
+            'quiz': {
+                'id': quiz.id,
+                'version': snapshot.version,
+                'title': quiz.title,
+                'description': quiz.description,
+                'time_limit': quiz.time_limit,
+                'question_count': snapshot.question_count,
+                'questions': [
+                    {
+                        'id': q.id,
+                        'text': q.question_text,
+                        'options': {'A': q.option_a, 'B': q.option_b, 'C': q.option_c, 'D': q.option_d},
+                    }
+                    for q in snapshot.questions
+                ],
+            },
+        })
+    response.set_etag(etag)
+    # Access depends on the user's attempt, so no shared cache may keep it
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Cookie')
+    return response
+
+
+# ── Attempts ─────────────────────────────────────────────────────────
+
+@api_bp.route('/quizzes/<int:quiz_id>/attempts', methods=['POST'])
+@api_login_required
+def start_attempt(quiz_id):
+    quiz = QuizService.get_quiz(quiz_id)
+    if not quiz or quiz.status != 'active':
+        return _error('Quiz is not available for taking.', 404)
+
+    now = datetime.now()
+    if quiz.start_time and now < quiz.start_time:
+        return _error('This quiz has not started yet.', 403)
+    if quiz.end_time and now > quiz.end_time:
+        return _error('This quiz has already ended.', 403)
+
+    attempt, error = AttemptService.start_attempt(current_user.id, quiz_id)
+    if error:
+        return _error(error, 403)
+    return _state_response(attempt)
+
+
+@api_bp.route('/attempts/<int:attempt_id>')
+@api_login_required
+def attempt_state(attempt_id):
+    """Heartbeat: current answers and the server's view of the timer."""
+    attempt, error = _open_attempt(attempt_id)
+    if error:
+        return error
+    return _state_response(attempt)
+
+
+@api_bp.route('/attempts/<int:attempt_id>/answers', methods=['POST'])
+@api_login_required
+def save_answers(attempt_id):
+    attempt, error = _open_attempt(attempt_id)
+    if error:
+        return error
+    if attempt.submitted_at is not None:
+        # Finished elsewhere or timed out — hand the client the final state
+        return _state_response(attempt, 409)
+
+    payload = _json_body()
+    answers = payload.get('answers') if payload is not None else None
+    if not isinstance(answers, dict):
+        return _error('Invalid answers.')
+    success, error = AttemptService.submit_answers(attempt_id, current_user.id, answers)
+    if not success:
+        return _error(error)
+    return jsonify({
+        'success': True,
+        'saved': len(answers),
+        'time_remaining': AttemptService.time_remaining(attempt),
+    })
+
+
+@api_bp.route('/attempts/<int:attempt_id>/finish', methods=['POST'])
+@api_login_required
+def finish_attempt(attempt_id):
+    attempt, error = _open_attempt(attempt_id)
+    if error:
+        return error
+    if attempt.submitted_at is not None:
+        return _state_response(attempt, 409)
+
+    payload = _json_body()
+    answers = (payload.get('answers') or {}) if payload is not None else None
+    if not isinstance(answers, dict):
+        return _error('Invalid answers.')
+    success, error = AttemptService.submit_answers(attempt_id, current_user.id, answers)
+    if not success:
+        return _error(error)
+
+    finished, error = _finish(attempt)
+    if error:
+        return _error(error, 409)
+    return _state_response(finished)
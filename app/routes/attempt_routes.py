@@ -1,7 +1,8 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
 from app.services.attempt_service import AttemptService
 from app.services.quiz_service import QuizService
+from app.services.quiz_snapshot_service import QuizSnapshotService
 from app.services.activity_service import ActivityService
 from datetime import datetime
 
@@ -24,13 +25,7 @@ def start(quiz_id):
         flash('This quiz has already ended.', 'warning')
         return redirect(url_for('quiz.explore_quizzes'))
         
-    from app.models.attempt import Attempt
-    from app import db
-    attempts_count = db.session.query(Attempt).filter_by(quiz_id=quiz.id, user_id=current_user.id).count()
-    if attempts_count >= 3:
-        flash('You have reached the maximum number of attempts for this quiz (3 attempts max).', 'error')
-        return redirect(url_for('quiz.explore_quizzes'))
-
+    # Cap and in-progress checks happen atomically inside start_attempt
     attempt, error = AttemptService.start_attempt(current_user.id, quiz_id)
     if error:
         flash(error, 'error')
@@ -73,22 +68,19 @@ def take_quiz(attempt_id):
         # Redirect back to the same page for next question
         return redirect(url_for('attempt.take_quiz', attempt_id=attempt_id))
         
-    # Get questions
-    questions = attempt.quiz.questions.all()
+    # Questions come from the compiled quiz snapshot — no question queries
+    snapshot = QuizSnapshotService.for_quiz(attempt.quiz)
+    questions = snapshot.questions
+    selected = AttemptService.get_selections(attempt)
+    answered_ids = {question_id for question_id in selected if question_id in snapshot}
+    one_page = request.args.get('mode') == 'all'
+
     # Find next unanswered question
-    answered_ids = [a.question_id for a in attempt.answers]
-    
-    current_question = None
-    for q in questions:
-        if q.id not in answered_ids:
-            current_question = q
-            break
+    current_question = snapshot.next_unanswered(answered_ids)
             
     # Calculate time remaining
-    time_remaining = None
-    if attempt.quiz.time_limit:
-        elapsed = (datetime.utcnow() - attempt.started_at).total_seconds()
-        time_remaining = int(attempt.quiz.time_limit * 60 - elapsed)
+    time_remaining = AttemptService.time_remaining(attempt)
+    if time_remaining is not None:
         if time_remaining <= 0:
             # Time is up, auto submit
             finished_attempt, error = AttemptService.finish_attempt(attempt_id, current_user.id)
@@ -97,6 +89,16 @@ def take_quiz(attempt_id):
             flash('Time is up! Quiz auto-submitted.', 'info')
             return redirect(url_for('attempt.result', attempt_id=attempt_id))
             
+    if one_page:
+        # Every question on one form, saved through the batch endpoint
+        return render_template(
+            'attempt/take_all.html',
+            attempt=attempt,
+            questions=questions,
+            selected=selected,
+            time_remaining=time_remaining
+        )
+
     # If all answered but not submitted yet, show review page or submit
     is_last = (len(answered_ids) == len(questions) - 1) if current_question else True
     
@@ -110,6 +112,58 @@ def take_quiz(attempt_id):
         time_remaining=time_remaining
     )
 
+@attempt_bp.route('/attempt/<int:attempt_id>/answers', methods=['POST'])
+@login_required
+def submit_answers(attempt_id):
+    """
+    Save several answers in one request.  Accepts JSON
+    {"answers": {"<question_id>": "A", ...}, "finish": false} or the one-page
+    form (fields named answer_<question_id>, action=save|finish).
+    """
+    data = request.get_json(silent=True)
+    if data is not None:
+        if not isinstance(data, dict):
+            # Valid JSON, but an array or scalar rather than an object
+            return jsonify({'success': False, 'error': 'Invalid answers.'}), 400
+        answers = data.get('answers') or {}
+        finish = bool(data.get('finish'))
+    else:
+        answers = {
+            key[len('answer_'):]: value
+            for key, value in request.form.items() if key.startswith('answer_')
+        }
+        finish = request.form.get('action') == 'finish'
+
+    if not isinstance(answers, dict):
+        success, error = False, 'Invalid answers.'
+    else:
+        success, error = AttemptService.submit_answers(attempt_id, current_user.id, answers)
+
+    finished_attempt = None
+    if success and finish:
+        finished_attempt, error = AttemptService.finish_attempt(attempt_id, current_user.id)
+        if finished_attempt:
+            ActivityService.log_activity(current_user.id, 'Attempted Quiz', f'Scored {finished_attempt.accuracy}% on quiz "{finished_attempt.quiz.title}"')
+
+    if data is not None:
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
+        return jsonify({
+            'success': True,
+            'saved': len(answers),
+            'finished': finished_attempt is not None,
+            'redirect': url_for('attempt.result', attempt_id=attempt_id) if finished_attempt else None,
+        })
+
+    if error:
+        flash(error, 'error')
+    elif finished_attempt:
+        flash('Quiz completed successfully!', 'success')
+        return redirect(url_for('attempt.result', attempt_id=attempt_id))
+    else:
+        flash('Answers saved.', 'success')
+    return redirect(url_for('attempt.take_quiz', attempt_id=attempt_id, mode='all'))
+
 @attempt_bp.route('/attempt/<int:attempt_id>/result')
 @login_required
 def result(attempt_id):
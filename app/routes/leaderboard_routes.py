@@ -1,32 +1,68 @@
-from flask import Blueprint, render_template
-from app.models.user import User
-from app.models.attempt import Attempt
+from flask import Blueprint, render_template, request, jsonify, abort
+from flask_login import current_user, login_required
 from app import db
-from sqlalchemy import func
+from app.models.quiz import Quiz
+from app.services.quiz_service import EXPLORE_STATUSES
+from app.services.leaderboard_service import LeaderboardService, WINDOWS
+from app.services.rank_service import RankService
 
 leaderboard_bp = Blueprint('leaderboard', __name__)
 
 @leaderboard_bp.route('/leaderboard')
 def index():
-    # Calculate per-user stats: avg accuracy + total attempts
-    results = (
-        db.session.query(
-            User,
-            func.avg(Attempt.accuracy).label('avg_acc'),
-            func.count(Attempt.id).label('total')
-        )
-        .join(Attempt, Attempt.user_id == User.id)
-        .filter(Attempt.submitted_at.isnot(None))
-        .filter(User.is_suspended == False)
-        .group_by(User.id)
-        .order_by(func.avg(Attempt.accuracy).desc(), func.count(Attempt.id).desc())
-        .limit(50)
-        .all()
-    )
+    window = request.args.get('window', 'all')
+    if window not in WINDOWS:
+        window = 'all'
+
+    # Totals are maintained by AttemptService.finish_attempt; short windows
+    # are merged from per-user daily buckets
+    entries = LeaderboardService.top_window(window, 50)
 
     leaderboard = [
-        {'rank': i + 1, 'user': r.User, 'avg_acc': round(r.avg_acc, 1), 'total': r.total}
-        for i, r in enumerate(results)
+        {'rank': i + 1, 'user': e.user, 'avg_acc': round(e.avg_accuracy, 1), 'total': e.attempt_count}
+        for i, e in enumerate(entries)
     ]
 
-    return render_template('leaderboard/index.html', leaderboard=leaderboard)
+    # "Your rank" — all-time only, looked up in the in-memory rank board
+    my_rank = None
+    if window == 'all' and current_user.is_authenticated:
+        my_rank = _my_rank(current_user.id)
+
+    return render_template('leaderboard/index.html', leaderboard=leaderboard, current_window=window,
+                           my_rank=my_rank)
+
+@leaderboard_bp.route('/leaderboard/quiz/<int:quiz_id>')
+def quiz_board(quiz_id):
+    quiz = db.session.get(Quiz, quiz_id)
+    if not quiz or quiz.status not in EXPLORE_STATUSES:
+        abort(404)
+
+    leaderboard = RankService.top(quiz_id, 50)
+    my_rank = _my_rank(current_user.id, quiz_id) if current_user.is_authenticated else None
+
+    return render_template('leaderboard/index.html', leaderboard=leaderboard, quiz=quiz,
+                           my_rank=my_rank)
+
+@leaderboard_bp.route('/leaderboard/me')
+@login_required
+def my_rank():
+    quiz_id = request.args.get('quiz_id', type=int)
+    result = _my_rank(current_user.id, quiz_id)
+    return jsonify({
+        'success': True,
+        'rank': result['rank'],
+        'total': result['total'],
+        'around': [
+            {'rank': e['rank'], 'user_id': e['user'].id, 'username': e['user'].username,
+             'avg_acc': e['avg_acc'], 'total': e['total']}
+            for e in result['around']
+        ],
+    })
+
+def _my_rank(user_id, quiz_id=None):
+    rank = RankService.rank(user_id, quiz_id)
+    return {
+        'rank': rank,
+        'total': RankService.board_size(quiz_id),
+        'around': RankService.around(user_id, quiz_id, 10) if rank else [],
+    }
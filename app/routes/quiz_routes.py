@@ -2,7 +2,10 @@ from flask import Blueprint, render_template, redirect, url_for, flash, request,
 from flask_login import login_required, current_user
 from app.services.quiz_service import QuizService
 from app.services.ai_quiz_service import AIQuizService
+from app.services.ai_quota_service import AIQuotaService
 from app.services.activity_service import ActivityService
+from app.services.listing_service import QuizListing
+from app.utils.pagination import InvalidCursor
 from datetime import datetime
 
 quiz_bp = Blueprint('quiz', __name__)
@@ -29,21 +32,24 @@ def ai_generate():
     num_questions = min(max(int(data.get('num_questions', 10)), 5), 50)
     difficulty = data.get('difficulty', 'medium')
 
-    # Enforce daily limit
-    _, ai_remaining = AIQuizService.get_daily_usage(current_user.id)
-    if ai_remaining <= 0:
-        return jsonify({'success': False, 'error': 'Daily AI generation limit reached (6/day). Try again tomorrow!'}), 429
+    # Enforce daily limit: reserve a generation up front, charge it only if the model delivers
+    reservation = AIQuotaService.reserve(current_user.id)
+    if reservation is None:
+        limit = AIQuotaService.limit()
+        return jsonify({'success': False, 'error': f'Daily AI generation limit reached ({limit}/day). Try again tomorrow!'}), 429
 
     try:
         quiz_data = AIQuizService.generate_quiz(topic, description, num_questions, difficulty)
-        model_used = quiz_data.pop('model_used', 'unknown')
-        # Log activity FIRST, then query usage so remaining is accurate
-        ActivityService.log_activity(current_user.id, 'AI Generate', f'Generated AI quiz: "{topic}" (model: {model_used})')
-        _, new_remaining = AIQuizService.get_daily_usage(current_user.id)
-        return jsonify({'success': True, 'quiz': quiz_data, 'model_used': model_used, 'ai_remaining': new_remaining})
     except Exception as e:
+        AIQuotaService.refund(reservation)
         return jsonify({'success': False, 'error': str(e)}), 500
 
+    AIQuotaService.commit(reservation)
+    model_used = quiz_data.pop('model_used', 'unknown')
+    ActivityService.log_activity(current_user.id, 'AI Generate', f'Generated AI quiz: "{topic}" (model: {model_used})')
+    _, new_remaining = AIQuotaService.usage(current_user.id)
+    return jsonify({'success': True, 'quiz': quiz_data, 'model_used': model_used, 'ai_remaining': new_remaining})
+
 
 @quiz_bp.route('/quiz/ai-save', methods=['POST'])
 @login_required
@@ -104,49 +110,75 @@ def list_quizzes():
     ai_limit = current_app.config.get('AI_DAILY_LIMIT', 6)
     return render_template('quiz/list.html', quizzes=quizzes, ai_remaining=ai_remaining, ai_limit=ai_limit)
 
-@quiz_bp.route('/explore')
-def explore_quizzes():
-    from app.models.quiz import Quiz
-    from app.models.attempt import Attempt
-    from sqlalchemy import func
-
+def _explore_params():
     search_query = request.args.get('q', '').strip()
     filter_status = request.args.get('status', 'active')
-    sort_by = request.args.get('sort', 'newest')
+    sort_by = request.args.get('sort', 'relevance' if search_query else 'newest')
+    return search_query, filter_status, sort_by
 
-    query = Quiz.query
 
-    if filter_status == 'all':
-        query = query.filter(Quiz.status.in_(['active', 'scheduled', 'closed']))
-    else:
-        query = query.filter_by(status=filter_status)
+def _explore_listing(page):
+    viewer_id = current_user.id if current_user.is_authenticated else None
+    return QuizListing.wrap(page.items, viewer_id=viewer_id)
 
-    if search_query:
-        query = query.filter(Quiz.title.ilike(f'%{search_query}%') | Quiz.description.ilike(f'%{search_query}%'))
 
-    if sort_by == 'popular':
-        query = query.outerjoin(Attempt).group_by(Quiz.id).order_by(func.count(Attempt.id).desc())
-    else:
-        query = query.order_by(Quiz.created_at.desc())
-
-    public_quizzes = query.all()
-    
-    user_attempts = {}
-    if current_user.is_authenticated:
-        from app import db
-        attempts = db.session.query(Attempt.quiz_id, func.count(Attempt.id)).filter_by(user_id=current_user.id).group_by(Attempt.quiz_id).all()
-        user_attempts = {quiz_id: count for quiz_id, count in attempts}
-        
-    now = datetime.now()
-    
+@quiz_bp.route('/explore')
+def explore_quizzes():
+    search_query, filter_status, sort_by = _explore_params()
+
+    try:
+        page = QuizService.explore_page(
+            status=filter_status,
+            search_query=search_query,
+            sort_by=sort_by,
+            cursor=request.args.get('cursor'),
+            per_page=current_app.config.get('EXPLORE_PAGE_SIZE', 24),
+        )
+    except InvalidCursor:
+        return redirect(url_for('quiz.explore_quizzes', q=search_query, status=filter_status, sort=sort_by))
+
     return render_template('quiz/explore.html', 
-        quizzes=public_quizzes,
+        quizzes=_explore_listing(page),
+        next_cursor=page.next_cursor,
         search_query=search_query,
         current_status=filter_status,
         current_sort=sort_by,
-        user_attempts=user_attempts,
-        now=now
+        now=datetime.now()
+    )
+
+
+@quiz_bp.route('/explore/feed')
+def explore_feed():
+    """JSON variant of the explore listing for infinite scroll."""
+    search_query, filter_status, sort_by = _explore_params()
+
+    try:
+        page = QuizService.explore_page(
+            status=filter_status,
+            search_query=search_query,
+            sort_by=sort_by,
+            cursor=request.args.get('cursor'),
+            per_page=current_app.config.get('EXPLORE_PAGE_SIZE', 24),
+        )
+    except InvalidCursor as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    html = render_template('quiz/_explore_cards.html',
+        quizzes=_explore_listing(page),
+        now=datetime.now()
     )
+    return jsonify({
+        'success': True,
+        'quizzes': [{
+            'id': quiz.id,
+            'title': quiz.title,
+            'status': quiz.status,
+            'time_limit': quiz.time_limit,
+            'created_at': quiz.created_at.isoformat() if quiz.created_at else None,
+        } for quiz in page.items],
+        'html': html,
+        'next_cursor': page.next_cursor,
+    })
 
 @quiz_bp.route('/quiz/new', methods=['GET', 'POST'])
 @login_required
@@ -0,0 +1,291 @@
+"""
+Activity Log Retention
+──────────────────────
+`activities` keeps ACTIVITY_RETENTION_MONTHS of history, the current month
+included.  Older months are written to gzip-compressed JSON Lines files in
+ACTIVITY_ARCHIVE_DIR, one file per month, and then removed from the database:
+
+    postgres → activities is range-partitioned by month on timestamp
+               (activities_pYYYYMM, plus activities_default for anything
+               outside them).  Archiving a month detaches and drops its
+               partition, and time-filtered queries such as the daily AI
+               usage count are pruned to the partitions they need.
+    sqlite   → one table; a month is a timestamp range, read and deleted in
+               batches through ix_activities_timestamp_id.
+
+`flask activity-archive` creates the coming months' partitions and archives
+expired months — run it daily from cron.  Archiving is at-least-once: if the
+process dies between writing a file and deleting the rows, the next run
+appends them again and searches drop the duplicates by id.
+
+Archived months stay searchable from the admin activity log.  A search
+streams a single month's file, so it never touches the database or the
+other months.
+"""
+
+import gzip
+import json
+import logging
+import os
+import re
+from collections import deque
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import text
+
+from app import db
+from app.models.activity import Activity
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_RE = re.compile(r'^activities-(\d{4}-\d{2})\.jsonl\.gz$')
+
+# Rows deleted per transaction when a month is not a partition of its own
+DELETE_BATCH = 5000
+
+
+def month_start(when):
+    return when.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month, n):
+    index = month.year * 12 + month.month - 1 + n
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def month_key(month):
+    return month.strftime('%Y-%m')
+
+
+def parse_month(key):
+    """'YYYY-MM' → first instant of that month, or None."""
+    try:
+        return datetime.strptime(key or '', '%Y-%m')
+    except ValueError:
+        return None
+
+
+def partition_name(month):
+    return f'activities_p{month:%Y%m}'
+
+
+class ActivityArchiveService:
+    @staticmethod
+    def archive_dir():
+        return current_app.config.get('ACTIVITY_ARCHIVE_DIR', os.path.join('instance', 'activity_archive'))
+
+    @staticmethod
+    def archive_path(month):
+        return os.path.join(ActivityArchiveService.archive_dir(), f'activities-{month_key(month)}.jsonl.gz')
+
+    @staticmethod
+    def cutoff(now=None):
+        """First month still kept in the database."""
+        months = max(1, current_app.config.get('ACTIVITY_RETENTION_MONTHS', 6))
+        return add_months(month_start(now or datetime.utcnow()), -(months - 1))
+
+    # ── Partitions (Postgres) ────────────────────────────────────────
+
+    @staticmethod
+    def is_partitioned():
+        if db.engine.dialect.name != 'postgresql':
+            return False
+        relkind = db.session.execute(
+            text("SELECT relkind FROM pg_class WHERE oid = 'activities'::regclass")
+        ).scalar()
+        return relkind == 'p'
+
+    @staticmethod
+    def partitions():
+        """Monthly partitions that exist → {month: partition name}."""
+        names = db.session.execute(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'activities'::regclass"
+        )).scalars()
+        months = {}
+        for name in names:
+            match = re.fullmatch(r'activities_p(\d{4})(\d{2})', name)
+            if match:
+                months[datetime(int(match[1]), int(match[2]), 1)] = name
+        return months
+
+    @staticmethod
+    def ensure_partitions(now=None):
+        """
+        Create this month's and the next ACTIVITY_PARTITIONS_AHEAD months'
+        partitions, one transaction each, so one failing month does not undo
+        the others.  Returns names created.
+        """
+        if not ActivityArchiveService.is_partitioned():
+            return []
+        existing = ActivityArchiveService.partitions()
+        first = month_start(now or datetime.utcnow())
+        created = []
+        for n in range(current_app.config.get('ACTIVITY_PARTITIONS_AHEAD', 2) + 1):
+            month = add_months(first, n)
+            if month in existing:
+                continue
+            try:
+                ActivityArchiveService._create_partition(month)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                logger.exception('Failed to create activity partition %s', partition_name(month))
+                continue
+            created.append(partition_name(month))
+        return created
+
+    @staticmethod
+    def _create_partition(month):
+        """
+        CREATE TABLE … PARTITION OF fails while activities_default holds rows
+        in the new range (the cron lapsed for longer than the months created
+        ahead).  Those rows are then moved over in the same transaction: detach
+        the default partition, create the month, move its rows, re-attach.
+        """
+        name = partition_name(month)
+        bounds = {'start': month, 'end': add_months(month, 1)}
+        in_range = '"timestamp" >= :start AND "timestamp" < :end'
+        create = (f"CREATE TABLE {name} PARTITION OF activities "
+                  f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{add_months(month, 1):%Y-%m-%d}')")
+
+        stranded = db.session.execute(
+            text(f'SELECT 1 FROM activities_default WHERE {in_range} LIMIT 1'), bounds
+        ).first()
+        if stranded is None:
+            db.session.execute(text(create))
+            return
+
+        # Locks activities until commit; writers wait rather than fail
+        db.session.execute(text('ALTER TABLE activities DETACH PARTITION activities_default'))
+        db.session.execute(text(create))
+        moved = db.session.execute(text(
+            f'WITH moved AS (DELETE FROM activities_default WHERE {in_range} '
+            f'RETURNING id, user_id, action_type, description, "timestamp") '
+            f'INSERT INTO {name} (id, user_id, action_type, description, "timestamp") '
+            f'SELECT id, user_id, action_type, description, "timestamp" FROM moved'
+        ), bounds).rowcount
+        db.session.execute(text('ALTER TABLE activities ATTACH PARTITION activities_default DEFAULT'))
+        logger.info('Moved %d activity rows from activities_default into %s', moved, name)
+
+    # ── Archiving ────────────────────────────────────────────────────
+
+    @staticmethod
+    def expired_months(now=None):
+        """Months before the retention cutoff that still have rows, oldest first."""
+        cutoff = ActivityArchiveService.cutoff(now)
+        oldest = db.session.query(db.func.min(Activity.timestamp)).scalar()
+        months = []
+        month = month_start(oldest) if oldest else cutoff
+        while month < cutoff:
+            months.append(month)
+            month = add_months(month, 1)
+        return months
+
+    @staticmethod
+    def archive_month(month):
+        """Append one month's rows to its archive file, then remove them. Returns rows archived."""
+        end = add_months(month, 1)
+        in_month = (Activity.timestamp >= month, Activity.timestamp < end)
+        rows = (db.session.query(Activity.id, Activity.user_id, Activity.action_type,
+                                 Activity.description, Activity.timestamp)
+                .filter(*in_month)
+                .order_by(Activity.timestamp, Activity.id)
+                .execution_options(yield_per=5000))
+
+        count = 0
+        if db.session.query(Activity.id).filter(*in_month).first() is not None:
+            count = ActivityArchiveService._write_archive(month, rows)
+
+        partition = (ActivityArchiveService.partitions().get(month)
+                     if ActivityArchiveService.is_partitioned() else None)
+        if partition:
+            db.session.execute(text(f'ALTER TABLE activities DETACH PARTITION {partition}'))
+            db.session.execute(text(f'DROP TABLE {partition}'))
+            db.session.commit()
+        # Rows outside any monthly partition (activities_default, or the whole table on SQLite)
+        while True:
+            ids = [row.id for row in (db.session.query(Activity.id)
+                                      .filter(*in_month).limit(DELETE_BATCH))]
+            if not ids:
+                break
+            Activity.query.filter(Activity.id.in_(ids), *in_month).delete(synchronize_session=False)
+            db.session.commit()
+        return count
+
+    @staticmethod
+    def _write_archive(month, rows):
+        path = ActivityArchiveService.archive_path(month)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        count = 0
+        # Appending adds a gzip member; readers see one continuous stream
+        with open(path, 'ab') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb') as archive:
+                for row in rows:
+                    archive.write(json.dumps({
+                        'id': row.id,
+                        'user_id': row.user_id,
+                        'action_type': row.action_type,
+                        'description': row.description,
+                        'timestamp': row.timestamp.isoformat(),
+                    }, separators=(',', ':')).encode() + b'\n')
+                    count += 1
+            raw.flush()
+            os.fsync(raw.fileno())
+        return count
+
+    @staticmethod
+    def archive_expired(now=None):
+        """Archive every month past retention. Returns {'YYYY-MM': rows archived}."""
+        archived = {}
+        for month in ActivityArchiveService.expired_months(now):
+            archived[month_key(month)] = ActivityArchiveService.archive_month(month)
+            logger.info('Archived %d activity rows for %s', archived[month_key(month)], month_key(month))
+        return archived
+
+    # ── Reading archives ─────────────────────────────────────────────
+
+    @staticmethod
+    def archived_months():
+        """[{'month': 'YYYY-MM', 'size': bytes}], newest first."""
+        directory = ActivityArchiveService.archive_dir()
+        if not os.path.isdir(directory):
+            return []
+        months = []
+        for name in os.listdir(directory):
+            match = ARCHIVE_RE.match(name)
+            if match:
+                months.append({'month': match[1], 'size': os.path.getsize(os.path.join(directory, name))})
+        return sorted(months, key=lambda m: m['month'], reverse=True)
+
+    @staticmethod
+    def search(month, user_id=None, action_type='', q='', limit=200):
+        """
+        Newest-first archived rows of one month matching the filters.
+        Returns (rows, truncated) — truncated when more than `limit` matched.
+        """
+        path = ActivityArchiveService.archive_path(month)
+        if not os.path.exists(path):
+            return [], False
+        needle = (q or '').strip().lower()
+        matches = deque(maxlen=limit)
+        seen = set()
+        matched = 0
+        with gzip.open(path, 'rt', encoding='utf-8') as archive:
+            for line in archive:
+                row = json.loads(line)
+                if user_id is not None and row['user_id'] != user_id:
+                    continue
+                if action_type and row['action_type'] != action_type:
+                    continue
+                if needle and needle not in (row['description'] or '').lower():
+                    continue
+                if row['id'] in seen:
+                    continue
+                seen.add(row['id'])
+                row['timestamp'] = datetime.fromisoformat(row['timestamp'])
+                matches.append(row)
+                matched += 1
+        rows = sorted(matches, key=lambda r: (r['timestamp'], r['id']), reverse=True)
+        return rows, matched > limit
@@ -1,19 +1,207 @@
+"""
+Activity Logging
+────────────────
+Activity rows are an audit trail, not part of the action being logged, so
+they need not cost the request a commit of their own.
+
+Modes (ACTIVITY_LOG):
+
+    async  → events are queued in memory and a background thread writes them
+             with one bulk INSERT per batch, once ACTIVITY_FLUSH_SIZE events
+             are waiting or ACTIVITY_FLUSH_SECONDS have passed (default on
+             long-running servers)
+    sync   → every event is inserted and committed before log_activity returns
+             (default on serverless platforms — Vercel, AWS Lambda — where
+             the process may be frozen or killed right after the response)
+
+The queue holds at most ACTIVITY_QUEUE_SIZE events.  When it is full,
+ACTIVITY_QUEUE_FULL decides: 'inline' writes the event synchronously (slower
+requests, nothing lost) or 'drop' discards it (counted on the admin panel).
+Queued events are flushed when the process exits; a hard kill loses at most
+one flush interval of them.
+
+A failed write never rolls back the caller's session: sync inserts run in a
+savepoint, and queued batches are written by the worker's own session.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime
+
+from flask import current_app
+
 from app import db
 from app.models.activity import Activity
+from app.services.fragment_cache_service import FragmentCacheService, DASHBOARD_ACTIONS
+
+logger = logging.getLogger(__name__)
+
+# ── Background queue ─────────────────────────────────────────────────
+
+class ActivityQueue:
+    """Bounded in-memory queue of activity rows drained by one writer thread."""
+
+    def __init__(self, app):
+        self.app = app
+        self.pid = os.getpid()
+        self._events = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='activity-logger', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def put(self, event: dict) -> bool:
+        """Queue one row; False if the queue is full."""
+        config = self.app.config
+        with self._cond:
+            if self._stopping or len(self._events) >= config.get('ACTIVITY_QUEUE_SIZE', 10000):
+                return False
+            self._events.append(event)
+            if len(self._events) >= config.get('ACTIVITY_FLUSH_SIZE', 200):
+                self._cond.notify()
+        return True
+
+    def depth(self) -> int:
+        return len(self._events)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._stopping and len(self._events) < self.app.config.get('ACTIVITY_FLUSH_SIZE', 200):
+                    self._cond.wait(self.app.config.get('ACTIVITY_FLUSH_SECONDS', 1.0))
+                stopping = self._stopping
+            self.flush()
+            if stopping:
+                return
+
+    def flush(self) -> int:
+        """Write everything queued so far in bulk batches. Returns rows written."""
+        batch_size = self.app.config.get('ACTIVITY_FLUSH_SIZE', 200)
+        written = 0
+        with self._flush_lock, self.app.app_context():
+            while True:
+                with self._cond:
+                    batch = [self._events.popleft() for _ in range(min(batch_size, len(self._events)))]
+                if not batch:
+                    break
+                try:
+                    db.session.bulk_insert_mappings(Activity, batch)
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    logger.exception('Failed to write %d queued activity rows', len(batch))
+                    _count('failed', len(batch))
+                    with self._cond:
+                        # Retried on the next flush, as far as the queue has room
+                        room = self.app.config.get('ACTIVITY_QUEUE_SIZE', 10000) - len(self._events)
+                        retry = batch[:max(0, room)]
+                        self._events.extendleft(reversed(retry))
+                    _count('dropped', len(batch) - len(retry))
+                    break
+                written += len(batch)
+                _count('written', len(batch))
+                _count('batches')
+        return written
+
+    def stop(self):
+        """Stop accepting events, flush what is queued and end the thread."""
+        with self._cond:
+            if self._stopping:
+                return
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join(timeout=self.app.config.get('ACTIVITY_SHUTDOWN_TIMEOUT', 10))
+
+
+# Per-process queue, recreated after a fork (the writer thread does not survive one)
+_queue: ActivityQueue | None = None
+_queue_lock = threading.Lock()
+
+_stats = {'queued': 0, 'written': 0, 'batches': 0, 'inline': 0, 'dropped': 0, 'failed': 0}
+_stats_lock = threading.Lock()
+
+
+def _count(stat, n=1):
+    with _stats_lock:
+        _stats[stat] += n
+
+
+def _get_queue():
+    global _queue
+    app = current_app._get_current_object()
+    with _queue_lock:
+        if _queue is None or _queue.pid != os.getpid() or _queue.app is not app:
+            _queue = ActivityQueue(app)
+        return _queue
+
+
+# ── Activity Service ─────────────────────────────────────────────────
 
 class ActivityService:
     @staticmethod
     def log_activity(user_id, action_type, description):
+        """
+        Record an activity. Returns the Activity when written synchronously,
+        None when queued (or if writing failed — logging never breaks a request).
+        """
+        if current_app.config.get('ACTIVITY_LOG', 'sync') == 'async':
+            event = {
+                'user_id': user_id,
+                'action_type': action_type,
+                'description': (description or '')[:255] or None,
+                'timestamp': datetime.utcnow(),
+            }
+            if _get_queue().put(event):
+                _count('queued')
+                activity = None
+            elif current_app.config.get('ACTIVITY_QUEUE_FULL', 'inline') == 'drop':
+                _count('dropped')
+                return None
+            else:
+                _count('inline')
+                activity = ActivityService._write(user_id, action_type, description)
+        else:
+            activity = ActivityService._write(user_id, action_type, description)
+
+        if action_type in DASHBOARD_ACTIONS:
+            FragmentCacheService.invalidate_user(user_id)
+        return activity
+
+    @staticmethod
+    def _write(user_id, action_type, description):
+        activity = Activity(user_id=user_id, action_type=action_type, description=description)
+        try:
+            # A failed insert rolls back only its savepoint, not the caller's work
+            with db.session.begin_nested():
+                db.session.add(activity)
+        except Exception:
+            logger.exception('Failed to log activity %r for user %s', action_type, user_id)
+            return None
         try:
-            activity = Activity(
-                user_id=user_id,
-                action_type=action_type,
-                description=description
-            )
-            db.session.add(activity)
             db.session.commit()
-            return activity
-        except Exception as e:
+        except Exception:
+            logger.exception('Failed to commit activity %r for user %s', action_type, user_id)
             db.session.rollback()
-            # Do not crash the main thread if logging fails
             return None
+        return activity
+
+    @staticmethod
+    def flush():
+        """Write this process's queued events now. Returns rows written."""
+        with _queue_lock:
+            queue = _queue
+        return queue.flush() if queue is not None and queue.pid == os.getpid() else 0
+
+    @staticmethod
+    def stats():
+        with _stats_lock:
+            stats = dict(_stats)
+        with _queue_lock:
+            stats['depth'] = _queue.depth() if _queue is not None else 0
+        stats['mode'] = current_app.config.get('ACTIVITY_LOG', 'sync')
+        return stats
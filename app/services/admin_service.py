@@ -0,0 +1,206 @@
+"""
+Admin Listings
+──────────────
+Server-side filtered, sorted and keyset-paginated tables for the admin
+panel.  Every sort is backed by an index whose trailing column is the
+primary key, so a page is one bounded index range read however many users
+or quizzes exist.
+
+    users       newest / oldest → (joined_at, id)     username → (username, id)
+    quizzes     newest / oldest → (created_at, id)    popular  → (attempt_count, id)
+    activities  newest → (timestamp, id), optionally led by action_type or user_id
+
+Filters narrow the same query: status, role / creator, a date range on
+joined_at / created_at, and text (username / email prefix for users, the
+full-text search index for quizzes).  The activity log filters by exact
+action type and user only, so every filter combination stays an index seek.
+
+Activity totals are never an exact COUNT(*) over the whole table: the
+unfiltered total is the planner's row estimate on Postgres, filtered totals
+stop counting at ACTIVITY_COUNT_CAP, and both are cached for
+ACTIVITY_COUNT_TTL seconds.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from flask import current_app
+from sqlalchemy import func, or_, select, text
+from sqlalchemy.orm import joinedload
+
+from app import db
+from app.models.user import User
+from app.models.quiz import Quiz
+from app.models.activity import Activity
+from app.services.listing_service import QuizListing
+from app.services.search_service import SearchService
+from app.utils.pagination import keyset_paginate
+
+USER_SORTS = {
+    'newest': [(User.joined_at, True), (User.id, True)],
+    'oldest': [(User.joined_at, False), (User.id, False)],
+    'username': [(User.username, False), (User.id, False)],
+}
+
+QUIZ_SORTS = {
+    'newest': [(Quiz.created_at, True), (Quiz.id, True)],
+    'oldest': [(Quiz.created_at, False), (Quiz.id, False)],
+    'popular': [(Quiz.attempt_count, True), (Quiz.id, True)],
+}
+
+ACTIVITY_KEYS = [(Activity.timestamp, True), (Activity.id, True)]
+
+QUIZ_STATUSES = ('draft', 'scheduled', 'active', 'closed', 'suspended')
+
+
+class LogCount(NamedTuple):
+    """An activity total as shown to admins: exact, estimated (~) or a lower bound (+)."""
+    value: int
+    approximate: bool = False
+    capped: bool = False
+
+    @property
+    def label(self):
+        return f"{'~' if self.approximate else ''}{self.value:,}{'+' if self.capped else ''}"
+
+
+# (user_id, action_type) → (expires_at, LogCount); per process, bounded by the few filter combos in use
+_counts: dict[tuple, tuple[float, LogCount]] = {}
+_counts_lock = threading.Lock()
+_COUNTS_MAX = 1000
+
+
+def parse_date(value):
+    """YYYY-MM-DD from a filter box, or None if blank / malformed."""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d') if value else None
+    except ValueError:
+        return None
+
+
+def _date_range(query, column, date_from, date_to):
+    if date_from:
+        query = query.filter(column >= date_from)
+    if date_to:
+        # Inclusive of the whole end day
+        query = query.filter(column < date_to + timedelta(days=1))
+    return query
+
+
+def _user_prefix_match(prefix):
+    """Case-insensitive username / email prefix match that the lower(col) indexes can serve."""
+    pattern = prefix.lower() + '%'
+    return or_(func.lower(User.username).like(pattern), func.lower(User.email).like(pattern))
+
+
+class AdminService:
+    @staticmethod
+    def users_page(q='', status='', role='', date_from=None, date_to=None,
+                   sort='newest', cursor=None, per_page=50):
+        """One page of the user table. Raises InvalidCursor on a bad cursor."""
+        query = User.query
+        if q:
+            query = query.filter(_user_prefix_match(q.strip().replace('%', '').replace('_', '')))
+        if status == 'active':
+            query = query.filter(User.is_suspended.isnot(True))
+        elif status == 'suspended':
+            query = query.filter(User.is_suspended == True)
+        if role == 'admin':
+            query = query.filter(User.is_admin == True)
+        elif role == 'user':
+            query = query.filter(User.is_admin.isnot(True))
+        query = _date_range(query, User.joined_at, date_from, date_to)
+
+        return keyset_paginate(query, USER_SORTS.get(sort, USER_SORTS['newest']), cursor, per_page)
+
+    @staticmethod
+    def quizzes_page(q='', status='', creator='', date_from=None, date_to=None,
+                     sort='newest', cursor=None, per_page=50):
+        """One page of the quiz table (QuizListing rows). Raises InvalidCursor on a bad cursor."""
+        query = QuizListing.query()
+        if status in QUIZ_STATUSES:
+            query = query.filter(Quiz.status == status)
+        if creator:
+            creator_id = (User.query.with_entities(User.id)
+                          .filter(or_(User.username == creator, User.email == creator.lower()))
+                          .scalar())
+            query = query.filter(Quiz.creator_id == creator_id)
+        query = _date_range(query, Quiz.created_at, date_from, date_to)
+        if q:
+            query, _ = SearchService.search(query, q)
+
+        page = keyset_paginate(query, QUIZ_SORTS.get(sort, QUIZ_SORTS['newest']), cursor, per_page)
+        page.items = QuizListing.wrap(page.items)
+        return page
+
+    @staticmethod
+    def lookup_users(q, limit=10):
+        """Typeahead for user pickers: username / email prefix matches, by username."""
+        prefix = (q or '').strip().replace('%', '').replace('_', '')
+        if not prefix:
+            return []
+        return (User.query
+                .with_entities(User.id, User.username, User.email)
+                .filter(_user_prefix_match(prefix))
+                .order_by(User.username)
+                .limit(limit)
+                .all())
+
+    # ── Activity log ──────────────────────────────────────────────────
+
+    @staticmethod
+    def _activity_query(user_id=None, action_type=''):
+        query = Activity.query
+        if user_id is not None:
+            query = query.filter(Activity.user_id == user_id)
+        if action_type:
+            query = query.filter(Activity.action_type == action_type)
+        return query
+
+    @staticmethod
+    def activity_page(user_id=None, action_type='', cursor=None, per_page=50):
+        """One page of the activity log, newest first. Raises InvalidCursor on a bad cursor."""
+        query = AdminService._activity_query(user_id, action_type).options(joinedload(Activity.user))
+        return keyset_paginate(query, ACTIVITY_KEYS, cursor, per_page)
+
+    @staticmethod
+    def activity_count(user_id=None, action_type=''):
+        """Cached LogCount of the log entries matching these filters."""
+        key = (user_id, action_type)
+        now = time.monotonic()
+        with _counts_lock:
+            cached = _counts.get(key)
+            if cached and cached[0] > now:
+                return cached[1]
+
+        count = None
+        if user_id is None and not action_type:
+            count = AdminService._estimated_activity_total()
+        if count is None:
+            cap = current_app.config.get('ACTIVITY_COUNT_CAP', 10000)
+            matching = (AdminService._activity_query(user_id, action_type)
+                        .with_entities(Activity.id).limit(cap + 1).subquery())
+            value = db.session.execute(select(func.count()).select_from(matching)).scalar()
+            count = LogCount(min(value, cap), capped=value > cap)
+
+        with _counts_lock:
+            if len(_counts) >= _COUNTS_MAX:
+                _counts.clear()
+            _counts[key] = (now + current_app.config.get('ACTIVITY_COUNT_TTL', 60), count)
+        return count
+
+    @staticmethod
+    def _estimated_activity_total():
+        """Postgres' row estimate for the whole table (kept fresh by autovacuum), or None."""
+        if db.engine.dialect.name != 'postgresql':
+            return None
+        # Summed over the monthly partitions; a partitioned parent has no estimate of its own
+        estimate = db.session.execute(text(
+            "SELECT sum(greatest(reltuples, 0))::bigint FROM pg_class "
+            "WHERE oid = 'activities'::regclass "
+            "OR oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = 'activities'::regclass)"
+        )).scalar()
+        # -1 / 0 until the table has been analyzed
+        return LogCount(int(estimate), approximate=True) if estimate and estimate > 0 else None
@@ -1,19 +1,33 @@
 """
 Gemini Multi-Model AI Quiz Service
 ───────────────────────────────────
-Supports round-robin model rotation, automatic fallback on retryable errors,
-per-model cooldown, structured logging, and DB usage tracking.
+Supports adaptive model routing (model_router: expected time to a valid
+quiz, per-model circuit breakers), automatic fallback on retryable errors,
+structured logging, and DB usage tracking.
+API calls go through the process-wide client pool (gemini_client_pool).
+
+Fallback is sequential by default: the next model is asked only after the
+previous one failed.  With GEMINI_HEDGE_DELAY set it is hedged instead: if
+no valid quiz has arrived after that many seconds, the next model is asked
+too (up to GEMINI_HEDGE_MAX_IN_FLIGHT at once; a delay of 0 races them).
+The first response that passes validation wins and the other requests are
+cancelled.  Every request is counted against its own model — success,
+failure, or cancelled.
 """
 
 import json
 import time
+from concurrent.futures import FIRST_COMPLETED, wait
 import logging
-import threading
-from datetime import datetime, timedelta
+from datetime import datetime
 
-from google import genai
+from google.genai import types
 from flask import current_app
 
+from app.services.gemini_client_pool import get_client_pool
+from app.services import model_router
+from app.services.model_router import get_model_router
+
 logger = logging.getLogger(__name__)
 
 
@@ -29,50 +43,14 @@ class NonRetryableError(Exception):
     pass
 
 
-# ── Round-Robin Model Selector ───────────────────────────────────────
-
-class ModelSelector:
-    """Thread-safe round-robin model selector with cooldown tracking."""
-
-    def __init__(self):
-        self._index = 0
-        self._lock = threading.Lock()
-        # model_name → datetime when cooldown expires
-        self._cooldowns: dict[str, datetime] = {}
-
-    def next_model(self, models: list[str]) -> str:
-        """Return the next model in round-robin order."""
-        with self._lock:
-            model = models[self._index % len(models)]
-            self._index = (self._index + 1) % len(models)
-            return model
-
-    def mark_cooldown(self, model_name: str, minutes: int) -> None:
-        with self._lock:
-            self._cooldowns[model_name] = datetime.now() + timedelta(minutes=minutes)
-            logger.warning('Model %s cooled down for %d minutes', model_name, minutes)
-
-    def is_available(self, model_name: str) -> bool:
-        with self._lock:
-            expires = self._cooldowns.get(model_name)
-            if expires is None:
-                return True
-            if datetime.now() >= expires:
-                del self._cooldowns[model_name]
-                return True
-            return False
-
-    def get_available_models(self, models: list[str]) -> list[str]:
-        return [m for m in models if self.is_available(m)]
-
-    def get_cooldowns(self) -> dict[str, datetime]:
-        with self._lock:
-            now = datetime.now()
-            return {k: v for k, v in self._cooldowns.items() if v > now}
+class RateLimitedError(RetryableError):
+    """The model is rate-limited or out of quota; its circuit opens at once."""
+    pass
 
 
-# Module-level singleton — survives across requests
-_selector = ModelSelector()
+class InvalidResponseError(RetryableError):
+    """The model answered, but not with a usable quiz."""
+    pass
 
 
 # ── AI Quiz Service ──────────────────────────────────────────────────
@@ -98,48 +76,57 @@ class AIQuizService:
         fallback = current_app.config.get('GEMINI_FALLBACK_ENABLED', True)
         max_retries = current_app.config.get('GEMINI_MAX_RETRIES', 3)
         timeout = current_app.config.get('GEMINI_TIMEOUT', 60)
-        cooldown_min = current_app.config.get('GEMINI_COOLDOWN_MINUTES', 5)
+        hedge_delay = current_app.config.get('GEMINI_HEDGE_DELAY')
+        hedge_max = current_app.config.get('GEMINI_HEDGE_MAX_IN_FLIGHT', 2)
 
         if fallback:
             return AIQuizService._generate_with_fallback(
-                api_key, prompt, models, max_retries, timeout, cooldown_min
+                api_key, prompt, models, max_retries, timeout, hedge_delay, hedge_max,
             )
         else:
-            # Single model, no fallback
-            model = _selector.next_model(models)
-            return AIQuizService._generate_with_model(api_key, model, prompt, timeout)
+            # Single model, no fallback: the best-ranked one
+            return AIQuizService._generate_with_fallback(api_key, prompt, models, 1, timeout)
 
     # ── Fallback engine ──────────────────────────────────────────
 
     @staticmethod
-    def _generate_with_fallback(api_key, prompt, models, max_retries, timeout, cooldown_min):
+    def _generate_with_fallback(api_key, prompt, models, max_retries, timeout,
+                                hedge_delay=None, hedge_max=2):
         """
-        Iterate through available models with retry logic.
+        Try models in routing order with retry logic.
         Retryable errors trigger fallback to the next model.
         Non-retryable errors stop the loop immediately.
+        With a hedge_delay the models are asked concurrently (see _generate_hedged).
         """
         attempts = 0
         errors = []
 
-        # Build an ordered candidate list starting from the round-robin position
-        available = _selector.get_available_models(models)
-        if not available:
-            # All models cooled down — try anyway with full list
-            logger.warning('All models are in cooldown — trying full list.')
-            available = list(models)
+        router = get_model_router()
+        candidates = router.ranked(models)
+        if not candidates:
+            raise RuntimeError('All AI models are temporarily unavailable. Please try again in a minute.')
 
-        for model in available:
+        if hedge_delay is not None and hedge_max > 1 and len(candidates) > 1:
+            return AIQuizService._generate_hedged(
+                api_key, prompt, candidates[:max_retries], timeout, hedge_delay, hedge_max
+            )
+
+        for model in candidates:
             if attempts >= max_retries:
                 break
+            if not router.begin(model):
+                # Its half-open probe was claimed by another request meanwhile
+                continue
 
             attempts += 1
             logger.info('[Attempt %d/%d] Trying model: %s', attempts, max_retries, model)
+            started = time.monotonic()
 
             try:
                 result = AIQuizService._generate_with_model(api_key, model, prompt, timeout)
 
                 # Success — record to DB
-                AIQuizService._record_usage(model, success=True)
+                AIQuizService._account(model, None, time.monotonic() - started)
                 logger.info('✅ Success with model: %s', model)
 
                 result['model_used'] = model
@@ -148,20 +135,19 @@ class AIQuizService:
             except RetryableError as e:
                 logger.warning('⚠️  Retryable error on %s: %s', model, e)
                 errors.append(f'{model}: {e}')
-                _selector.mark_cooldown(model, cooldown_min)
-                AIQuizService._record_usage(model, success=False)
+                AIQuizService._account(model, e, time.monotonic() - started)
                 continue
 
             except NonRetryableError as e:
                 logger.error('🛑 Non-retryable error on %s: %s', model, e)
                 errors.append(f'{model}: {e}')
-                AIQuizService._record_usage(model, success=False)
+                AIQuizService._account(model, e, time.monotonic() - started)
                 break
 
             except Exception as e:
                 logger.error('❌ Unexpected error on %s: %s', model, e)
                 errors.append(f'{model}: {e}')
-                AIQuizService._record_usage(model, success=False)
+                AIQuizService._account(model, e, time.monotonic() - started)
                 continue
 
         error_details = '; '.join(errors)
@@ -169,6 +155,114 @@ class AIQuizService:
             f'All AI models failed after {attempts} attempt(s). Errors: {error_details}'
         )
 
+    # ── Hedged engine ────────────────────────────────────────────
+
+    @staticmethod
+    def _generate_hedged(api_key, prompt, candidates, timeout, delay, max_in_flight):
+        """
+        Ask `candidates` in order, starting the next one when nothing valid has
+        arrived `delay` seconds after the last start (immediately when a request
+        fails), with at most `max_in_flight` requests outstanding.  Returns the
+        first valid quiz and cancels the requests still running.
+        """
+        pool = get_client_pool()
+        router = get_model_router()
+        queue = list(candidates)
+        in_flight = {}  # future → (model, started)
+        errors = []
+        started = 0
+        fatal = False
+        next_start = time.monotonic()
+
+        try:
+            while queue or in_flight:
+                can_start = queue and len(in_flight) < max_in_flight
+                if can_start and (not in_flight or time.monotonic() >= next_start):
+                    model = queue.pop(0)
+                    if not router.begin(model):
+                        continue
+                    started += 1
+                    logger.info('[Hedge %d/%d] Trying model: %s', started, len(candidates), model)
+                    future = pool.submit(api_key, AIQuizService._request_async(model, prompt, timeout))
+                    in_flight[future] = (model, time.monotonic())
+                    next_start = time.monotonic() + delay
+                    continue
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED,
+                               timeout=max(0.0, next_start - time.monotonic()) if can_start else None)
+                for future in done:
+                    model, began = in_flight.pop(future)
+                    try:
+                        result = AIQuizService._parse_response(model, AIQuizService._outcome(future))
+
+                    except RetryableError as e:
+                        logger.warning('⚠️  Retryable error on %s: %s', model, e)
+                        errors.append(f'{model}: {e}')
+                        AIQuizService._account(model, e, time.monotonic() - began)
+                        next_start = time.monotonic()
+
+                    except NonRetryableError as e:
+                        logger.error('🛑 Non-retryable error on %s: %s', model, e)
+                        errors.append(f'{model}: {e}')
+                        AIQuizService._account(model, e, time.monotonic() - began)
+                        fatal = True
+                        break
+
+                    except Exception as e:
+                        logger.error('❌ Unexpected error on %s: %s', model, e)
+                        errors.append(f'{model}: {e}')
+                        AIQuizService._account(model, e, time.monotonic() - began)
+                        next_start = time.monotonic()
+
+                    else:
+                        AIQuizService._account(model, None, time.monotonic() - began)
+                        logger.info('✅ Success with model: %s (hedged)', model)
+                        result['model_used'] = model
+                        return result
+                if fatal:
+                    break
+        finally:
+            # Winner found, fatal error, or the caller went away: stop the rest
+            for future, (model, began) in in_flight.items():
+                elapsed = time.monotonic() - began
+                if future.cancel():
+                    logger.info('Cancelled request to %s', model)
+                    AIQuizService._account(model, None, elapsed, cancelled=True)
+                else:
+                    # Finished just now — count what it actually did
+                    try:
+                        AIQuizService._parse_response(model, AIQuizService._outcome(future))
+                    except Exception as e:
+                        AIQuizService._account(model, e, elapsed)
+                    else:
+                        AIQuizService._account(model, None, elapsed)
+
+        error_details = '; '.join(errors)
+        raise RuntimeError(
+            f'All AI models failed after {started} attempt(s). Errors: {error_details}'
+        )
+
+    @staticmethod
+    def _request_async(model_name, prompt, timeout):
+        """The generate_content call as a coroutine factory for GeminiClientPool.submit."""
+        async def call(client):
+            return await client.aio.models.generate_content(
+                model=model_name,
+                contents=prompt,
+                config=types.GenerateContentConfig(
+                    http_options=types.HttpOptions(timeout=int(timeout * 1000)),
+                ),
+            )
+        return call
+
+    @staticmethod
+    def _outcome(future):
+        """A finished request's response, with API errors raised as Retryable/NonRetryableError."""
+        try:
+            return future.result()
+        except Exception as e:
+            AIQuizService._categorize_api_error(e)
+
     # ── Single-model call ────────────────────────────────────────
 
     @staticmethod
@@ -178,22 +272,29 @@ class AIQuizService:
         Raises RetryableError or NonRetryableError depending on failure type.
         """
         try:
-            client = genai.Client(api_key=api_key)
-            response = client.models.generate_content(
-                model=model_name,
-                contents=prompt,
-            )
+            with get_client_pool().client(api_key) as client:
+                response = client.models.generate_content(
+                    model=model_name,
+                    contents=prompt,
+                    config=types.GenerateContentConfig(
+                        http_options=types.HttpOptions(timeout=int(timeout * 1000)),
+                    ),
+                )
         except Exception as e:
             AIQuizService._categorize_api_error(e)
 
-        # Parse and validate
-        raw = response.text.strip()
+        return AIQuizService._parse_response(model_name, response)
+
+    @staticmethod
+    def _parse_response(model_name, response):
+        """Parse and validate a model's response into quiz data (RetryableError if unusable)."""
+        raw = (response.text or '').strip()
         raw = AIQuizService._strip_code_fences(raw)
 
         try:
             data = json.loads(raw)
         except json.JSONDecodeError as e:
-            raise RetryableError(f'Invalid JSON from {model_name}: {e}')
+            raise InvalidResponseError(f'Invalid JSON from {model_name}: {e}')
 
         AIQuizService._validate_quiz(data)
         return data
@@ -205,8 +306,13 @@ class AIQuizService:
         """Inspect an API exception and raise the correct wrapper."""
         err_str = str(error).lower()
 
+        # Rate limits open the model's circuit straight away
+        for signal in ('429', 'rate limit', 'resource_exhausted'):
+            if signal in err_str:
+                raise RateLimitedError(str(error)) from error
+
         # Retryable status codes / keywords
-        retryable_signals = ['429', 'rate limit', '503', 'overloaded', 'timeout', 'deadline']
+        retryable_signals = ['503', 'overloaded', 'timeout', 'deadline']
         for signal in retryable_signals:
             if signal in err_str:
                 raise RetryableError(str(error)) from error
@@ -266,23 +372,46 @@ Rules:
     @staticmethod
     def _validate_quiz(data: dict) -> None:
         if 'questions' not in data or not isinstance(data['questions'], list):
-            raise RetryableError('Invalid quiz structure returned by AI.')
+            raise InvalidResponseError('Invalid quiz structure returned by AI.')
         if len(data['questions']) == 0:
-            raise RetryableError('AI returned zero questions.')
+            raise InvalidResponseError('AI returned zero questions.')
 
         for i, q in enumerate(data['questions']):
             if not all(k in q for k in ('question', 'options', 'correct_index')):
-                raise RetryableError(f'Question {i + 1} is missing required fields.')
+                raise InvalidResponseError(f'Question {i + 1} is missing required fields.')
             if len(q['options']) != 4:
-                raise RetryableError(f'Question {i + 1} must have exactly 4 options.')
+                raise InvalidResponseError(f'Question {i + 1} must have exactly 4 options.')
             if q['correct_index'] not in (0, 1, 2, 3):
-                raise RetryableError(f'Question {i + 1} has invalid correct_index.')
+                raise InvalidResponseError(f'Question {i + 1} has invalid correct_index.')
+
+    # ── Outcome accounting ───────────────────────────────────────
+
+    @staticmethod
+    def _account(model_name, error, seconds, cancelled=False):
+        """Report one finished request to the router and the usage table. `error` is None on success."""
+        if cancelled:
+            outcome = model_router.CANCELLED
+        elif error is None:
+            outcome = model_router.OK
+        elif isinstance(error, InvalidResponseError):
+            outcome = model_router.INVALID
+        elif isinstance(error, RateLimitedError):
+            outcome = model_router.RATE_LIMITED
+        elif isinstance(error, NonRetryableError):
+            outcome = model_router.REJECTED
+        else:
+            outcome = model_router.ERROR
+        get_model_router().record(model_name, outcome, seconds)
+        AIQuizService._record_usage(model_name, success=error is None and not cancelled, cancelled=cancelled)
 
     # ── DB usage tracking ────────────────────────────────────────
 
     @staticmethod
-    def _record_usage(model_name: str, success: bool) -> None:
-        """Persist a usage record to AIModelUsage (best-effort, non-blocking)."""
+    def _record_usage(model_name: str, success: bool, cancelled: bool = False) -> None:
+        """
+        Persist a usage record to AIModelUsage (best-effort, non-blocking).
+        `cancelled` counts a hedged request abandoned for a faster model.
+        """
         try:
             from app import db
             from app.models.ai_usage import AIModelUsage
@@ -297,10 +426,13 @@ Rules:
                     date=today,
                     success_count=0,
                     failure_count=0,
+                    cancelled_count=0,
                 )
                 db.session.add(record)
 
-            if success:
+            if cancelled:
+                record.cancelled_count += 1
+            elif success:
                 record.success_count += 1
                 record.status = 'active'
             else:
@@ -317,11 +449,17 @@ Rules:
             except Exception:
                 pass
 
-    # ── Selector access for admin panel ──────────────────────────
+    # ── Router access for admin panel ────────────────────────────
 
     @staticmethod
     def get_cooldowns() -> dict[str, datetime]:
-        return _selector.get_cooldowns()
+        """Models whose circuit is open → when it turns half-open (UTC), as shared by all workers."""
+        return get_model_router().open_circuits()
+
+    @staticmethod
+    def get_model_scores() -> list[dict]:
+        """Live routing scores and circuit state per configured model, in routing order."""
+        return get_model_router().snapshot(current_app.config.get('GEMINI_MODELS', ['gemini-2.5-flash']))
 
     # ── Daily usage tracking per user ────────────────────────────
 
@@ -329,21 +467,8 @@ Rules:
     def get_daily_usage(user_id: int) -> tuple[int, int]:
         """
         Return (used_today, remaining) for the given user.
-        Counts 'AI Generate' activity logs created today.
+        The user's quota row plus a count of their live reservations (see AIQuotaService).
         """
-        from app.models.activity import Activity
-        from app import db
-        from datetime import datetime
-        from flask import current_app
-
-        today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        limit = current_app.config.get('AI_DAILY_LIMIT', 6)
-
-        used = Activity.query.filter(
-            Activity.user_id == user_id,
-            Activity.action_type == 'AI Generate',
-            Activity.timestamp >= today_start
-        ).count()
-
-        remaining = max(0, limit - used)
-        return used, remaining
+        from app.services.ai_quota_service import AIQuotaService
+
+        return AIQuotaService.usage(user_id)
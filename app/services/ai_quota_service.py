@@ -0,0 +1,122 @@
+"""
+AI Generation Quota
+───────────────────
+The per-user daily allowance of AI quiz generations (AI_DAILY_LIMIT): one
+ai_quota_usage row per user per UTC day counts the finished generations,
+and each generation still in flight holds one ai_quota_reservations row.
+
+A generation goes through reserve → commit / refund around the model call:
+
+    reserve   lock the day's usage row, then admit the generation only if
+              used + live reservations < limit, so parallel requests
+              serialize on the row and cannot overshoot
+    commit    the model answered: delete the reservation, used + 1
+    refund    the call failed: delete the reservation, nothing is charged
+
+Live reservations count against the limit.  If a worker dies mid-call its
+reservation is never released, so each one expires on its own after
+AI_QUOTA_RESERVATION_TTL seconds — by default the longest a generation can
+run (GEMINI_TIMEOUT × models × GEMINI_MAX_RETRIES) — without touching the
+user's other reservations.
+"""
+
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.ai_usage import AIQuotaReservation, AIQuotaUsage
+
+
+class Reservation(NamedTuple):
+    """One reserved generation — charged to the day it was reserved on."""
+    id: int
+    user_id: int
+    day: object
+
+
+def _reservation_ttl():
+    """Seconds a reservation holds quota; never shorter than a generation can take."""
+    config = current_app.config
+    ttl = config.get('AI_QUOTA_RESERVATION_TTL')
+    if ttl is None:
+        models = config.get('GEMINI_MODELS', ['gemini-2.5-flash'])
+        ttl = config.get('GEMINI_TIMEOUT', 60) * len(models) * config.get('GEMINI_MAX_RETRIES', 3)
+    return ttl
+
+
+def _live_reservations(user_id, day, now):
+    R = AIQuotaReservation
+    return R.query.filter(R.user_id == user_id, R.day == day, R.expires_at > now).count()
+
+
+class AIQuotaService:
+    @staticmethod
+    def limit():
+        return current_app.config.get('AI_DAILY_LIMIT', 10)
+
+    @staticmethod
+    def usage(user_id):
+        """(used_today, remaining) — in-flight generations count as used."""
+        now = datetime.utcnow()
+        day = now.date()
+        row = db.session.get(AIQuotaUsage, (user_id, day))
+        used = 0
+        if row is not None:
+            used = row.used + _live_reservations(user_id, day, now)
+        return used, max(0, AIQuotaService.limit() - used)
+
+    @staticmethod
+    def reserve(user_id):
+        """Reserve one generation; a Reservation, or None when the daily limit is reached."""
+        Q, R = AIQuotaUsage, AIQuotaReservation
+        now = datetime.utcnow()
+        day = now.date()
+        for _ in range(3):
+            # A no-op UPDATE takes the row lock: reservations for this user queue up here
+            locked = (Q.query.filter_by(user_id=user_id, day=day)
+                      .update({Q.used: Q.used}, synchronize_session=False))
+            if locked:
+                (R.query.filter(R.user_id == user_id, R.expires_at <= now)
+                 .delete(synchronize_session=False))
+                used = db.session.query(Q.used).filter_by(user_id=user_id, day=day).scalar()
+                if used + _live_reservations(user_id, day, now) >= AIQuotaService.limit():
+                    db.session.commit()
+                    return None
+                reservation = R(user_id=user_id, day=day,
+                                expires_at=now + timedelta(seconds=_reservation_ttl()))
+                db.session.add(reservation)
+                db.session.commit()
+                return Reservation(reservation.id, user_id, day)
+
+            # First generation today: create the row, then retry the locked read
+            try:
+                with db.session.begin_nested():
+                    db.session.add(Q(user_id=user_id, day=day, used=0))
+            except IntegrityError:
+                pass
+        db.session.rollback()
+        return None
+
+    @staticmethod
+    def commit(reservation):
+        """Charge a reserved generation — even one whose reservation has expired."""
+        AIQuotaService._release(reservation, used=1)
+
+    @staticmethod
+    def refund(reservation):
+        """Release a reserved generation without charging it."""
+        AIQuotaService._release(reservation, used=0)
+
+    @staticmethod
+    def _release(reservation, used):
+        Q, R = AIQuotaUsage, AIQuotaReservation
+        # Only this reservation goes; an expired one may already have been swept
+        R.query.filter_by(id=reservation.id).delete(synchronize_session=False)
+        if used:
+            (Q.query
+             .filter_by(user_id=reservation.user_id, day=reservation.day)
+             .update({Q.used: Q.used + used}, synchronize_session=False))
+        db.session.commit()
@@ -0,0 +1,304 @@
+"""
+Write-Behind Answer Buffer
+──────────────────────────
+During a large live exam every answer click used to be its own database
+commit.  With ANSWER_BUFFER enabled, in-progress answers are written to a
+fast per-attempt store instead and reach the `answers` table in bulk:
+
+    on finish      AttemptService.finish_attempt flushes in the same
+                   transaction as the scoring UPDATE
+    on expiry      timed-out attempts are finished, which flushes them
+    periodically   an attempt is flushed inline once it has
+                   ANSWER_BUFFER_MAX_PENDING unflushed answers, and
+                   `flask answers-flush` drains everything (cron / deploy)
+
+Stores (ANSWER_BUFFER):
+
+    off     → no buffering, every answer is committed directly (default)
+    memory  → in-process dict; fast, but lost if the worker dies, and only
+              the worker that buffered an answer can see it — so use it with
+              a single worker, or finish_attempt on another worker scores
+              those answers as unanswered
+    sqlite  → local WAL-mode SQLite file shared by every worker on the host;
+              survives worker crashes and restarts — `flask answers-flush`
+              recovers whatever was not flushed
+
+Every buffered answer carries a sequence number.  A flush takes a batch,
+writes it, and after the commit acknowledges exactly the (question, seq)
+pairs it wrote, so an answer changed mid-flush stays buffered.
+"""
+
+import itertools
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+
+# ── Store interface ──────────────────────────────────────────────────
+
+class AnswerBuffer:
+    """Base class for write-behind answer stores."""
+
+    name = 'base'
+
+    def put(self, attempt_id: int, answers: dict) -> int:
+        """Buffer {question_id: option}. Returns the attempt's pending count."""
+        raise NotImplementedError
+
+    def pending(self, attempt_id: int) -> dict:
+        """Buffered {question_id: option} for an attempt."""
+        raise NotImplementedError
+
+    def take(self, attempt_id: int):
+        """({question_id: option}, token) — pass the token to ack() after writing."""
+        raise NotImplementedError
+
+    def ack(self, attempt_id: int, token) -> None:
+        """Forget the answers in `token` unless they changed since take()."""
+        raise NotImplementedError
+
+    def attempt_ids(self) -> list[int]:
+        """Attempts with unflushed answers."""
+        raise NotImplementedError
+
+
+class MemoryAnswerBuffer(AnswerBuffer):
+    """Per-process store. Unflushed answers are lost if the worker dies."""
+
+    name = 'memory'
+
+    def __init__(self):
+        self._pending: dict[int, dict[int, tuple[str, int]]] = {}
+        self._seq = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def put(self, attempt_id, answers):
+        with self._lock:
+            entries = self._pending.setdefault(attempt_id, {})
+            for question_id, option in answers.items():
+                entries[question_id] = (option, next(self._seq))
+            return len(entries)
+
+    def pending(self, attempt_id):
+        with self._lock:
+            return {qid: option for qid, (option, _) in self._pending.get(attempt_id, {}).items()}
+
+    def take(self, attempt_id):
+        with self._lock:
+            entries = dict(self._pending.get(attempt_id, {}))
+        answers = {qid: option for qid, (option, _) in entries.items()}
+        return answers, [(qid, seq) for qid, (_, seq) in entries.items()]
+
+    def ack(self, attempt_id, token):
+        with self._lock:
+            entries = self._pending.get(attempt_id)
+            if entries is None:
+                return
+            for question_id, seq in token:
+                if question_id in entries and entries[question_id][1] == seq:
+                    del entries[question_id]
+            if not entries:
+                del self._pending[attempt_id]
+
+    def attempt_ids(self):
+        with self._lock:
+            return list(self._pending)
+
+
+class SQLiteAnswerBuffer(AnswerBuffer):
+    """
+    File-backed store shared by every worker on one host.  WAL mode keeps
+    writes to an append plus an fsync-free commit, and the file outlives
+    crashed workers, so nothing acknowledged to a student is lost.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path=None):
+        self.path = path or current_app.config.get('ANSWER_BUFFER_PATH')
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._local = threading.local()
+        # Writers in this process queue here instead of in SQLite's sleeping busy handler
+        self._write_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS pending_answers ('
+                'attempt_id INTEGER NOT NULL, question_id INTEGER NOT NULL, '
+                'selected_option TEXT, seq INTEGER NOT NULL, '
+                'PRIMARY KEY (attempt_id, question_id))'
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def put(self, attempt_id, answers):
+        conn = self._connect()
+        with self._write_lock:
+            return self._put(conn, attempt_id, answers)
+
+    def _put(self, conn, attempt_id, answers):
+        seq = time.time_ns()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany(
+                'INSERT INTO pending_answers (attempt_id, question_id, selected_option, seq) '
+                'VALUES (?, ?, ?, ?) ON CONFLICT (attempt_id, question_id) '
+                'DO UPDATE SET selected_option = excluded.selected_option, seq = excluded.seq',
+                [(attempt_id, qid, option, seq + i) for i, (qid, option) in enumerate(answers.items())],
+            )
+            (count,) = conn.execute(
+                'SELECT count(*) FROM pending_answers WHERE attempt_id = ?', (attempt_id,)
+            ).fetchone()
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return count
+
+    def pending(self, attempt_id):
+        rows = self._connect().execute(
+            'SELECT question_id, selected_option FROM pending_answers WHERE attempt_id = ?', (attempt_id,)
+        ).fetchall()
+        return dict(rows)
+
+    def take(self, attempt_id):
+        rows = self._connect().execute(
+            'SELECT question_id, selected_option, seq FROM pending_answers WHERE attempt_id = ?', (attempt_id,)
+        ).fetchall()
+        return {qid: option for qid, option, _ in rows}, [(qid, seq) for qid, _, seq in rows]
+
+    def ack(self, attempt_id, token):
+        if not token:
+            return
+        with self._write_lock:
+            self._connect().executemany(
+                'DELETE FROM pending_answers WHERE attempt_id = ? AND question_id = ? AND seq = ?',
+                [(attempt_id, qid, seq) for qid, seq in token],
+            )
+
+    def attempt_ids(self):
+        rows = self._connect().execute('SELECT DISTINCT attempt_id FROM pending_answers').fetchall()
+        return [attempt_id for (attempt_id,) in rows]
+
+
+# ── Store registry ───────────────────────────────────────────────────
+
+BUFFERS = {
+    MemoryAnswerBuffer.name: MemoryAnswerBuffer,
+    SQLiteAnswerBuffer.name: SQLiteAnswerBuffer,
+}
+
+# Module-level instances — survive across requests
+_instances: dict[str, AnswerBuffer] = {}
+_instances_lock = threading.Lock()
+
+
+def register_buffer(buffer_cls) -> None:
+    """Make a custom AnswerBuffer subclass (e.g. Redis hashes) selectable via ANSWER_BUFFER."""
+    BUFFERS[buffer_cls.name] = buffer_cls
+
+
+def get_buffer():
+    """The configured AnswerBuffer, or None when write-behind is off."""
+    name = current_app.config.get('ANSWER_BUFFER', 'off')
+    if not name or name == 'off':
+        return None
+    if name not in BUFFERS:
+        raise ValueError(f'Unknown answer buffer: {name}')
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = BUFFERS[name]()
+        return _instances[name]
+
+
+# ── Answer Buffer Service ────────────────────────────────────────────
+
+class AnswerBufferService:
+    @staticmethod
+    def enabled():
+        return get_buffer() is not None
+
+    @staticmethod
+    def put(attempt, answers, snapshot):
+        """Buffer validated answers; flushes the attempt inline once enough are pending."""
+        pending_count = get_buffer().put(attempt.id, answers)
+        if pending_count >= current_app.config.get('ANSWER_BUFFER_MAX_PENDING', 25):
+            AnswerBufferService.flush(attempt, snapshot)
+
+    @staticmethod
+    def pending(attempt_id):
+        buffer = get_buffer()
+        return buffer.pending(attempt_id) if buffer else {}
+
+    @staticmethod
+    def write_pending(attempt, snapshot):
+        """
+        Stage an attempt's buffered answers in the current transaction.
+        Returns a token for ack() once the transaction has committed.
+        """
+        buffer = get_buffer()
+        if buffer is None:
+            return None
+        answers, token = buffer.take(attempt.id)
+        # Questions deleted since the answer was buffered are dropped
+        answers = {qid: option for qid, option in answers.items() if qid in snapshot}
+        if answers:
+            from app.services.attempt_service import AttemptService
+            AttemptService.write_answers(attempt.id, answers, snapshot)
+        return token
+
+    @staticmethod
+    def ack(attempt_id, token):
+        if token:
+            get_buffer().ack(attempt_id, token)
+
+    @staticmethod
+    def flush(attempt, snapshot=None):
+        """Write one attempt's buffered answers to the database and commit."""
+        from app import db
+        from app.services.quiz_snapshot_service import QuizSnapshotService
+
+        if attempt.submitted_at is not None:
+            # Finished attempts already flushed; leftovers are from a crash after commit
+            _, token = get_buffer().take(attempt.id)
+            AnswerBufferService.ack(attempt.id, token)
+            return 0
+        snapshot = snapshot or QuizSnapshotService.for_quiz(attempt.quiz)
+        token = AnswerBufferService.write_pending(attempt, snapshot)
+        db.session.commit()
+        AnswerBufferService.ack(attempt.id, token)
+        return len(token or ())
+
+    @staticmethod
+    def flush_all():
+        """Drain the buffer (periodic flush / crash recovery). Returns answers written."""
+        from app import db
+        from app.models.attempt import Attempt
+
+        buffer = get_buffer()
+        if buffer is None:
+            return 0
+        flushed = 0
+        for attempt_id in buffer.attempt_ids():
+            attempt = db.session.get(Attempt, attempt_id)
+            if attempt is None:
+                buffer.ack(attempt_id, buffer.take(attempt_id)[1])
+                continue
+            try:
+                flushed += AnswerBufferService.flush(attempt)
+            except Exception:
+                db.session.rollback()
+                logger.exception('Failed to flush buffered answers for attempt %s', attempt_id)
+        return flushed
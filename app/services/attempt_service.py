@@ -1,12 +1,34 @@
 from app import db
 from app.models.quiz import Quiz
 from app.models.question import Question
-from app.models.attempt import Attempt, Answer
-from datetime import datetime
+from app.models.attempt import Attempt, Answer, QuizAttemptCounter
+from app.models.activity import Activity
+from app.services.quiz_service import QuizService
+from app.services.quiz_snapshot_service import QuizSnapshotService
+from app.services.answer_buffer_service import AnswerBufferService
+from app.services.leaderboard_service import LeaderboardService
+from app.services.user_stats_service import UserStatsService
+from app.services.rank_service import RankService
+from app.services.fragment_cache_service import FragmentCacheService
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import case, func, select, update
+from sqlalchemy.exc import IntegrityError
+import time
+
+VALID_OPTIONS = ('A', 'B', 'C', 'D')
 
 class AttemptService:
     @staticmethod
     def start_attempt(user_id, quiz_id):
+        """
+        Admit the user to a new attempt, or hand back the one in progress.
+
+        Admission is a single guarded UPDATE on the user's QuizAttemptCounter
+        row (`attempt_count < cap AND open_attempt_id IS NULL`), so double
+        clicks and parallel tabs serialize on that one row: exactly one start
+        wins, the others get the attempt it opened. No COUNT over attempts.
+        """
         # Check if quiz exists and is active
         quiz = Quiz.query.filter_by(id=quiz_id, status='active').first()
         if not quiz:
@@ -15,10 +37,61 @@ class AttemptService:
         # Prevent creator from taking their own quiz
         if quiz.creator_id == user_id:
             return None, "You cannot attempt your own quiz."
-            
-        # Create new attempt
-        attempt = Attempt(user_id=user_id, quiz_id=quiz_id)
+
+        max_attempts = current_app.config.get('MAX_ATTEMPTS_PER_QUIZ', 3)
+        C = QuizAttemptCounter
+        for _ in range(5):
+            admitted = (C.query
+                        .filter(C.user_id == user_id, C.quiz_id == quiz_id,
+                                C.open_attempt_id.is_(None), C.attempt_count < max_attempts)
+                        .update({C.attempt_count: C.attempt_count + 1}, synchronize_session=False))
+            if admitted:
+                break
+
+            counter = C.query.filter_by(user_id=user_id, quiz_id=quiz_id).populate_existing().first()
+            if counter is None:
+                # First attempt on this quiz: create the row, then retry the guarded update
+                try:
+                    with db.session.begin_nested():
+                        db.session.add(C(user_id=user_id, quiz_id=quiz_id, attempt_count=0))
+                except IntegrityError:
+                    pass
+                continue
+
+            if counter.open_attempt_id is not None:
+                open_attempt = db.session.get(Attempt, counter.open_attempt_id)
+                if open_attempt is not None and open_attempt.submitted_at is None:
+                    if open_attempt.deadline_at is None or open_attempt.deadline_at > datetime.utcnow():
+                        db.session.commit()
+                        return open_attempt, None
+                    # Ran out of time unnoticed: auto-submit it, then admit afresh
+                    db.session.commit()
+                    AttemptService.finish_attempt(open_attempt.id, user_id)
+                    continue
+                # Stale pointer to a finished attempt
+                (C.query.filter_by(user_id=user_id, quiz_id=quiz_id, open_attempt_id=counter.open_attempt_id)
+                 .update({C.open_attempt_id: None}, synchronize_session=False))
+                continue
+
+            db.session.rollback()
+            return None, f"You have reached the maximum number of attempts for this quiz ({max_attempts} attempts max)."
+        else:
+            db.session.rollback()
+            return None, "Could not start the quiz, please try again."
+
+        # Create new attempt; the deadline is fixed when it starts
+        now = datetime.utcnow()
+        attempt = Attempt(
+            user_id=user_id,
+            quiz_id=quiz_id,
+            started_at=now,
+            deadline_at=now + timedelta(minutes=quiz.time_limit) if quiz.time_limit else None
+        )
         db.session.add(attempt)
+        db.session.flush()
+        (C.query.filter_by(user_id=user_id, quiz_id=quiz_id)
+         .update({C.open_attempt_id: attempt.id}, synchronize_session=False))
+        QuizService.adjust_counters(quiz_id, attempt_count=1)
         db.session.commit()
         
         return attempt, None
@@ -27,19 +100,41 @@ class AttemptService:
     def get_attempt(attempt_id, user_id):
         return Attempt.query.filter_by(id=attempt_id, user_id=user_id).first()
 
+    @staticmethod
+    def time_remaining(attempt):
+        """Seconds left on a timed attempt (negative once overdue), or None if untimed."""
+        deadline = attempt.deadline_at
+        if deadline is None and attempt.quiz.time_limit:
+            deadline = attempt.started_at + timedelta(minutes=attempt.quiz.time_limit)
+        if deadline is None:
+            return None
+        return int((deadline - datetime.utcnow()).total_seconds())
+
+    @staticmethod
+    def get_selections(attempt):
+        """{question_id: option} saved so far, including buffered answers."""
+        selections = dict(attempt.answers.with_entities(Answer.question_id, Answer.selected_option))
+        selections.update(AnswerBufferService.pending(attempt.id))
+        return selections
+
     @staticmethod
     def submit_answer(attempt_id, user_id, question_id, selected_option):
         attempt = AttemptService.get_attempt(attempt_id, user_id)
         if not attempt or attempt.submitted_at is not None:
             return False, "Invalid attempt or already submitted."
             
-        question = Question.query.get(question_id)
-        if not question or question.quiz_id != attempt.quiz_id:
+        snapshot = QuizSnapshotService.for_quiz(attempt.quiz)
+        if question_id not in snapshot:
             return False, "Invalid question."
+
+        if AnswerBufferService.enabled():
+            # Write-behind: no database write until the attempt is flushed
+            AnswerBufferService.put(attempt, {question_id: selected_option}, snapshot)
+            return True, ""
             
         # Check if answer already exists
         answer = Answer.query.filter_by(attempt_id=attempt_id, question_id=question_id).first()
-        is_correct = (selected_option == question.correct_option)
+        is_correct = snapshot.is_correct(question_id, selected_option)
         
         if answer:
             answer.selected_option = selected_option
@@ -57,19 +152,231 @@ class AttemptService:
         return True, ""
 
     @staticmethod
-    def finish_attempt(attempt_id, user_id):
+    def submit_answers(attempt_id, user_id, answers):
+        """
+        Save many answers at once: {question_id: 'A'|'B'|'C'|'D'}.
+
+        The whole batch is validated against the cached quiz snapshot, then
+        written in a single transaction (see write_answers) — or buffered when
+        write-behind is enabled.
+        """
         attempt = AttemptService.get_attempt(attempt_id, user_id)
         if not attempt or attempt.submitted_at is not None:
+            return False, "Invalid attempt or already submitted."
+
+        try:
+            answers = {int(qid): option for qid, option in answers.items()}
+        except (TypeError, ValueError, AttributeError):
+            return False, "Invalid question."
+        if not answers:
+            return True, ""
+        if any(option not in VALID_OPTIONS for option in answers.values()):
+            return False, "Invalid option."
+
+        snapshot = QuizSnapshotService.for_quiz(attempt.quiz)
+        if any(question_id not in snapshot for question_id in answers):
+            return False, "Invalid question."
+
+        if AnswerBufferService.enabled():
+            AnswerBufferService.put(attempt, answers, snapshot)
+            return True, ""
+
+        AttemptService.write_answers(attempt_id, answers, snapshot)
+        db.session.commit()
+        return True, ""
+
+    @staticmethod
+    def write_answers(attempt_id, answers, snapshot):
+        """
+        Upsert {question_id: option} for an attempt with one bulk UPDATE and one
+        bulk INSERT, inside the caller's transaction. Answers must already be
+        validated against `snapshot`.
+        """
+        for retry in (False, True):
+            existing = dict(
+                db.session.query(Answer.question_id, Answer.id)
+                .filter(Answer.attempt_id == attempt_id, Answer.question_id.in_(answers.keys()))
+                .all()
+            )
+
+            updates, inserts = [], []
+            for question_id, option in answers.items():
+                values = {'selected_option': option, 'is_correct': snapshot.is_correct(question_id, option)}
+                if question_id in existing:
+                    updates.append({'id': existing[question_id], **values})
+                else:
+                    inserts.append({'attempt_id': attempt_id, 'question_id': question_id, **values})
+
+            try:
+                with db.session.begin_nested():
+                    if updates:
+                        db.session.bulk_update_mappings(Answer, updates)
+                    if inserts:
+                        db.session.bulk_insert_mappings(Answer, inserts)
+                return
+            except IntegrityError:
+                # A concurrent save inserted some of these answers first; redo as updates
+                if retry:
+                    raise
+
+    @staticmethod
+    def finish_attempt(attempt_id, user_id):
+        """
+        Finalize an attempt with one guarded UPDATE ... RETURNING.
+
+        Score and accuracy are computed in SQL (correct answers joined against
+        the answer key, over the quiz's question counter), and the
+        `submitted_at IS NULL` guard makes finishing idempotent: of two
+        concurrent finishes exactly one updates the row, the other gets an
+        error. No answer rows are loaded.
+
+        Buffered (write-behind) answers are written in the same transaction.
+        """
+        token = None
+        if AnswerBufferService.pending(attempt_id):
+            attempt = AttemptService.get_attempt(attempt_id, user_id)
+            if attempt and attempt.submitted_at is None:
+                snapshot = QuizSnapshotService.for_quiz(attempt.quiz)
+                token = AnswerBufferService.write_pending(attempt, snapshot)
+
+        finished = db.session.execute(
+            update(Attempt)
+            .where(Attempt.id == attempt_id,
+                   Attempt.user_id == user_id,
+                   Attempt.submitted_at.is_(None))
+            .values(AttemptService.finalize_values(datetime.utcnow()))
+            .returning(Attempt.quiz_id, Attempt.accuracy, Attempt.score)
+            .execution_options(synchronize_session=False)
+        ).first()
+        if finished is None:
+            db.session.rollback()
             return None, "Invalid attempt or already submitted."
-            
-        # Calculate score
-        answers = attempt.answers.all()
-        correct_count = sum(1 for a in answers if a.is_correct)
-        total_questions = attempt.quiz.questions.count()
-        
-        attempt.submitted_at = datetime.utcnow()
-        attempt.score = correct_count
-        attempt.accuracy = (correct_count / total_questions * 100) if total_questions > 0 else 0
+
+        QuizService.adjust_counters(finished.quiz_id, completion_count=1)
+        AttemptService.release_open([attempt_id])
+        LeaderboardService.record_attempt(user_id, finished.accuracy)
+        answered = AttemptService.answered_counts([attempt_id]).get(attempt_id, 0)
+        UserStatsService.record_attempt(user_id, finished.accuracy, finished.score, answered)
         
         db.session.commit()
-        return attempt, None
+        AnswerBufferService.ack(attempt_id, token)
+        RankService.record_attempt(user_id, finished.quiz_id, finished.accuracy)
+        FragmentCacheService.invalidate_user(user_id)
+        return db.session.get(Attempt, attempt_id), None
+
+    @staticmethod
+    def sweep_expired(batch_size=500, grace_seconds=None, max_batches=None, pause=0.0):
+        """
+        Finalize open attempts whose deadline has passed, `batch_size` at a time.
+
+        Each batch is one indexed read of the oldest expired deadlines, one
+        set-based scoring UPDATE ... RETURNING, grouped counter updates and a
+        bulk activity insert, committed together. `pause` seconds between
+        batches spreads a large expiry wave out. Returns attempts finalized.
+        """
+        if grace_seconds is None:
+            grace_seconds = current_app.config.get('ATTEMPT_SWEEP_GRACE_SECONDS', 30)
+        # Grace lets the browser's own auto-submit land first
+        cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+        finalized = 0
+        batches = 0
+
+        while max_batches is None or batches < max_batches:
+            expired = [attempt_id for (attempt_id,) in
+                       db.session.query(Attempt.id)
+                       .filter(Attempt.submitted_at.is_(None),
+                               Attempt.deadline_at.isnot(None),
+                               Attempt.deadline_at <= cutoff)
+                       .order_by(Attempt.deadline_at)
+                       .limit(batch_size)]
+            if not expired:
+                break
+
+            tokens = {}
+            if AnswerBufferService.enabled():
+                for attempt in Attempt.query.filter(Attempt.id.in_(expired)):
+                    snapshot = QuizSnapshotService.for_quiz(attempt.quiz)
+                    tokens[attempt.id] = AnswerBufferService.write_pending(attempt, snapshot)
+
+            rows = db.session.execute(
+                update(Attempt)
+                .where(Attempt.id.in_(expired), Attempt.submitted_at.is_(None))
+                .values(AttemptService.finalize_values(datetime.utcnow()))
+                .returning(Attempt.id, Attempt.user_id, Attempt.quiz_id, Attempt.accuracy, Attempt.score)
+                .execution_options(synchronize_session=False)
+            ).all()
+
+            completions = {}
+            answered = AttemptService.answered_counts([row.id for row in rows])
+            for row in rows:
+                completions[row.quiz_id] = completions.get(row.quiz_id, 0) + 1
+                LeaderboardService.record_attempt(row.user_id, row.accuracy)
+                UserStatsService.record_attempt(row.user_id, row.accuracy, row.score, answered.get(row.id, 0))
+            for quiz_id, count in completions.items():
+                QuizService.adjust_counters(quiz_id, completion_count=count)
+            AttemptService.release_open([row.id for row in rows])
+
+            titles = dict(db.session.query(Quiz.id, Quiz.title).filter(Quiz.id.in_(completions.keys())))
+            db.session.bulk_insert_mappings(Activity, [
+                {
+                    'user_id': row.user_id,
+                    'action_type': 'Attempted Quiz',
+                    'description': f'Time expired. Scored {row.accuracy}% on quiz "{titles.get(row.quiz_id)}"'[:255],
+                    'timestamp': datetime.utcnow(),
+                }
+                for row in rows
+            ])
+            db.session.commit()
+
+            for attempt_id, token in tokens.items():
+                AnswerBufferService.ack(attempt_id, token)
+            for row in rows:
+                RankService.record_attempt(row.user_id, row.quiz_id, row.accuracy)
+            FragmentCacheService.invalidate_user(*(row.user_id for row in rows))
+
+            finalized += len(rows)
+            batches += 1
+            if len(expired) < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+        return finalized
+
+    @staticmethod
+    def release_open(attempt_ids):
+        """Clear the admission slot held by just-finished attempts (same transaction)."""
+        if attempt_ids:
+            (QuizAttemptCounter.query
+             .filter(QuizAttemptCounter.open_attempt_id.in_(attempt_ids))
+             .update({QuizAttemptCounter.open_attempt_id: None}, synchronize_session=False))
+
+    @staticmethod
+    def answered_counts(attempt_ids):
+        """{attempt_id: answers to current questions} — one grouped read."""
+        if not attempt_ids:
+            return {}
+        return dict(db.session.query(Answer.attempt_id, func.count(Answer.id))
+                    .join(Question, Question.id == Answer.question_id)
+                    .filter(Answer.attempt_id.in_(attempt_ids))
+                    .group_by(Answer.attempt_id))
+
+    @staticmethod
+    def finalize_values(submitted_at):
+        """
+        Column values that finalize the attempt rows an UPDATE touches:
+        correlated subqueries, so one statement can score many attempts.
+        Answers to deleted questions don't count.
+        """
+        correct = (select(func.count(Answer.id))
+                   .join(Question, Question.id == Answer.question_id)
+                   .where(Answer.attempt_id == Attempt.id,
+                          Answer.selected_option == Question.correct_option)
+                   .scalar_subquery())
+        total = (select(Quiz.question_count)
+                 .where(Quiz.id == Attempt.quiz_id)
+                 .scalar_subquery())
+        return {
+            Attempt.submitted_at: submitted_at,
+            Attempt.score: correct,
+            Attempt.accuracy: case((total > 0, correct * 100.0 / total), else_=0.0),
+        }
@@ -0,0 +1,276 @@
+"""
+Fragment Cache
+──────────────
+Rendered page fragments cached per user, so a page whose inputs rarely
+change is not rebuilt on every visit.  Used for the dashboard body and its
+chart script.
+
+Entries are dropped explicitly when their inputs change:
+
+    AttemptService     finishing / sweeping an attempt
+    QuizService        creating, editing, deleting a quiz or its questions
+    ActivityService    AI generations and profile updates (DASHBOARD_ACTIONS)
+    admin routes       suspending / restoring a quiz
+
+FRAGMENT_CACHE_TTL bounds how stale anything no hook sees can get (e.g.
+other users playing your quizzes).
+
+Backends (FRAGMENT_CACHE):
+
+    off     → no caching (default)
+    memory  → per-process LRU of FRAGMENT_CACHE_SIZE entries; invalidation
+              only reaches this worker, so use it with a single worker
+    sqlite  → local WAL-mode SQLite file shared by every worker on the host,
+              so an invalidation in one worker is seen by all
+
+A shared cache across hosts (Redis, memcached) plugs in with
+register_fragment_cache().
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+# Activity types that change what the dashboard shows
+DASHBOARD_ACTIONS = frozenset({'AI Generate', 'Profile Updated', 'Avatar Updated'})
+
+
+# ── Backend interface ────────────────────────────────────────────────
+
+class FragmentCache:
+    """Base class for fragment cache backends. Values are dicts of strings."""
+
+    name = 'base'
+
+    def get(self, key: str):
+        """Cached value, or None when missing or expired."""
+        raise NotImplementedError
+
+    def set(self, key: str, value: dict, ttl: int) -> None:
+        raise NotImplementedError
+
+    def delete(self, keys) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def size(self) -> int:
+        raise NotImplementedError
+
+
+class MemoryFragmentCache(FragmentCache):
+    """Per-process LRU with per-entry expiry."""
+
+    name = 'memory'
+
+    def __init__(self):
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        limit = current_app.config.get('FRAGMENT_CACHE_SIZE', 2000)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > limit:
+                self._entries.popitem(last=False)
+
+    def delete(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def size(self):
+        return len(self._entries)
+
+
+class SQLiteFragmentCache(FragmentCache):
+    """File-backed cache shared by the workers on one host."""
+
+    name = 'sqlite'
+
+    def __init__(self, path=None):
+        self.path = path or current_app.config.get('FRAGMENT_CACHE_PATH')
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS fragments ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)'
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connect().execute(
+            'SELECT value FROM fragments WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key, value, ttl):
+        conn = self._connect()
+        conn.execute(
+            'INSERT INTO fragments (key, value, expires_at) VALUES (?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at',
+            (key, json.dumps(value), time.time() + ttl),
+        )
+        # Expired rows are pruned on write so the file does not grow without bound
+        conn.execute('DELETE FROM fragments WHERE expires_at <= ?', (time.time(),))
+
+    def delete(self, keys):
+        self._connect().executemany('DELETE FROM fragments WHERE key = ?', [(key,) for key in keys])
+
+    def clear(self):
+        self._connect().execute('DELETE FROM fragments')
+
+    def size(self):
+        (count,) = self._connect().execute('SELECT count(*) FROM fragments').fetchone()
+        return count
+
+
+# ── Backend registry ─────────────────────────────────────────────────
+
+FRAGMENT_CACHES = {
+    MemoryFragmentCache.name: MemoryFragmentCache,
+    SQLiteFragmentCache.name: SQLiteFragmentCache,
+}
+
+# Module-level instances — survive across requests
+_instances: dict[str, FragmentCache] = {}
+_instances_lock = threading.Lock()
+
+# Per-process counters for the admin panel
+_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+_stats_lock = threading.Lock()
+
+
+def register_fragment_cache(cache_cls) -> None:
+    """Make a custom FragmentCache subclass (e.g. Redis) selectable via FRAGMENT_CACHE."""
+    FRAGMENT_CACHES[cache_cls.name] = cache_cls
+
+
+def get_fragment_cache():
+    """The configured FragmentCache, or None when caching is off."""
+    name = current_app.config.get('FRAGMENT_CACHE', 'off')
+    if not name or name == 'off':
+        return None
+    if name not in FRAGMENT_CACHES:
+        raise ValueError(f'Unknown fragment cache: {name}')
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = FRAGMENT_CACHES[name]()
+        return _instances[name]
+
+
+def _count(stat, n=1):
+    with _stats_lock:
+        _stats[stat] += n
+
+
+# ── Fragment Cache Service ───────────────────────────────────────────
+
+class FragmentCacheService:
+    # Fragments cached per user; invalidate_user() drops all of them
+    USER_FRAGMENTS = ('dashboard',)
+
+    @staticmethod
+    def key(name, user_id):
+        return f'{name}:{user_id}'
+
+    @staticmethod
+    def get_or_render(name, user_id, render, stamp=''):
+        """
+        The user's cached `name` fragments, or render() → {part: html} and
+        cache it.  `stamp` is stored with the entry and must match on read —
+        pass anything the fragment depends on implicitly (e.g. today's date).
+        """
+        cache = get_fragment_cache()
+        if cache is None:
+            return render()
+        key = FragmentCacheService.key(name, user_id)
+        try:
+            entry = cache.get(key)
+        except Exception:
+            logger.exception('Fragment cache read failed for %s', key)
+            return render()
+        if entry is not None and entry.get('stamp') == stamp:
+            _count('hits')
+            return entry['parts']
+
+        _count('misses')
+        parts = render()
+        try:
+            cache.set(key, {'stamp': stamp, 'parts': parts},
+                      current_app.config.get('FRAGMENT_CACHE_TTL', 300))
+        except Exception:
+            logger.exception('Fragment cache write failed for %s', key)
+        return parts
+
+    @staticmethod
+    def invalidate_user(*user_ids):
+        """Drop every cached fragment of these users. Call after the change has committed."""
+        cache = get_fragment_cache()
+        if cache is None:
+            return
+        keys = [FragmentCacheService.key(name, user_id)
+                for user_id in set(user_ids) for name in FragmentCacheService.USER_FRAGMENTS]
+        try:
+            cache.delete(keys)
+        except Exception:
+            logger.exception('Fragment cache invalidation failed for users %s', user_ids)
+            return
+        _count('invalidations', len(set(user_ids)))
+
+    @staticmethod
+    def clear():
+        cache = get_fragment_cache()
+        if cache is not None:
+            cache.clear()
+        with _stats_lock:
+            for stat in _stats:
+                _stats[stat] = 0
+
+    @staticmethod
+    def stats():
+        cache = get_fragment_cache()
+        with _stats_lock:
+            lookups = _stats['hits'] + _stats['misses']
+            stats = dict(_stats, hit_rate=_stats['hits'] / lookups if lookups else 0.0)
+        stats['backend'] = cache.name if cache else 'off'
+        try:
+            stats['size'] = cache.size() if cache else 0
+        except Exception:
+            stats['size'] = None
+        return stats
@@ -0,0 +1,229 @@
+"""
+Gemini Client Pool
+──────────────────
+One long-lived genai.Client per API key per process, shared by every
+request and every fallback hop, instead of a new client (and new TLS
+connections) per call.
+
+Each pooled client owns an httpx connection pool:
+
+    GEMINI_POOL_MAX_CONNECTIONS   concurrent connections per client
+    GEMINI_POOL_KEEPALIVE         idle connections kept open for reuse
+    GEMINI_POOL_KEEPALIVE_EXPIRY  seconds an idle connection stays open
+
+Health checks happen on checkout: a client is rebuilt when its transport
+has been closed, when it is older than GEMINI_POOL_MAX_AGE seconds, or after
+a call on it failed at the connection level (refused, reset, protocol
+error).  Timeouts and API errors (429, 503, …) say nothing about the
+connections, so they keep the client.
+
+Concurrent calls that must be cancellable (hedged generation) run as
+coroutines on the pool's own event loop thread via submit(); cancelling the
+returned future aborts the HTTP request.  The loop starts on first use.
+
+Clients are closed when the process exits, and the pool is rebuilt after a
+fork (sockets must not be shared between workers).
+"""
+
+import asyncio
+import atexit
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+import httpx
+from flask import current_app
+from google import genai
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+# Failures that leave the client's connections in an unknown state
+BROKEN_CONNECTION_ERRORS = (httpx.NetworkError, httpx.RemoteProtocolError, httpx.ProxyError)
+
+
+class PooledClient:
+    """A genai.Client plus the httpx client whose connections it reuses."""
+
+    def __init__(self, api_key: str, config):
+        limits = httpx.Limits(
+            max_connections=config.get('GEMINI_POOL_MAX_CONNECTIONS', 10),
+            max_keepalive_connections=config.get('GEMINI_POOL_KEEPALIVE', 5),
+            keepalive_expiry=config.get('GEMINI_POOL_KEEPALIVE_EXPIRY', 60),
+        )
+        self.http = httpx.Client(limits=limits)
+        # Used only from the pool's event loop (client.aio)
+        self.async_http = httpx.AsyncClient(limits=limits)
+        http_options = types.HttpOptions(
+            timeout=int(config.get('GEMINI_TIMEOUT', 60) * 1000),
+            httpx_client=self.http,
+            httpx_async_client=self.async_http,
+        )
+        if config.get('GEMINI_BASE_URL'):
+            http_options.base_url = config['GEMINI_BASE_URL']
+        self.client = genai.Client(api_key=api_key, http_options=http_options)
+        self.created_at = time.monotonic()
+        self.in_use = 0
+        self.broken = False
+        self.retired = False
+
+    def healthy(self, max_age: float) -> bool:
+        return (not self.broken
+                and not self.http.is_closed
+                and time.monotonic() - self.created_at < max_age)
+
+    def close(self) -> None:
+        # genai leaves caller-supplied httpx clients open, so they are closed here;
+        # the async one by the pool, on its loop
+        try:
+            self.client.close()
+        finally:
+            self.http.close()
+
+
+class GeminiClientPool:
+    """Process-wide genai clients keyed by API key."""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self._clients: dict[str, PooledClient] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread: threading.Thread | None = None
+        self._stats = {'created': 0, 'reused': 0, 'recycled': 0, 'broken': 0}
+        atexit.register(self.close)
+
+    @contextmanager
+    def client(self, api_key: str):
+        """
+        Check out the client for this key for one call:
+
+            with get_client_pool().client(api_key) as client:
+                client.models.generate_content(...)
+        """
+        entry = self._checkout(api_key)
+        try:
+            yield entry.client
+        except BROKEN_CONNECTION_ERRORS as e:
+            self._mark_broken(entry, e)
+            raise
+        finally:
+            self._release(entry)
+
+    def submit(self, api_key: str, call) -> Future:
+        """
+        Run `await call(client)` on the pool's event loop.  Returns a
+        concurrent.futures.Future; cancelling it cancels the request.
+        """
+        entry = self._checkout(api_key)
+
+        async def run():
+            try:
+                return await call(entry.client)
+            except BROKEN_CONNECTION_ERRORS as e:
+                self._mark_broken(entry, e)
+                raise
+            finally:
+                self._release(entry)
+
+        try:
+            return asyncio.run_coroutine_threadsafe(run(), self._event_loop())
+        except Exception:
+            self._release(entry)
+            raise
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(target=self._loop.run_forever,
+                                                     name='gemini-io', daemon=True)
+                self._loop_thread.start()
+            return self._loop
+
+    def _mark_broken(self, entry: PooledClient, error: Exception) -> None:
+        logger.warning('Gemini connection failed (%s) — the client will be rebuilt', type(error).__name__)
+        with self._lock:
+            if not entry.broken:
+                entry.broken = True
+                self._stats['broken'] += 1
+
+    def _checkout(self, api_key: str) -> PooledClient:
+        max_age = current_app.config.get('GEMINI_POOL_MAX_AGE', 3600)
+        retired = None
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('Gemini client pool is closed.')
+            entry = self._clients.get(api_key)
+            if entry is not None and entry.healthy(max_age):
+                self._stats['reused'] += 1
+            else:
+                if entry is not None:
+                    # Closed once the calls still using it have returned
+                    entry.retired = True
+                    retired = entry if entry.in_use == 0 else None
+                    self._stats['recycled'] += 1
+                entry = self._clients[api_key] = PooledClient(api_key, current_app.config)
+                self._stats['created'] += 1
+            entry.in_use += 1
+        if retired is not None:
+            self._close_quietly(retired)
+        return entry
+
+    def _release(self, entry: PooledClient) -> None:
+        with self._lock:
+            entry.in_use -= 1
+            done = entry.retired and entry.in_use == 0
+        if done:
+            self._close_quietly(entry)
+
+    def close(self) -> None:
+        """Close every client and stop the event loop. Called at process exit."""
+        with self._lock:
+            self._closed = True
+            entries = list(self._clients.values())
+            self._clients.clear()
+            loop, self._loop = self._loop, None
+        closing = [self._close_quietly(entry, loop) for entry in entries]
+        if loop is not None:
+            for future in filter(None, closing):
+                try:
+                    future.result(timeout=5)
+                except Exception:
+                    pass
+            loop.call_soon_threadsafe(loop.stop)
+            self._loop_thread.join(timeout=5)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats,
+                        clients=len(self._clients),
+                        in_use=sum(entry.in_use for entry in self._clients.values()))
+
+    def _close_quietly(self, entry: PooledClient, loop=None):
+        """Close a client; its async transport is closed on the loop (returns that future, if any)."""
+        try:
+            entry.close()
+        except Exception:
+            logger.exception('Failed to close a Gemini client')
+        loop = loop or self._loop
+        if loop is not None and loop.is_running():
+            return asyncio.run_coroutine_threadsafe(entry.async_http.aclose(), loop)
+        return None
+
+
+# Per-process pool, recreated after a fork
+_pool: GeminiClientPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_client_pool() -> GeminiClientPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.pid != os.getpid():
+            _pool = GeminiClientPool()
+        return _pool
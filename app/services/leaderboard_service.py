@@ -0,0 +1,218 @@
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import func
+from sqlalchemy.orm import contains_eager
+
+from app import db
+from app.models.user import User
+from app.models.attempt import Attempt
+from app.models.leaderboard import LeaderboardEntry, LeaderboardBucket
+from app.utils.counters import upsert_counter
+
+# window → number of trailing days merged from daily buckets (None = all-time)
+WINDOWS = {
+    'day': 1,
+    'week': 7,
+    'month': 30,
+    'all': None,
+}
+
+# (window, limit) → (expires_at, [(user_id, attempts, accuracy_sum), ...]); windowed
+# boards are cached briefly, as plain tuples — users are loaded per request
+_window_cache: dict[tuple[str, int], tuple[float, list]] = {}
+_window_cache_lock = threading.Lock()
+
+
+class WindowedEntry:
+    """Leaderboard row merged from daily buckets — same shape as LeaderboardEntry."""
+
+    def __init__(self, user, attempt_count, accuracy_sum):
+        self.user = user
+        self.user_id = user.id
+        self.attempt_count = attempt_count
+        self.accuracy_sum = accuracy_sum
+        self.avg_accuracy = accuracy_sum / attempt_count if attempt_count else 0.0
+
+
+class LeaderboardService:
+    @staticmethod
+    def record_attempt(user_id, accuracy, when=None):
+        """
+        Fold one finished attempt into the user's all-time totals and today's bucket.
+        O(1): two single-row upserts. Runs inside the caller's transaction.
+        """
+        E = LeaderboardEntry
+        upsert_counter(
+            E,
+            keys={'user_id': user_id},
+            increments={'attempt_count': 1, 'accuracy_sum': accuracy},
+            update_values={
+                'avg_accuracy': (E.accuracy_sum + accuracy) / (E.attempt_count + 1),
+                'updated_at': datetime.utcnow(),
+            },
+            insert_values={'avg_accuracy': accuracy},
+        )
+        upsert_counter(
+            LeaderboardBucket,
+            keys={
+                'granularity': 'day',
+                'period_start': (when or datetime.utcnow()).date(),
+                'user_id': user_id,
+            },
+            increments={'attempt_count': 1, 'accuracy_sum': accuracy},
+        )
+
+    @staticmethod
+    def top(limit=50):
+        """Top entries by average accuracy — an index-ordered read of `limit` rows."""
+        return (LeaderboardEntry.query
+                .join(LeaderboardEntry.user)
+                .options(contains_eager(LeaderboardEntry.user))
+                .filter(User.is_suspended == False)
+                .order_by(LeaderboardEntry.avg_accuracy.desc(), LeaderboardEntry.attempt_count.desc())
+                .limit(limit)
+                .all())
+
+    @staticmethod
+    def top_window(window='all', limit=50):
+        """
+        Top entries for a time window. 'all' reads the all-time table; shorter
+        windows merge at most 30 daily buckets and are cached for
+        LEADERBOARD_WINDOW_CACHE_SECONDS.  Only ids and totals are cached; the
+        users are loaded in this request (one query), so names, avatars and
+        suspensions are always current.
+        """
+        if window not in WINDOWS:
+            raise ValueError(f'Unknown leaderboard window: {window}')
+        if WINDOWS[window] is None:
+            return LeaderboardService.top(limit)
+
+        ttl = current_app.config.get('LEADERBOARD_WINDOW_CACHE_SECONDS', 60)
+        key = (window, limit)
+        now = time.monotonic()
+        with _window_cache_lock:
+            cached = _window_cache.get(key)
+        if cached and cached[0] > now:
+            totals = cached[1]
+        else:
+            totals = LeaderboardService._merge_buckets(WINDOWS[window], limit)
+            with _window_cache_lock:
+                _window_cache[key] = (now + ttl, totals)
+
+        users = {}
+        if totals:
+            users = {user.id: user for user in
+                     User.query.filter(User.id.in_([user_id for user_id, _, _ in totals]),
+                                       User.is_suspended == False)}
+        return [WindowedEntry(users[user_id], attempts, acc_sum)
+                for user_id, attempts, acc_sum in totals if user_id in users]
+
+    @staticmethod
+    def _merge_buckets(days, limit):
+        B = LeaderboardBucket
+        start = datetime.utcnow().date() - timedelta(days=days - 1)
+        attempts = func.sum(B.attempt_count)
+        acc_sum = func.sum(B.accuracy_sum)
+        results = (db.session.query(User.id, attempts.label('attempts'), acc_sum.label('acc_sum'))
+                   .join(User, User.id == B.user_id)
+                   .filter(B.granularity == 'day', B.period_start >= start)
+                   .filter(User.is_suspended == False)
+                   .group_by(User.id)
+                   .order_by((acc_sum / attempts).desc(), attempts.desc())
+                   .limit(limit)
+                   .all())
+        return [(r.id, r.attempts, r.acc_sum) for r in results]
+
+    @staticmethod
+    def invalidate_windows():
+        with _window_cache_lock:
+            _window_cache.clear()
+
+    @staticmethod
+    def compact_buckets(retention_days=None):
+        """
+        Merge daily buckets older than the retention period into monthly
+        buckets and delete them. Returns the number of daily buckets removed.
+        """
+        if retention_days is None:
+            retention_days = current_app.config.get('LEADERBOARD_BUCKET_RETENTION_DAYS', 35)
+        cutoff = datetime.utcnow().date() - timedelta(days=retention_days)
+        B = LeaderboardBucket
+
+        old = (db.session.query(B.period_start, B.user_id, B.attempt_count, B.accuracy_sum)
+               .filter(B.granularity == 'day', B.period_start < cutoff)
+               .all())
+        if not old:
+            return 0
+
+        months = defaultdict(lambda: [0, 0.0])
+        for row in old:
+            totals = months[(row.period_start.replace(day=1), row.user_id)]
+            totals[0] += row.attempt_count
+            totals[1] += row.accuracy_sum
+
+        for (month_start, user_id), (count, acc_sum) in months.items():
+            upsert_counter(
+                B,
+                keys={'granularity': 'month', 'period_start': month_start, 'user_id': user_id},
+                increments={'attempt_count': count, 'accuracy_sum': acc_sum},
+            )
+        B.query.filter(B.granularity == 'day', B.period_start < cutoff).delete(synchronize_session=False)
+        db.session.commit()
+        return len(old)
+
+    @staticmethod
+    def rebuild():
+        """Recompute all-time entries and daily buckets from submitted attempts (backfill / drift repair)."""
+        LeaderboardEntry.query.delete()
+        totals = (db.session.query(
+                      Attempt.user_id,
+                      func.count(Attempt.id),
+                      func.sum(Attempt.accuracy))
+                  .filter(Attempt.submitted_at.isnot(None))
+                  .group_by(Attempt.user_id)
+                  .all())
+        db.session.bulk_insert_mappings(LeaderboardEntry, [
+            {
+                'user_id': user_id,
+                'attempt_count': count,
+                'accuracy_sum': acc_sum or 0.0,
+                'avg_accuracy': (acc_sum or 0.0) / count,
+                'updated_at': datetime.utcnow(),
+            }
+            for user_id, count, acc_sum in totals
+        ])
+
+        # Daily buckets for the retention period; older history lives in monthly buckets
+        LeaderboardBucket.query.delete()
+        retention_days = current_app.config.get('LEADERBOARD_BUCKET_RETENTION_DAYS', 35)
+        since = datetime.combine(datetime.utcnow().date() - timedelta(days=retention_days), datetime.min.time())
+        buckets = defaultdict(lambda: [0, 0.0])
+        submitted = (db.session.query(Attempt.user_id, Attempt.submitted_at, Attempt.accuracy)
+                     .filter(Attempt.submitted_at.isnot(None))
+                     .yield_per(5000))
+        for user_id, submitted_at, accuracy in submitted:
+            day = submitted_at.date()
+            if submitted_at >= since:
+                key = ('day', day, user_id)
+            else:
+                key = ('month', day.replace(day=1), user_id)
+            buckets[key][0] += 1
+            buckets[key][1] += accuracy or 0.0
+        db.session.bulk_insert_mappings(LeaderboardBucket, [
+            {
+                'granularity': granularity,
+                'period_start': period_start,
+                'user_id': user_id,
+                'attempt_count': count,
+                'accuracy_sum': acc_sum,
+            }
+            for (granularity, period_start, user_id), (count, acc_sum) in buckets.items()
+        ])
+        db.session.commit()
+        LeaderboardService.invalidate_windows()
+        return len(totals)
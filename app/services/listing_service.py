@@ -0,0 +1,100 @@
+"""
+Listing Projections
+───────────────────
+Read models for list pages.  Rendering a list straight from ORM rows lets every
+row lazily load its creator, owner or reply count — one or two extra queries
+per row.  A listing instead loads the rows together with their related objects
+(eager joins) and fetches per-row aggregates with one grouped query for the
+whole page, so a page costs a fixed number of queries however long it is.
+
+Listings are read-only wrappers: unknown attributes fall through to the
+wrapped row, so templates keep using `quiz.title`, `ticket.user.username`, etc.
+"""
+
+from flask import current_app
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+
+from app import db
+from app.models.quiz import Quiz
+from app.models.attempt import Attempt
+from app.models.support import SupportTicket, SupportReply
+
+
+class Listing:
+    """Base projection: a row plus values that were fetched in bulk."""
+
+    def __init__(self, row, **values):
+        self._row = row
+        self.__dict__.update(values)
+
+    def __getattr__(self, name):
+        # Only called for attributes not set on the listing itself
+        return getattr(self._row, name)
+
+    def __repr__(self):
+        return f'<{type(self).__name__} {self._row!r}>'
+
+
+class QuizListing(Listing):
+    """
+    Quiz card / table row.  Creator is eager-loaded; question and attempt
+    totals come from the quiz counters; `my_attempts` is the viewer's attempt
+    count on this quiz (0 for anonymous viewers) and `attempts_left` what
+    remains of MAX_ATTEMPTS_PER_QUIZ.
+    """
+
+    @staticmethod
+    def query(base=None):
+        """Quiz query with the creator joined in."""
+        query = base if base is not None else Quiz.query
+        return query.options(joinedload(Quiz.creator))
+
+    @classmethod
+    def wrap(cls, quizzes, viewer_id=None):
+        """Project a page of quizzes — at most one extra query for the viewer's attempts."""
+        my_attempts = {}
+        if viewer_id is not None and quizzes:
+            my_attempts = dict(
+                db.session.query(Attempt.quiz_id, func.count(Attempt.id))
+                .filter(Attempt.user_id == viewer_id,
+                        Attempt.quiz_id.in_([q.id for q in quizzes]))
+                .group_by(Attempt.quiz_id)
+                .all()
+            )
+        max_attempts = current_app.config.get('MAX_ATTEMPTS_PER_QUIZ', 3)
+        return [cls(quiz,
+                    my_attempts=my_attempts.get(quiz.id, 0),
+                    attempts_left=max(0, max_attempts - my_attempts.get(quiz.id, 0)))
+                for quiz in quizzes]
+
+
+class TicketListing(Listing):
+    """Support ticket row with its author eager-loaded and a bulk `reply_count`."""
+
+    @staticmethod
+    def query(base=None):
+        query = base if base is not None else SupportTicket.query
+        return query.options(joinedload(SupportTicket.user))
+
+    @classmethod
+    def wrap(cls, tickets):
+        """Project a page of tickets — one grouped query for all reply counts."""
+        reply_counts = {}
+        if tickets:
+            reply_counts = dict(
+                db.session.query(SupportReply.ticket_id, func.count(SupportReply.id))
+                .filter(SupportReply.ticket_id.in_([t.id for t in tickets]))
+                .group_by(SupportReply.ticket_id)
+                .all()
+            )
+        return [cls(ticket, reply_count=reply_counts.get(ticket.id, 0)) for ticket in tickets]
+
+
+class AttemptListing(Listing):
+    """Attempt row (recent activity, score history) with its quiz eager-loaded."""
+
+    @staticmethod
+    def query(base=None):
+        query = base if base is not None else Attempt.query
+        return query.options(joinedload(Attempt.quiz))
@@ -0,0 +1,496 @@
+"""
+Adaptive Model Routing
+──────────────────────
+Orders GEMINI_MODELS for each generation by expected time to a valid quiz,
+learned from the calls every worker has made:
+
+    latency    EWMA of seconds per answered call
+    success    EWMA of calls answered (vs. API errors and timeouts)
+    validity   EWMA of answers that parsed and validated as a quiz
+
+    expected   = latency / (success × validity)
+
+i.e. the time one try takes over the chance that it yields a quiz.  Asking
+models in ascending order of that ratio minimises the expected wait of a
+sequential fallback.  Unseen models start at PRIOR_LATENCY with perfect
+rates so they get tried, and GEMINI_ROUTING_EXPLORE of generations lead
+with a random other model so the estimates behind the leader stay fresh.
+
+Each model also has a circuit breaker, replacing the fixed cooldown:
+
+    closed     → routed normally; GEMINI_CIRCUIT_FAILURES consecutive API
+                 errors, or a single rate-limit, open it
+    open       → skipped for GEMINI_CIRCUIT_OPEN_SECONDS, doubling after
+                 every failed probe up to GEMINI_CIRCUIT_MAX_OPEN_SECONDS
+    half-open  → one request goes through as a probe: an answer closes the
+                 circuit, an error opens it again
+
+Invalid JSON lowers validity but never opens a circuit — the model is up,
+just bad at the task.  A cancelled hedged request can only raise the
+latency estimate, to the time it had already taken.  When every circuit is
+open, the one due to half-open soonest is probed early instead of failing
+the generation outright.
+
+Shared state (GEMINI_STATE_BACKEND):
+
+    memory    → per process; every worker learns and trips circuits alone
+    sqlite    → local WAL-mode SQLite file (GEMINI_STATE_PATH) shared by
+                the workers on one host
+    database  → one ai_model_health row per model in the app database,
+                shared by every worker and host (default)
+
+Outcomes are written through, each as one atomic read-modify-write of the
+model's state, and claiming a half-open probe is atomic too, so exactly one
+worker probes.  Routing reads a local copy refreshed every
+GEMINI_STATE_CACHE_SECONDS, so one worker's 429 steers all workers within
+that window.  If the backend fails, the worker routes on its own state
+until it recovers.  A Redis-style backend plugs in with
+register_model_state_store().
+"""
+
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+
+logger = logging.getLogger(__name__)
+
+PRIOR_LATENCY = 10.0  # seconds assumed for a model with no answered call yet
+MIN_YIELD = 0.05      # floor on success × validity, so a bad streak cannot rank a model out for good
+
+# Circuit states; PROBING is a half-open circuit whose probe is in flight
+CLOSED, OPEN, HALF_OPEN, PROBING = 'closed', 'open', 'half-open', 'probing'
+
+# Outcomes of one request, as reported to ModelRouter.record()
+OK = 'ok'                      # valid quiz
+INVALID = 'invalid'            # answered, but not a usable quiz
+RATE_LIMITED = 'rate_limited'  # 429 / quota
+ERROR = 'error'                # other API errors, timeouts, connection failures
+REJECTED = 'rejected'          # auth / permission — says nothing about the model
+CANCELLED = 'cancelled'        # hedged request abandoned for a faster model
+
+FIELDS = ('latency', 'success', 'validity', 'calls', 'state', 'failures',
+          'open_until', 'open_seconds', 'probe_started')
+TIME_FIELDS = ('open_until', 'probe_started')
+
+# Times a database write is redone after losing a compare-and-set
+CAS_ATTEMPTS = 20
+
+
+class ModelHealth:
+    """Routing estimates and circuit state of one model."""
+
+    def __init__(self):
+        self.latency: float | None = None   # EWMA seconds; None until the first answer
+        self.success = 1.0
+        self.validity = 1.0
+        self.calls = 0
+        self.state = CLOSED                 # stored state: CLOSED, OPEN or HALF_OPEN
+        self.failures = 0                   # consecutive API errors
+        self.open_until: datetime | None = None
+        self.open_seconds = 0               # length of the current / last open period
+        self.probe_started: datetime | None = None
+
+    def expected_seconds(self) -> float:
+        latency = self.latency if self.latency is not None else PRIOR_LATENCY
+        return latency / max(self.success * self.validity, MIN_YIELD)
+
+    def state_at(self, now: datetime) -> str:
+        """Circuit state as of `now`: an open circuit whose period is over is half-open."""
+        if self.state == CLOSED:
+            return CLOSED
+        if self.state == OPEN and self.open_until and now < self.open_until:
+            return OPEN
+        # A probe that never reported (its worker died) frees the slot after twice the call timeout
+        probe_timeout = timedelta(seconds=current_app.config.get('GEMINI_TIMEOUT', 60) * 2)
+        if self.probe_started and now - self.probe_started < probe_timeout:
+            return PROBING
+        return HALF_OPEN
+
+    def to_dict(self) -> dict:
+        data = {field: getattr(self, field) for field in FIELDS}
+        for field in TIME_FIELDS:
+            data[field] = data[field].isoformat() if data[field] else None
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ModelHealth':
+        health = cls()
+        for field in FIELDS:
+            if field in data:
+                setattr(health, field, data[field])
+        for field in TIME_FIELDS:
+            if isinstance(getattr(health, field), str):
+                setattr(health, field, datetime.fromisoformat(getattr(health, field)))
+        return health
+
+
+# ── State backends ───────────────────────────────────────────────────
+
+class ModelStateStore:
+    """Base class for model state backends. Hands out copies; changes go through update()."""
+
+    name = 'base'
+
+    def load(self) -> dict[str, ModelHealth]:
+        """Every model's state."""
+        raise NotImplementedError
+
+    def update(self, model: str, change):
+        """
+        Atomically apply change(health) to the model's state (created if
+        missing) and store it.  Returns (change's result, new state).
+        """
+        raise NotImplementedError
+
+
+class MemoryModelStateStore(ModelStateStore):
+    """Per-process state."""
+
+    name = 'memory'
+
+    def __init__(self):
+        self._states: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            return {model: ModelHealth.from_dict(data) for model, data in self._states.items()}
+
+    def update(self, model, change):
+        with self._lock:
+            health = ModelHealth.from_dict(self._states.get(model, {}))
+            result = change(health)
+            self._states[model] = health.to_dict()
+            return result, ModelHealth.from_dict(self._states[model])
+
+
+class SQLiteModelStateStore(ModelStateStore):
+    """File-backed state shared by the workers on one host."""
+
+    name = 'sqlite'
+
+    def __init__(self, path=None):
+        self.path = path or current_app.config.get('GEMINI_STATE_PATH')
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._local = threading.local()
+        self._connect().execute(
+            'CREATE TABLE IF NOT EXISTS model_state (model TEXT PRIMARY KEY, data TEXT NOT NULL)'
+        )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def load(self):
+        rows = self._connect().execute('SELECT model, data FROM model_state').fetchall()
+        return {model: ModelHealth.from_dict(json.loads(data)) for model, data in rows}
+
+    def update(self, model, change):
+        conn = self._connect()
+        # IMMEDIATE takes the write lock up front, so concurrent updates queue instead of racing
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT data FROM model_state WHERE model = ?', (model,)).fetchone()
+            health = ModelHealth.from_dict(json.loads(row[0]) if row else {})
+            result = change(health)
+            conn.execute(
+                'INSERT INTO model_state (model, data) VALUES (?, ?) '
+                'ON CONFLICT (model) DO UPDATE SET data = excluded.data',
+                (model, json.dumps(health.to_dict())),
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return result, health
+
+
+class DatabaseModelStateStore(ModelStateStore):
+    """
+    ai_model_health rows in the app database, shared by every worker and host.
+
+    Reads and writes go through their own engine connections, never the
+    request's db.session, so routing bookkeeping cannot commit or roll back
+    the request's pending work.  (On SQLite a request that holds the write
+    lock makes an update wait for it, and then fall back as any failure does.)
+    """
+
+    name = 'database'
+
+    def load(self):
+        from app.models.ai_usage import AIModelHealth
+
+        with db.engine.connect() as conn:
+            rows = conn.execute(select(AIModelHealth.__table__)).all()
+        return {row.model_name: self._to_health(row) for row in rows}
+
+    def update(self, model, change):
+        from app.models.ai_usage import AIModelHealth
+
+        table = AIModelHealth.__table__
+        # SELECT … FOR UPDATE queues writers where the database supports it;
+        # SQLite ignores it, so the write is also a compare-and-set on the
+        # row's version: one that lost the race matches no row and is redone
+        # on what the winner wrote.
+        for _ in range(CAS_ATTEMPTS):
+            try:
+                with db.engine.begin() as conn:
+                    row = conn.execute(select(table).where(table.c.model_name == model).with_for_update()).first()
+                    if row is None:
+                        conn.execute(insert(table).values(model_name=model))
+                        continue
+
+                    health = self._to_health(row)
+                    result = change(health)
+                    values = {field: getattr(health, field) for field in FIELDS}
+                    written = conn.execute(
+                        update(table)
+                        .where(table.c.model_name == model, table.c.version == row.version)
+                        .values(dict(values, version=row.version + 1, updated_at=datetime.utcnow()))
+                    ).rowcount
+                if written:
+                    return result, health
+            except IntegrityError:
+                pass  # row created by another worker meanwhile
+        raise RuntimeError(f'Could not update the health row of {model}: too much contention')
+
+    @staticmethod
+    def _to_health(row) -> ModelHealth:
+        health = ModelHealth()
+        for field in FIELDS:
+            setattr(health, field, getattr(row, field))
+        return health
+
+
+MODEL_STATE_STORES = {
+    MemoryModelStateStore.name: MemoryModelStateStore,
+    SQLiteModelStateStore.name: SQLiteModelStateStore,
+    DatabaseModelStateStore.name: DatabaseModelStateStore,
+}
+
+# Module-level instances — survive across requests
+_stores: dict[str, ModelStateStore] = {}
+_stores_lock = threading.Lock()
+
+
+def register_model_state_store(store_cls) -> None:
+    """Make a custom ModelStateStore subclass (e.g. Redis) selectable via GEMINI_STATE_BACKEND."""
+    MODEL_STATE_STORES[store_cls.name] = store_cls
+
+
+def get_model_state_store() -> ModelStateStore:
+    name = current_app.config.get('GEMINI_STATE_BACKEND', 'database')
+    if name not in MODEL_STATE_STORES:
+        raise ValueError(f'Unknown model state backend: {name}')
+    with _stores_lock:
+        if name not in _stores:
+            _stores[name] = MODEL_STATE_STORES[name]()
+        return _stores[name]
+
+
+# ── Router ───────────────────────────────────────────────────────────
+
+class ModelRouter:
+    """Routing over the shared model state, through a short-lived local copy."""
+
+    def __init__(self):
+        self._cache: dict[str, ModelHealth] = {}
+        self._cache_backend = None
+        self._cache_expires = 0.0
+        self._lock = threading.Lock()
+        # Used while the configured backend is failing
+        self._fallback = MemoryModelStateStore()
+
+    def _backend(self, action):
+        """Run action(store) on the configured backend, or on this worker's own state if it fails."""
+        try:
+            store = get_model_state_store()
+            return action(store)
+        except Exception:
+            logger.exception('Model state backend failed — routing on this worker\'s own state')
+            return action(self._fallback)
+
+    def _states(self, fresh: bool = False) -> dict[str, ModelHealth]:
+        """Model states as of at most GEMINI_STATE_CACHE_SECONDS ago (or now, if `fresh`)."""
+        backend = current_app.config.get('GEMINI_STATE_BACKEND', 'database')
+        with self._lock:
+            if not fresh and backend == self._cache_backend and time.monotonic() < self._cache_expires:
+                return {model: ModelHealth.from_dict(health.to_dict()) for model, health in self._cache.items()}
+        states = self._backend(lambda store: store.load())
+        with self._lock:
+            self._cache = states
+            self._cache_backend = backend
+            self._cache_expires = time.monotonic() + current_app.config.get('GEMINI_STATE_CACHE_SECONDS', 1.0)
+        return {model: ModelHealth.from_dict(health.to_dict()) for model, health in states.items()}
+
+    def _update(self, model: str, change):
+        result, health = self._backend(lambda store: store.update(model, change))
+        with self._lock:
+            # This worker sees its own writes at once
+            self._cache[model] = health
+        return result
+
+    # ── Routing ──────────────────────────────────────────────────────
+
+    def ranked(self, models: list[str]) -> list[str]:
+        """Models that can take a request now, lowest expected time first (config order breaks ties)."""
+        now = datetime.utcnow()
+        states = self._states()
+        health = {model: states.get(model) or ModelHealth() for model in models}
+        usable = [(health[model].expected_seconds(), index, model)
+                  for index, model in enumerate(models)
+                  if health[model].state_at(now) in (CLOSED, HALF_OPEN)]
+
+        if not usable and models and not any(h.state_at(now) == PROBING for h in health.values()):
+            # Everything is open: probe the circuit due to half-open first, early
+            model = min(models, key=lambda m: health[m].open_until or now)
+            self._update(model, lambda h: ModelRouter._half_open_early(h, datetime.utcnow()))
+            logger.warning('All model circuits are open — probing %s early', model)
+            return [model]
+
+        ranked = [model for _, _, model in sorted(usable)]
+        if len(ranked) > 1 and random.random() < current_app.config.get('GEMINI_ROUTING_EXPLORE', 0.05):
+            ranked.insert(0, ranked.pop(random.randrange(1, len(ranked))))
+        return ranked
+
+    @staticmethod
+    def _half_open_early(health: ModelHealth, now: datetime) -> None:
+        if health.state_at(now) == OPEN:
+            health.open_until = now
+
+    def begin(self, model: str) -> bool:
+        """Claim a request to `model`: always allowed when closed, once (the probe) when half-open."""
+        cached = self._states().get(model)
+        state = cached.state_at(datetime.utcnow()) if cached else CLOSED
+        if state == CLOSED:
+            return True
+        if state in (OPEN, PROBING):
+            return False
+        claimed = self._update(model, lambda health: ModelRouter._claim_probe(health, datetime.utcnow()))
+        if claimed:
+            logger.info('Probing half-open model %s', model)
+        return claimed
+
+    @staticmethod
+    def _claim_probe(health: ModelHealth, now: datetime) -> bool:
+        state = health.state_at(now)
+        if state == CLOSED:
+            return True
+        if state != HALF_OPEN:
+            return False
+        health.state = HALF_OPEN
+        health.probe_started = now
+        return True
+
+    # ── Feedback ─────────────────────────────────────────────────────
+
+    def record(self, model: str, outcome: str, seconds: float | None = None) -> None:
+        """Fold one request's outcome (and its duration, when it got an answer) into the model's state."""
+        config = current_app.config
+        settings = {
+            'alpha': config.get('GEMINI_ROUTING_ALPHA', 0.2),
+            'failures': config.get('GEMINI_CIRCUIT_FAILURES', 3),
+            'open_seconds': config.get('GEMINI_CIRCUIT_OPEN_SECONDS', 60),
+            'max_open_seconds': config.get('GEMINI_CIRCUIT_MAX_OPEN_SECONDS', 900),
+        }
+        change = ModelRouter._apply(model, outcome, seconds, settings, datetime.utcnow())
+        self._update(model, change)
+
+    @staticmethod
+    def _apply(model, outcome, seconds, settings, now):
+        """The state change for one outcome, as a function of the model's current state."""
+        alpha = settings['alpha']
+
+        def change(health: ModelHealth) -> None:
+            probing = health.state_at(now) == PROBING
+
+            if outcome in (CANCELLED, REJECTED):
+                if outcome == CANCELLED and seconds is not None:
+                    current = health.latency if health.latency is not None else PRIOR_LATENCY
+                    if seconds > current:
+                        health.latency = current + alpha * (seconds - current)
+                if probing:
+                    health.probe_started = None  # inconclusive — let another request probe
+                return
+
+            health.calls += 1
+            answered = outcome in (OK, INVALID)
+            health.success += alpha * (answered - health.success)
+            if answered:
+                if seconds is not None:
+                    health.latency = seconds if health.latency is None else health.latency + alpha * (seconds - health.latency)
+                health.validity += alpha * ((outcome == OK) - health.validity)
+                health.failures = 0
+                if health.state != CLOSED:
+                    logger.info('Circuit for %s closed', model)
+                    health.state = CLOSED
+                    health.open_seconds = 0
+                    health.open_until = None
+                    health.probe_started = None
+                return
+
+            health.failures += 1
+            if probing or outcome == RATE_LIMITED or health.failures >= settings['failures']:
+                if probing and health.open_seconds:
+                    health.open_seconds = min(health.open_seconds * 2, settings['max_open_seconds'])
+                elif health.state == CLOSED or not health.open_seconds:
+                    health.open_seconds = settings['open_seconds']
+                health.state = OPEN
+                health.open_until = now + timedelta(seconds=health.open_seconds)
+                health.probe_started = None
+                health.failures = 0
+                logger.warning('Circuit for %s opened for %d s', model, health.open_seconds)
+
+        return change
+
+    # ── Reporting ────────────────────────────────────────────────────
+
+    def snapshot(self, models: list[str]) -> list[dict]:
+        """Live shared scores for the admin panel, in routing order."""
+        now = datetime.utcnow()
+        states = self._states(fresh=True)
+        rows = []
+        for model in models:
+            health = states.get(model) or ModelHealth()
+            state = health.state_at(now)
+            rows.append({
+                'model': model,
+                'state': state,
+                'latency': health.latency,
+                'success': health.success,
+                'validity': health.validity,
+                'expected': health.expected_seconds(),
+                'calls': health.calls,
+                'open_until': health.open_until if state == OPEN else None,
+            })
+        return sorted(rows, key=lambda row: (row['state'] == OPEN, row['expected']))
+
+    def open_circuits(self) -> dict[str, datetime]:
+        """model → when its open circuit turns half-open (UTC), as every worker sees it."""
+        now = datetime.utcnow()
+        return {model: health.open_until for model, health in self._states(fresh=True).items()
+                if health.state_at(now) == OPEN}
+
+
+# Module-level singleton — survives across requests
+_router = ModelRouter()
+
+
+def get_model_router() -> ModelRouter:
+    return _router
@@ -1,8 +1,20 @@
 from app import db
 from app.models.quiz import Quiz
 from app.models.question import Question
+from app.models.attempt import Attempt, QuizAttemptCounter
+from app.services.search_service import SearchService
+from app.services.listing_service import QuizListing
+from app.services.quiz_snapshot_service import QuizSnapshotService
+from app.services.user_stats_service import UserStatsService
+from app.services.fragment_cache_service import FragmentCacheService
+from app.utils.pagination import KeysetPage, InvalidCursor, keyset_paginate, encode_cursor, decode_cursor
+from flask import current_app
+from sqlalchemy import func
 from datetime import datetime
 
+# Statuses listed on the explore page under "All Visible"
+EXPLORE_STATUSES = ('active', 'scheduled', 'closed')
+
 class QuizService:
     @staticmethod
     def create_quiz(user_id, title, description, time_limit=None, status='draft', is_ai_generated=False):
@@ -15,7 +27,11 @@ class QuizService:
             is_ai_generated=is_ai_generated
         )
         db.session.add(quiz)
+        db.session.flush()
+        SearchService.index_quiz(quiz)
+        UserStatsService.quiz_status_changed(user_id, None, status)
         db.session.commit()
+        FragmentCacheService.invalidate_user(user_id)
         return quiz
 
     @staticmethod
@@ -26,17 +42,70 @@ class QuizService:
     def get_user_quizzes(user_id):
         return Quiz.query.filter_by(creator_id=user_id).order_by(Quiz.created_at.desc()).all()
 
+    @staticmethod
+    def explore_page(status='active', search_query='', sort_by='newest', cursor=None, per_page=24):
+        """
+        Fetch one page of the explore listing.
+        newest → keyset on (created_at, id); popular → keyset on (attempt_count, id);
+        relevance → ranked search results within a bounded window.
+        Raises InvalidCursor if the cursor cannot be decoded.
+        """
+        query = QuizListing.query()
+        if status == 'all':
+            query = query.filter(Quiz.status.in_(EXPLORE_STATUSES))
+        else:
+            query = query.filter_by(status=status)
+
+        rank_order = None
+        if search_query:
+            query, rank_order = SearchService.search(query, search_query)
+
+        if sort_by == 'relevance' and rank_order is not None:
+            return QuizService._ranked_page(query, rank_order, cursor, per_page)
+
+        if sort_by == 'popular':
+            return keyset_paginate(query, [(Quiz.attempt_count, True), (Quiz.id, True)], cursor, per_page)
+
+        return keyset_paginate(query, [(Quiz.created_at, True), (Quiz.id, True)], cursor, per_page)
+
+    @staticmethod
+    def _ranked_page(query, rank_order, cursor, per_page):
+        # Relevance scores are not stable keys, so search results are paged by
+        # offset — but only within EXPLORE_SEARCH_WINDOW, which bounds the cost.
+        window = current_app.config.get('EXPLORE_SEARCH_WINDOW', 240)
+        values = decode_cursor(cursor) if cursor else [0]
+        if len(values) != 1 or type(values[0]) is not int:
+            raise InvalidCursor('Cursor does not match the sort order.')
+        offset = values[0]
+        if not 0 <= offset < window:
+            raise InvalidCursor('Search cursor is outside the result window.')
+
+        rows = query.order_by(rank_order, Quiz.id.desc()).offset(offset).limit(per_page + 1).all()
+        next_offset = offset + per_page
+        next_cursor = None
+        if len(rows) > per_page and next_offset < window:
+            next_cursor = encode_cursor([next_offset])
+        return KeysetPage(rows[:per_page], next_cursor)
+
     @staticmethod
     def update_quiz(quiz_id, user_id, **kwargs):
         quiz = Quiz.query.filter_by(id=quiz_id, creator_id=user_id).first()
         if not quiz:
             return None
-            
+
+        old_status = quiz.status
         for key, value in kwargs.items():
             if hasattr(quiz, key):
                 setattr(quiz, key, value)
+
+        if 'title' in kwargs or 'description' in kwargs:
+            SearchService.index_quiz(quiz)
+        UserStatsService.quiz_status_changed(user_id, old_status, quiz.status)
+        QuizService.adjust_counters(quiz_id, version=1)
                 
         db.session.commit()
+        QuizSnapshotService.invalidate(quiz_id)
+        FragmentCacheService.invalidate_user(user_id)
         return quiz
 
     @staticmethod
@@ -45,8 +114,13 @@ class QuizService:
         if quiz:
             # Delete associated questions first
             Question.query.filter_by(quiz_id=quiz.id).delete()
+            QuizAttemptCounter.query.filter_by(quiz_id=quiz.id).delete()
+            SearchService.remove_quiz(quiz.id)
+            UserStatsService.quiz_status_changed(quiz.creator_id, quiz.status, None)
             db.session.delete(quiz)
             db.session.commit()
+            QuizSnapshotService.invalidate(quiz_id)
+            FragmentCacheService.invalidate_user(user_id)
             return True
         return False
 
@@ -68,7 +142,10 @@ class QuizService:
         )
         
         db.session.add(question)
+        QuizService.adjust_counters(quiz_id, question_count=1, version=1)
         db.session.commit()
+        QuizSnapshotService.invalidate(quiz_id)
+        FragmentCacheService.invalidate_user(user_id)
         return question
 
     @staticmethod
@@ -79,7 +156,71 @@ class QuizService:
     def delete_question(question_id, user_id):
         question = Question.query.get(question_id)
         if question and question.quiz.creator_id == user_id:
+            quiz_id = question.quiz_id
+            QuizService.adjust_counters(quiz_id, question_count=-1, version=1)
             db.session.delete(question)
             db.session.commit()
+            QuizSnapshotService.invalidate(quiz_id)
+            FragmentCacheService.invalidate_user(user_id)
             return True
         return False
+
+    # ── Denormalized counters ────────────────────────────────────
+
+    @staticmethod
+    def adjust_counters(quiz_id, **deltas):
+        """
+        Atomically add deltas to counter columns, e.g. adjust_counters(3, attempt_count=1).
+        Issued as `SET col = col + n` so concurrent writers never lose an update;
+        runs inside the caller's transaction.
+        """
+        values = {getattr(Quiz, name): getattr(Quiz, name) + delta for name, delta in deltas.items()}
+        Quiz.query.filter_by(id=quiz_id).update(values, synchronize_session=False)
+
+    @staticmethod
+    def reconcile_counters(batch_size=500):
+        """
+        Recompute every quiz's counters from the source tables and repair drift.
+        Walks quizzes in id-ordered batches so each step is a handful of grouped
+        queries over a bounded id range. Returns the number of repaired quizzes.
+        """
+        repaired = 0
+        last_id = 0
+        while True:
+            batch = (db.session.query(Quiz.id, Quiz.question_count, Quiz.attempt_count, Quiz.completion_count)
+                     .filter(Quiz.id > last_id)
+                     .order_by(Quiz.id)
+                     .limit(batch_size)
+                     .all())
+            if not batch:
+                break
+            first_id, last_id = batch[0].id, batch[-1].id
+
+            questions = dict(db.session.query(Question.quiz_id, func.count(Question.id))
+                             .filter(Question.quiz_id.between(first_id, last_id))
+                             .group_by(Question.quiz_id).all())
+            attempts = dict(db.session.query(Attempt.quiz_id, func.count(Attempt.id))
+                            .filter(Attempt.quiz_id.between(first_id, last_id))
+                            .group_by(Attempt.quiz_id).all())
+            completions = dict(db.session.query(Attempt.quiz_id, func.count(Attempt.id))
+                               .filter(Attempt.quiz_id.between(first_id, last_id),
+                                       Attempt.submitted_at.isnot(None))
+                               .group_by(Attempt.quiz_id).all())
+
+            fixes = []
+            for row in batch:
+                actual = {
+                    'id': row.id,
+                    'question_count': questions.get(row.id, 0),
+                    'attempt_count': attempts.get(row.id, 0),
+                    'completion_count': completions.get(row.id, 0),
+                }
+                if (row.question_count, row.attempt_count, row.completion_count) != \
+                        (actual['question_count'], actual['attempt_count'], actual['completion_count']):
+                    fixes.append(actual)
+
+            if fixes:
+                db.session.bulk_update_mappings(Quiz, fixes)
+                repaired += len(fixes)
+            db.session.commit()
+        return repaired
@@ -0,0 +1,133 @@
+"""
+Quiz Snapshots
+──────────────
+An immutable, compiled copy of a quiz's questions used while it is being
+taken: ordered question ids, the display payload for each question and a
+compact answer key.  Scoring an answer or picking the next question is then
+a dict lookup instead of a Question query.
+
+Snapshots are keyed by (quiz id, quiz.version).  QuizService bumps
+`quizzes.version` whenever questions or quiz settings change, so every worker
+notices a stale snapshot from the quiz row it already loads and rebuilds it;
+the editing worker also drops its copy straight away.  At most
+QUIZ_SNAPSHOT_CACHE_SIZE snapshots are kept, least recently used evicted.
+"""
+
+import threading
+from collections import OrderedDict, namedtuple
+from types import MappingProxyType
+
+from flask import current_app
+
+from app.models.question import Question
+
+# Display payload — same attribute names as Question, so templates work unchanged
+QuestionView = namedtuple('QuestionView', 'id quiz_id question_text option_a option_b option_c option_d')
+
+
+class QuizSnapshot:
+    """Compiled, read-only view of one version of a quiz."""
+
+    __slots__ = ('quiz_id', 'version', 'questions', 'question_ids', 'answer_key', '_positions')
+
+    def __init__(self, quiz_id, version, questions, answer_key):
+        self.quiz_id = quiz_id
+        self.version = version
+        self.questions = tuple(questions)
+        self.question_ids = tuple(q.id for q in self.questions)
+        self.answer_key = MappingProxyType(dict(answer_key))
+        self._positions = MappingProxyType({qid: i for i, qid in enumerate(self.question_ids)})
+
+    @property
+    def question_count(self):
+        return len(self.question_ids)
+
+    def __contains__(self, question_id):
+        return question_id in self.answer_key
+
+    def is_correct(self, question_id, selected_option):
+        return selected_option is not None and self.answer_key.get(question_id) == selected_option
+
+    def score(self, selections):
+        """Number of correct answers in {question_id: option}."""
+        return sum(1 for qid, option in selections.items() if self.is_correct(qid, option))
+
+    def position(self, question_id):
+        return self._positions.get(question_id)
+
+    def next_unanswered(self, answered_ids):
+        """First question (in quiz order) not in answered_ids, or None."""
+        for question in self.questions:
+            if question.id not in answered_ids:
+                return question
+        return None
+
+    def __repr__(self):
+        return f'<QuizSnapshot quiz={self.quiz_id} v{self.version} questions={self.question_count}>'
+
+
+# quiz_id → QuizSnapshot, most recently used last
+_snapshots: OrderedDict[int, QuizSnapshot] = OrderedDict()
+_snapshot_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+class QuizSnapshotService:
+    @staticmethod
+    def for_quiz(quiz):
+        """Snapshot for the quiz's current version — built with one query on a miss."""
+        version = quiz.version or 0
+        with _snapshot_lock:
+            snapshot = _snapshots.get(quiz.id)
+            if snapshot is not None and snapshot.version == version:
+                _snapshots.move_to_end(quiz.id)
+                _stats['hits'] += 1
+                return snapshot
+            _stats['misses'] += 1
+
+        snapshot = QuizSnapshotService.build(quiz.id, version)
+        limit = current_app.config.get('QUIZ_SNAPSHOT_CACHE_SIZE', 256)
+        with _snapshot_lock:
+            _snapshots[quiz.id] = snapshot
+            _snapshots.move_to_end(quiz.id)
+            while len(_snapshots) > limit:
+                _snapshots.popitem(last=False)
+        return snapshot
+
+    @staticmethod
+    def build(quiz_id, version):
+        rows = (Question.query
+                .with_entities(Question.id, Question.quiz_id, Question.question_text,
+                               Question.option_a, Question.option_b, Question.option_c,
+                               Question.option_d, Question.correct_option)
+                .filter_by(quiz_id=quiz_id)
+                .order_by(Question.id)
+                .all())
+        return QuizSnapshot(
+            quiz_id,
+            version,
+            questions=[QuestionView(*row[:-1]) for row in rows],
+            answer_key={row.id: row.correct_option for row in rows},
+        )
+
+    @staticmethod
+    def invalidate(quiz_id):
+        with _snapshot_lock:
+            _snapshots.pop(quiz_id, None)
+
+    @staticmethod
+    def clear():
+        with _snapshot_lock:
+            _snapshots.clear()
+            _stats['hits'] = _stats['misses'] = 0
+
+    @staticmethod
+    def stats():
+        with _snapshot_lock:
+            lookups = _stats['hits'] + _stats['misses']
+            return {
+                'size': len(_snapshots),
+                'hits': _stats['hits'],
+                'misses': _stats['misses'],
+                'hit_rate': _stats['hits'] / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,352 @@
+"""
+Rank Service
+────────────
+Answers "what is user X's rank" and "who is around me" for the global board
+and for per-quiz boards without counting the rows above the user.
+
+Each board is an in-process SortedScoreSet (see app/utils/ranking.py):
+    global   → member = user id, score = encoded (avg accuracy, attempt count)
+               loaded from leaderboard_entries
+    quiz:<id> → member = user id, score = best accuracy on that quiz,
+               loaded lazily from attempts the first time the quiz is asked for
+
+The database stays the source of truth.  Boards pick up writes from other
+workers by syncing deltas (rows changed since the last sync) at most every
+RANK_SYNC_SECONDS, and a JSON snapshot lets a fresh process warm-start
+instead of reloading every board.  A request that triggers a sync only reads
+the deltas; the periodic snapshot (RANK_SNAPSHOT_SECONDS) is written by a
+background thread, or by `flask rank-snapshot`.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import func
+
+from app import db
+from app.models.user import User
+from app.models.attempt import Attempt
+from app.models.leaderboard import LeaderboardEntry
+from app.utils.ranking import SortedScoreSet
+
+logger = logging.getLogger(__name__)
+
+GLOBAL = 'global'
+
+# Deltas are re-read with this overlap so commits that raced the last sync are not missed
+SYNC_OVERLAP = timedelta(seconds=5)
+
+# Global score = accuracy (2 dp) with attempt count as tie-breaker, packed into one number
+_COUNT_SLOTS = 1_000_000
+
+
+def global_score(avg_accuracy, attempt_count):
+    return round((avg_accuracy or 0) * 100) * _COUNT_SLOTS + min(attempt_count or 0, _COUNT_SLOTS - 1)
+
+
+def decode_global_score(score):
+    return (score // _COUNT_SLOTS) / 100, score % _COUNT_SLOTS
+
+
+class _RankState:
+    def __init__(self):
+        self.boards: dict[str, SortedScoreSet] = {}
+        self.suspended: set[int] = set()            # users hidden from every board
+        self.synced_at: datetime | None = None     # DB time covered by the boards
+        self.checked_at = 0.0                       # monotonic time of last sync attempt
+        self.saved_at = 0.0                         # monotonic time of last snapshot
+        self.saver: threading.Thread | None = None  # background snapshot in progress
+        self.lock = threading.Lock()
+
+
+# Module-level singleton — survives across requests
+_state = _RankState()
+
+
+class RankService:
+    # ── Writes ───────────────────────────────────────────────────
+
+    @staticmethod
+    def record_attempt(user_id, quiz_id, accuracy):
+        """Apply a just-committed finished attempt to the boards in this process."""
+        if GLOBAL not in _state.boards:
+            return  # nothing loaded yet; the first read loads from the database
+        quiz_board = _state.boards.get(RankService._quiz_key(quiz_id))
+        if quiz_board is not None:
+            quiz_board.zadd_max(user_id, accuracy)
+
+        entry = db.session.get(LeaderboardEntry, user_id)
+        if entry is not None:
+            _state.boards[GLOBAL].zadd(user_id, global_score(entry.avg_accuracy, entry.attempt_count))
+
+    @staticmethod
+    def user_status_changed(user_id):
+        """
+        Suspension / reactivation.  Touching the user's leaderboard entry makes
+        every worker's next delta sync pick the change up; this one applies it now.
+        """
+        LeaderboardEntry.query.filter_by(user_id=user_id).update(
+            {'updated_at': datetime.utcnow()}, synchronize_session=False)
+        db.session.commit()
+        if _state.synced_at is not None:
+            with _state.lock:
+                RankService._sync_deltas()
+
+    # ── Reads ────────────────────────────────────────────────────
+
+    @staticmethod
+    def rank(user_id, quiz_id=None):
+        """1-based rank of the user, or None if they are not on the board."""
+        position = RankService._board(quiz_id).zrevrank(user_id)
+        return None if position is None else position + 1
+
+    @staticmethod
+    def board_size(quiz_id=None):
+        return RankService._board(quiz_id).zcard()
+
+    @staticmethod
+    def around(user_id, quiz_id=None, size=10):
+        """
+        About `size` entries centred on the user, as leaderboard rows:
+        [{'rank', 'user', 'avg_acc', 'total'}, ...].
+        """
+        start, members = RankService._board(quiz_id).around(user_id, radius=size // 2)
+        return RankService._rows(start, members, quiz_id)
+
+    @staticmethod
+    def top(quiz_id=None, limit=50):
+        members = RankService._board(quiz_id).zrevrange(0, limit - 1, withscores=True)
+        return RankService._rows(0, members, quiz_id)
+
+    # ── Snapshot ─────────────────────────────────────────────────
+
+    @staticmethod
+    def save_snapshot(path=None):
+        """Write every loaded board to a JSON file (atomic replace)."""
+        path = path or current_app.config.get('RANK_SNAPSHOT_PATH')
+        if not path or _state.synced_at is None:
+            return False
+        with _state.lock:
+            payload = {
+                'synced_at': _state.synced_at.isoformat(),
+                'suspended': sorted(_state.suspended),
+                'boards': {key: board.to_dict() for key, board in _state.boards.items()},
+            }
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # A temp file of our own, so workers saving at the same time never share one
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        _state.saved_at = time.monotonic()
+        return True
+
+    @staticmethod
+    def rebuild():
+        """Reload the global board from the database, ignoring any snapshot."""
+        with _state.lock:
+            started = datetime.utcnow()
+            _state.boards = {GLOBAL: RankService._load_global_board()}
+            _state.synced_at = started
+            _state.checked_at = time.monotonic()
+        return _state.boards[GLOBAL].zcard()
+
+    @staticmethod
+    def reset():
+        """Forget all boards; the next read reloads from snapshot / database."""
+        with _state.lock:
+            _state.boards = {}
+            _state.suspended = set()
+            _state.synced_at = None
+            _state.checked_at = 0.0
+
+    # ── Internals ────────────────────────────────────────────────
+
+    @staticmethod
+    def _quiz_key(quiz_id):
+        return f'quiz:{quiz_id}'
+
+    @staticmethod
+    def _board(quiz_id):
+        RankService._ensure_loaded()
+        RankService._maybe_sync()
+        if quiz_id is None:
+            return _state.boards[GLOBAL]
+
+        key = RankService._quiz_key(quiz_id)
+        board = _state.boards.get(key)
+        if board is None:
+            board = RankService._load_quiz_board(quiz_id)
+            limit = current_app.config.get('RANK_MAX_QUIZ_BOARDS', 500)
+            with _state.lock:
+                # Evict the oldest-loaded quiz boards; they reload on demand
+                quiz_keys = [k for k in _state.boards if k != GLOBAL]
+                for stale in quiz_keys[:max(0, len(quiz_keys) + 1 - limit)]:
+                    del _state.boards[stale]
+                _state.boards[key] = board
+        return board
+
+    @staticmethod
+    def _ensure_loaded():
+        if GLOBAL in _state.boards:
+            return
+        with _state.lock:
+            if GLOBAL in _state.boards:
+                return
+            if not RankService._load_snapshot():
+                started = datetime.utcnow()
+                _state.boards[GLOBAL] = RankService._load_global_board()
+                _state.synced_at = started
+            _state.checked_at = time.monotonic()
+
+    @staticmethod
+    def _load_snapshot():
+        path = current_app.config.get('RANK_SNAPSHOT_PATH')
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            with open(path) as f:
+                payload = json.load(f)
+            boards = {
+                key: SortedScoreSet.from_dict({int(member): score for member, score in scores.items()})
+                for key, scores in payload['boards'].items()
+            }
+            synced_at = datetime.fromisoformat(payload['synced_at'])
+            suspended = {int(user_id) for user_id in payload.get('suspended', [])}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning('Ignoring unreadable rank snapshot %s: %s', path, e)
+            return False
+        if GLOBAL not in boards:
+            return False
+
+        _state.boards = boards
+        _state.suspended = suspended
+        _state.synced_at = synced_at
+        # Catch up on everything written since the snapshot was taken
+        RankService._sync_deltas()
+        return True
+
+    @staticmethod
+    def _load_global_board():
+        rows = (db.session.query(LeaderboardEntry.user_id, LeaderboardEntry.avg_accuracy,
+                                 LeaderboardEntry.attempt_count, User.is_suspended)
+                .join(User, User.id == LeaderboardEntry.user_id)
+                .all())
+        _state.suspended = {user_id for user_id, _, _, suspended in rows if suspended}
+        return SortedScoreSet.from_dict({
+            user_id: global_score(avg, count) for user_id, avg, count, suspended in rows if not suspended
+        })
+
+    @staticmethod
+    def _load_quiz_board(quiz_id):
+        rows = (db.session.query(Attempt.user_id, func.max(Attempt.accuracy))
+                .join(User, User.id == Attempt.user_id)
+                .filter(Attempt.quiz_id == quiz_id, Attempt.submitted_at.isnot(None))
+                .filter(User.is_suspended == False)
+                .group_by(Attempt.user_id)
+                .all())
+        return SortedScoreSet.from_dict({user_id: best or 0.0 for user_id, best in rows})
+
+    @staticmethod
+    def _maybe_sync():
+        interval = current_app.config.get('RANK_SYNC_SECONDS', 15)
+        if time.monotonic() - _state.checked_at < interval:
+            return
+        with _state.lock:
+            if time.monotonic() - _state.checked_at < interval:
+                return
+            _state.checked_at = time.monotonic()
+            RankService._sync_deltas()
+
+        snapshot_every = current_app.config.get('RANK_SNAPSHOT_SECONDS', 300)
+        if snapshot_every and time.monotonic() - _state.saved_at >= snapshot_every:
+            RankService._save_snapshot_in_background()
+
+    @staticmethod
+    def _save_snapshot_in_background():
+        """Write the snapshot from a background thread, so no request pays for the dump."""
+        app = current_app._get_current_object()
+        with _state.lock:
+            # One save at a time per process (a thread from before a fork is never alive)
+            if _state.saver is not None and _state.saver.is_alive():
+                return
+            # Counts as this interval's attempt, so a failing save is retried next interval
+            _state.saved_at = time.monotonic()
+
+            def save():
+                with app.app_context():
+                    try:
+                        RankService.save_snapshot()
+                    except OSError as e:
+                        logger.warning('Failed to save rank snapshot: %s', e)
+
+            _state.saver = threading.Thread(target=save, name='rank-snapshot', daemon=True)
+            _state.saver.start()
+
+    @staticmethod
+    def _sync_deltas():
+        """Apply rows changed since the last sync — a small indexed read per sync."""
+        since = _state.synced_at - SYNC_OVERLAP
+        started = datetime.utcnow()
+
+        changed = (db.session.query(LeaderboardEntry.user_id, LeaderboardEntry.avg_accuracy,
+                                    LeaderboardEntry.attempt_count, User.is_suspended)
+                   .join(User, User.id == LeaderboardEntry.user_id)
+                   .filter(LeaderboardEntry.updated_at >= since)
+                   .all())
+        board = _state.boards[GLOBAL]
+        reactivated = False
+        for user_id, avg, count, suspended in changed:
+            if suspended:
+                _state.suspended.add(user_id)
+                for other in _state.boards.values():
+                    other.zrem(user_id)
+            else:
+                if user_id in _state.suspended:
+                    _state.suspended.discard(user_id)
+                    reactivated = True
+                board.zadd(user_id, global_score(avg, count))
+        if reactivated:
+            # A returning user's per-quiz bests are not in the deltas; reload those boards lazily
+            _state.boards = {GLOBAL: board}
+
+        quiz_ids = [int(key.split(':', 1)[1]) for key in _state.boards if key.startswith('quiz:')]
+        if quiz_ids:
+            finished = (db.session.query(Attempt.quiz_id, Attempt.user_id, func.max(Attempt.accuracy))
+                        .join(User, User.id == Attempt.user_id)
+                        .filter(Attempt.quiz_id.in_(quiz_ids), Attempt.submitted_at >= since)
+                        .filter(User.is_suspended == False)
+                        .group_by(Attempt.quiz_id, Attempt.user_id)
+                        .all())
+            for quiz_id, user_id, best in finished:
+                _state.boards[RankService._quiz_key(quiz_id)].zadd_max(user_id, best or 0.0)
+
+        _state.synced_at = started
+
+    @staticmethod
+    def _rows(start, members, quiz_id):
+        if not members:
+            return []
+        users = {u.id: u for u in User.query.filter(User.id.in_([m for m, _ in members])).all()}
+        rows = []
+        for offset, (user_id, score) in enumerate(members):
+            user = users.get(user_id)
+            if user is None:
+                continue
+            if quiz_id is None:
+                avg, total = decode_global_score(score)
+            else:
+                avg, total = score, None
+            rows.append({'rank': start + offset + 1, 'user': user, 'avg_acc': round(avg, 1), 'total': total})
+        return rows
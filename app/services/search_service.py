@@ -0,0 +1,220 @@
+"""
+Quiz Full-Text Search
+─────────────────────
+Pluggable search backends for the explore page.  Each backend keeps an
+indexed text representation of every quiz (title + description) that is
+refreshed by QuizService on write, and knows how to filter and rank a
+Quiz query against it.
+
+    postgres → tsvector column on quizzes + GIN index, ranked by ts_rank_cd
+    sqlite   → FTS5 virtual table keyed by quiz id, ranked by bm25
+    like     → ilike fallback for any other dialect (no index, no ranking)
+"""
+
+import re
+import logging
+
+import sqlalchemy as sa
+from flask import current_app
+
+from app import db
+from app.models.quiz import Quiz
+
+logger = logging.getLogger(__name__)
+
+# Search terms beyond this are ignored — keeps tsquery / MATCH expressions small
+MAX_TERMS = 8
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text: str) -> list[str]:
+    """Split a raw search box string into lower-cased word terms."""
+    return _TERM_RE.findall((text or '').lower())[:MAX_TERMS]
+
+
+# ── Backend interface ────────────────────────────────────────────────
+
+class SearchBackend:
+    """Base class for quiz search backends."""
+
+    name = 'base'
+
+    def index(self, quiz) -> None:
+        """Insert or refresh the indexed document for a quiz."""
+        raise NotImplementedError
+
+    def remove(self, quiz_id: int) -> None:
+        """Drop a quiz from the index."""
+        raise NotImplementedError
+
+    def filter(self, query, terms: list[str]):
+        """
+        Restrict a Quiz query to documents matching every term (prefix match).
+        Returns (query, rank_order) — rank_order is an ORDER BY clause sorting
+        best matches first, or None when the backend cannot rank.
+        """
+        raise NotImplementedError
+
+    def rebuild(self) -> int:
+        """Re-index every quiz. Returns the number of indexed quizzes."""
+        raise NotImplementedError
+
+
+class LikeSearchBackend(SearchBackend):
+    """Unindexed fallback that mirrors the original ilike behaviour."""
+
+    name = 'like'
+
+    def index(self, quiz) -> None:
+        pass
+
+    def remove(self, quiz_id: int) -> None:
+        pass
+
+    def filter(self, query, terms):
+        for term in terms:
+            pattern = f'%{term}%'
+            query = query.filter(Quiz.title.ilike(pattern) | Quiz.description.ilike(pattern))
+        return query, None
+
+    def rebuild(self) -> int:
+        return 0
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """FTS5 index stored in the quiz_search virtual table (rowid = quiz id)."""
+
+    name = 'sqlite'
+
+    # Column weights for bm25(): title matches count ten times a description match
+    TITLE_WEIGHT = 10.0
+    DESCRIPTION_WEIGHT = 1.0
+
+    _fts = sa.table('quiz_search', sa.column('rowid', sa.Integer))
+
+    def index(self, quiz) -> None:
+        db.session.execute(sa.text('DELETE FROM quiz_search WHERE rowid = :id'), {'id': quiz.id})
+        db.session.execute(
+            sa.text('INSERT INTO quiz_search (rowid, title, description) VALUES (:id, :title, :description)'),
+            {'id': quiz.id, 'title': quiz.title or '', 'description': quiz.description or ''},
+        )
+
+    def remove(self, quiz_id: int) -> None:
+        db.session.execute(sa.text('DELETE FROM quiz_search WHERE rowid = :id'), {'id': quiz_id})
+
+    def filter(self, query, terms):
+        match = ' '.join(f'"{term}"*' for term in terms)
+        fts_name = sa.literal_column('quiz_search')
+        query = (query
+                 .join(self._fts, self._fts.c.rowid == Quiz.id)
+                 .filter(fts_name.op('MATCH')(match)))
+        rank = sa.func.bm25(fts_name, self.TITLE_WEIGHT, self.DESCRIPTION_WEIGHT)
+        return query, rank.asc()
+
+    def rebuild(self) -> int:
+        db.session.execute(sa.text('DELETE FROM quiz_search'))
+        result = db.session.execute(sa.text(
+            "INSERT INTO quiz_search (rowid, title, description) "
+            "SELECT id, title, coalesce(description, '') FROM quizzes"
+        ))
+        db.session.commit()
+        return result.rowcount
+
+
+class PostgresSearchBackend(SearchBackend):
+    """Weighted tsvector stored in quizzes.search_vector behind a GIN index."""
+
+    name = 'postgres'
+
+    CONFIG = 'english'
+
+    VECTOR_SQL = (
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+    )
+
+    def index(self, quiz) -> None:
+        db.session.execute(
+            sa.text(f'UPDATE quizzes SET search_vector = {self.VECTOR_SQL} WHERE id = :id'),
+            {'id': quiz.id},
+        )
+
+    def remove(self, quiz_id: int) -> None:
+        # The vector lives on the quiz row itself and goes away with it
+        pass
+
+    def filter(self, query, terms):
+        tsquery = sa.func.to_tsquery(self.CONFIG, ' & '.join(f'{term}:*' for term in terms))
+        vector = sa.literal_column('quizzes.search_vector')
+        query = query.filter(vector.op('@@')(tsquery))
+        return query, sa.func.ts_rank_cd(vector, tsquery).desc()
+
+    def rebuild(self) -> int:
+        result = db.session.execute(sa.text(f'UPDATE quizzes SET search_vector = {self.VECTOR_SQL}'))
+        db.session.commit()
+        return result.rowcount
+
+
+# ── Backend registry ─────────────────────────────────────────────────
+
+BACKENDS = {
+    LikeSearchBackend.name: LikeSearchBackend,
+    SQLiteSearchBackend.name: SQLiteSearchBackend,
+    PostgresSearchBackend.name: PostgresSearchBackend,
+}
+
+# Dialect → backend used when SEARCH_BACKEND is 'auto'
+_DIALECT_BACKENDS = {
+    'sqlite': SQLiteSearchBackend.name,
+    'postgresql': PostgresSearchBackend.name,
+}
+
+# Module-level instances — survive across requests
+_instances: dict[str, SearchBackend] = {}
+
+
+def register_backend(backend_cls) -> None:
+    """Make a custom SearchBackend subclass selectable via SEARCH_BACKEND."""
+    BACKENDS[backend_cls.name] = backend_cls
+
+
+def get_backend() -> SearchBackend:
+    name = current_app.config.get('SEARCH_BACKEND', 'auto')
+    if name == 'auto':
+        name = _DIALECT_BACKENDS.get(db.engine.dialect.name, LikeSearchBackend.name)
+    if name not in BACKENDS:
+        raise ValueError(f'Unknown search backend: {name}')
+    if name not in _instances:
+        _instances[name] = BACKENDS[name]()
+    return _instances[name]
+
+
+# ── Search Service ───────────────────────────────────────────────────
+
+class SearchService:
+    @staticmethod
+    def index_quiz(quiz):
+        """Refresh a quiz's search document. Runs inside the caller's transaction."""
+        get_backend().index(quiz)
+
+    @staticmethod
+    def remove_quiz(quiz_id):
+        get_backend().remove(quiz_id)
+
+    @staticmethod
+    def search(query, text):
+        """
+        Apply a search box string to a Quiz query.
+        Returns (query, rank_order); rank_order is None when there is nothing to rank.
+        """
+        terms = tokenize(text)
+        if not terms:
+            return query, None
+        return get_backend().filter(query, terms)
+
+    @staticmethod
+    def rebuild_index():
+        count = get_backend().rebuild()
+        logger.info('Rebuilt quiz search index (%d quizzes)', count)
+        return count
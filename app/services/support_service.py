@@ -1,5 +1,6 @@
 from app import db
 from app.models.support import SupportTicket, SupportReply
+from app.services.listing_service import TicketListing
 
 class SupportService:
     @staticmethod
@@ -49,7 +50,8 @@ class SupportService:
 
     @staticmethod
     def get_all_tickets(status_filter=None):
-        query = SupportTicket.query
+        """Admin ticket list as TicketListing rows (author + reply count preloaded)."""
+        query = TicketListing.query()
         if status_filter and status_filter != 'all':
             query = query.filter_by(status=status_filter)
-        return query.order_by(SupportTicket.created_at.desc()).all()
+        return TicketListing.wrap(query.order_by(SupportTicket.created_at.desc()).all())
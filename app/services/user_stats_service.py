@@ -0,0 +1,95 @@
+from datetime import datetime
+
+from sqlalchemy import case, func, insert, select, update
+
+from app import db
+from app.models.user import User
+from app.models.quiz import Quiz
+from app.models.question import Question
+from app.models.attempt import Attempt, Answer
+from app.models.user_stats import UserStats, QUIZ_STATUS_COLUMNS
+from app.utils.counters import upsert_counter
+
+
+class UserStatsService:
+    @staticmethod
+    def get(user_id):
+        """The user's rollup row — an all-zero one if they have no activity yet."""
+        return db.session.get(UserStats, user_id) or UserStats(
+            user_id=user_id, attempt_count=0, accuracy_sum=0.0, best_accuracy=0.0,
+            correct_count=0, wrong_count=0,
+            **{column: 0 for column in QUIZ_STATUS_COLUMNS.values()}
+        )
+
+    @staticmethod
+    def record_attempt(user_id, accuracy, correct, answered):
+        """
+        Fold one finished attempt into the user's totals. O(1): a single-row
+        upsert. Runs inside the caller's transaction.
+        """
+        S = UserStats
+        accuracy = accuracy or 0.0
+        correct = correct or 0
+        upsert_counter(
+            S,
+            keys={'user_id': user_id},
+            increments={
+                'attempt_count': 1,
+                'accuracy_sum': accuracy,
+                'correct_count': correct,
+                'wrong_count': max(0, (answered or 0) - correct),
+            },
+            update_values={
+                'best_accuracy': case((S.best_accuracy < accuracy, accuracy), else_=S.best_accuracy),
+                'updated_at': datetime.utcnow(),
+            },
+            insert_values={'best_accuracy': accuracy},
+        )
+
+    @staticmethod
+    def quiz_status_changed(user_id, old_status, new_status):
+        """Move one of the user's quizzes between status counts (None = created / deleted)."""
+        if old_status == new_status:
+            return
+        increments = {}
+        if old_status in QUIZ_STATUS_COLUMNS:
+            increments[QUIZ_STATUS_COLUMNS[old_status]] = -1
+        if new_status in QUIZ_STATUS_COLUMNS:
+            increments[QUIZ_STATUS_COLUMNS[new_status]] = 1
+        if increments:
+            upsert_counter(UserStats, keys={'user_id': user_id}, increments=increments,
+                           update_values={'updated_at': datetime.utcnow()})
+
+    @staticmethod
+    def rebuild():
+        """
+        Recompute every user's rollup from attempts, answers and quizzes
+        (backfill / drift repair). Set-based: one row per user, then one
+        UPDATE with correlated aggregates.
+        """
+        S = UserStats
+        UserStats.query.delete()
+        db.session.execute(insert(S).from_select(['user_id'], select(User.id)))
+
+        submitted = (Attempt.user_id == S.user_id, Attempt.submitted_at.isnot(None))
+        answered = (select(func.count(Answer.id))
+                    .join(Attempt, Attempt.id == Answer.attempt_id)
+                    .join(Question, Question.id == Answer.question_id)
+                    .where(*submitted)
+                    .scalar_subquery())
+        correct = select(func.coalesce(func.sum(Attempt.score), 0)).where(*submitted).scalar_subquery()
+        values = {
+            S.attempt_count: select(func.count(Attempt.id)).where(*submitted).scalar_subquery(),
+            S.accuracy_sum: select(func.coalesce(func.sum(Attempt.accuracy), 0.0)).where(*submitted).scalar_subquery(),
+            S.best_accuracy: select(func.coalesce(func.max(Attempt.accuracy), 0.0)).where(*submitted).scalar_subquery(),
+            S.correct_count: correct,
+            S.wrong_count: answered - correct,
+            S.updated_at: datetime.utcnow(),
+        }
+        for status, column in QUIZ_STATUS_COLUMNS.items():
+            values[getattr(S, column)] = (select(func.count(Quiz.id))
+                                          .where(Quiz.creator_id == S.user_id, Quiz.status == status)
+                                          .scalar_subquery())
+        db.session.execute(update(S).values(values).execution_options(synchronize_session=False))
+        db.session.commit()
+        return UserStats.query.count()
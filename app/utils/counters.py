@@ -0,0 +1,36 @@
+"""
+Helpers for incrementally maintained counter rows (rollups, leaderboards).
+"""
+
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+
+
+def upsert_counter(model, keys, increments, update_values=None, insert_values=None):
+    """
+    Add `increments` to the counter row identified by `keys`, creating it if needed.
+
+    The update is issued as `SET col = col + n`, so concurrent writers never lose
+    an increment. `update_values` may hold extra SQL expressions for the UPDATE
+    (evaluated against the pre-update row); `insert_values` seeds other columns
+    when the row is created. If two writers race to create the same row, the
+    loser's INSERT fails inside a savepoint and it falls back to the UPDATE.
+    Runs inside the caller's transaction.
+    """
+    changes = {getattr(model, col): getattr(model, col) + delta for col, delta in increments.items()}
+    for col, value in (update_values or {}).items():
+        changes[getattr(model, col)] = value
+
+    def apply_update():
+        return model.query.filter_by(**keys).update(changes, synchronize_session=False)
+
+    if apply_update():
+        return
+
+    row = model(**keys, **increments, **(insert_values or {}))
+    try:
+        with db.session.begin_nested():
+            db.session.add(row)
+    except IntegrityError:
+        apply_update()
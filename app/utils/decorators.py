@@ -1,5 +1,5 @@
 from functools import wraps
-from flask import redirect, url_for, flash
+from flask import redirect, url_for, flash, jsonify
 from flask_login import current_user
 
 def admin_required(f):
@@ -13,3 +13,12 @@ def admin_required(f):
             return redirect(url_for('auth.login'))
         return f(*args, **kwargs)
     return decorated_function
+
+def api_login_required(f):
+    """login_required for JSON endpoints: 401 instead of a redirect to the login page."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_user.is_authenticated:
+            return jsonify({'success': False, 'error': 'Authentication required.'}), 401
+        return f(*args, **kwargs)
+    return decorated_function
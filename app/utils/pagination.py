@@ -0,0 +1,121 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Instead of OFFSET, each page remembers the sort key of its last row and the
+next page asks for rows strictly after it.  With an index on the sort key the
+database seeks straight to the right spot, so page 1000 costs the same as
+page 1.  Cursors are opaque url-safe tokens handed to the client.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we cannot decode."""
+    pass
+
+
+def encode_cursor(values) -> str:
+    payload = [{'$dt': v.isoformat()} if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token: str) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list):
+            raise ValueError('cursor must be a list')
+        return [datetime.fromisoformat(v['$dt']) if isinstance(v, dict) else v for v in payload]
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursor(f'Malformed cursor: {e}') from e
+
+
+def _check_value(column, value):
+    """
+    Make sure a cursor value has its key column's type, so a tampered cursor or
+    one replayed from another sort can never reach the database as e.g. an int
+    compared with a timestamp (a DataError on Postgres, a wrong page on SQLite).
+    NULL keys pass through as they were encoded.
+    """
+    if value is None:
+        return value
+    try:
+        python_type = column.type.python_type
+    except (AttributeError, NotImplementedError):
+        return value  # expression without a known Python type — nothing to check against
+
+    if python_type is datetime:
+        valid = isinstance(value, datetime)
+    elif python_type is int:
+        valid = type(value) is int
+    elif python_type is float:
+        valid = type(value) in (int, float)
+        value = float(value) if valid else value
+    elif python_type is bool:
+        valid = type(value) is bool
+    else:
+        valid = isinstance(value, python_type)
+    if not valid:
+        raise InvalidCursor('Cursor does not match the sort order.')
+    return value
+
+
+def after_cursor(keys, values):
+    """
+    Build a WHERE clause selecting rows that sort strictly after `values`.
+
+    `keys` is a list of (column_expression, descending) pairs that match the
+    query's ORDER BY.  Expanded to (a > x) OR (a = x AND b > y) ... so that it
+    works on every dialect and mixed sort directions.
+    """
+    if len(keys) != len(values):
+        raise InvalidCursor('Cursor does not match the sort order.')
+    values = [_check_value(column, value) for (column, _), value in zip(keys, values)]
+
+    clauses = []
+    for i, (column, descending) in enumerate(keys):
+        equal_prefix = [keys[j][0] == values[j] for j in range(i)]
+        beyond = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal_prefix, beyond))
+    return or_(*clauses)
+
+
+class KeysetPage:
+    """One page of keyset-paginated results."""
+
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_more(self):
+        return self.next_cursor is not None
+
+
+def keyset_paginate(query, keys, cursor=None, per_page=24, key_fn=None):
+    """
+    Order `query` by `keys`, skip past `cursor` and fetch one page.
+
+    `key_fn(row)` returns the sort key values of a row; by default the key
+    columns are read off the row as attributes with the same name.
+    Fetches per_page + 1 rows to learn whether another page exists.
+    """
+    if cursor:
+        query = query.filter(after_cursor(keys, decode_cursor(cursor)))
+
+    order = [column.desc() if descending else column.asc() for column, descending in keys]
+    rows = query.order_by(*order).limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        if key_fn is None:
+            key_fn = lambda row: [getattr(row, column.key) for column, _ in keys]
+        next_cursor = encode_cursor(key_fn(rows[-1]))
+    return KeysetPage(rows, next_cursor)
@@ -0,0 +1,213 @@
+"""
+In-process sorted score set with a Redis ZSET-style interface.
+
+Members are kept in an indexable skip list ordered by (-score, member) — the
+structure behind Redis sorted sets — so score updates, removals and rank
+lookups are O(log n) and range reads O(log n + k), rather than COUNT(*)
+queries.  Method names mirror the Redis commands (zadd, zrevrank, zrevrange,
+...) so a shared Redis sorted set can replace it without touching callers.
+"""
+
+import random
+import threading
+
+_MAX_LEVEL = 32
+_P = 0.25  # chance a node is promoted to the next level (as in Redis)
+
+
+class _Node:
+    __slots__ = ('key', 'forward', 'span')
+
+    def __init__(self, key, level):
+        self.key = key
+        self.forward = [None] * level
+        # span[i]: rank positions crossed by following forward[i] (to the end if None)
+        self.span = [0] * level
+
+
+class _SkipList:
+    """Skip list of unique, comparable keys that can also be indexed by rank."""
+
+    def __init__(self, keys=()):
+        """`keys` must be sorted and unique; they are linked in O(n)."""
+        self._head = _Node(None, _MAX_LEVEL)
+        self._level = 1
+        self._length = 0
+
+        last = [self._head] * _MAX_LEVEL
+        last_pos = [0] * _MAX_LEVEL
+        for position, key in enumerate(keys, 1):
+            level = self._random_level()
+            node = _Node(key, level)
+            for i in range(level):
+                last[i].forward[i] = node
+                last[i].span[i] = position - last_pos[i]
+                last[i], last_pos[i] = node, position
+            self._level = max(self._level, level)
+            self._length = position
+        for i in range(self._level):
+            last[i].span[i] = self._length - last_pos[i]
+
+    def __len__(self):
+        return self._length
+
+    @staticmethod
+    def _random_level():
+        level = 1
+        while level < _MAX_LEVEL and random.random() < _P:
+            level += 1
+        return level
+
+    def insert(self, key) -> None:
+        update = [None] * _MAX_LEVEL
+        rank = [0] * _MAX_LEVEL
+        x = self._head
+        for i in reversed(range(self._level)):
+            rank[i] = 0 if i == self._level - 1 else rank[i + 1]
+            while x.forward[i] is not None and x.forward[i].key < key:
+                rank[i] += x.span[i]
+                x = x.forward[i]
+            update[i] = x
+
+        level = self._random_level()
+        if level > self._level:
+            for i in range(self._level, level):
+                rank[i] = 0
+                update[i] = self._head
+                self._head.span[i] = self._length
+            self._level = level
+
+        node = _Node(key, level)
+        for i in range(level):
+            node.forward[i] = update[i].forward[i]
+            update[i].forward[i] = node
+            node.span[i] = update[i].span[i] - (rank[0] - rank[i])
+            update[i].span[i] = rank[0] - rank[i] + 1
+        for i in range(level, self._level):
+            update[i].span[i] += 1
+        self._length += 1
+
+    def remove(self, key) -> bool:
+        update = [None] * _MAX_LEVEL
+        x = self._head
+        for i in reversed(range(self._level)):
+            while x.forward[i] is not None and x.forward[i].key < key:
+                x = x.forward[i]
+            update[i] = x
+
+        x = x.forward[0]
+        if x is None or x.key != key:
+            return False
+        for i in range(self._level):
+            if update[i].forward[i] is x:
+                update[i].span[i] += x.span[i] - 1
+                update[i].forward[i] = x.forward[i]
+            else:
+                update[i].span[i] -= 1
+        while self._level > 1 and self._head.forward[self._level - 1] is None:
+            self._level -= 1
+        self._length -= 1
+        return True
+
+    def rank(self, key):
+        """0-based position of `key`, or None if absent."""
+        x = self._head
+        traversed = 0
+        for i in reversed(range(self._level)):
+            while x.forward[i] is not None and x.forward[i].key <= key:
+                traversed += x.span[i]
+                x = x.forward[i]
+            if x is not self._head and x.key == key:
+                return traversed - 1
+        return None
+
+    def slice(self, start, stop):
+        """Keys at positions start..stop-1."""
+        if start >= min(stop, self._length):
+            return []
+        # Walk down to the node at 1-based position start + 1, then along level 0
+        x = self._head
+        traversed = 0
+        for i in reversed(range(self._level)):
+            while x.forward[i] is not None and traversed + x.span[i] <= start + 1:
+                traversed += x.span[i]
+                x = x.forward[i]
+        keys = []
+        while x is not None and len(keys) < stop - start:
+            keys.append(x.key)
+            x = x.forward[0]
+        return keys
+
+
+class SortedScoreSet:
+    """Thread-safe order-statistic set of member → score, ranked high to low."""
+
+    def __init__(self):
+        self._scores: dict = {}
+        self._keys = _SkipList()  # (-score, member), ascending == best first
+        self._lock = threading.RLock()
+
+    def zadd(self, member, score) -> None:
+        with self._lock:
+            old = self._scores.get(member)
+            if old == score:
+                return
+            if old is not None:
+                self._keys.remove((-old, member))
+            self._scores[member] = score
+            self._keys.insert((-score, member))
+
+    def zadd_max(self, member, score) -> None:
+        """Like ZADD GT: only raise a member's score, never lower it."""
+        with self._lock:
+            old = self._scores.get(member)
+            if old is None or score > old:
+                self.zadd(member, score)
+
+    def zrem(self, member) -> None:
+        with self._lock:
+            old = self._scores.pop(member, None)
+            if old is not None:
+                self._keys.remove((-old, member))
+
+    def zscore(self, member):
+        return self._scores.get(member)
+
+    def zcard(self) -> int:
+        return len(self._keys)
+
+    def zrevrank(self, member):
+        """0-based position from the top, or None if the member is absent."""
+        with self._lock:
+            score = self._scores.get(member)
+            if score is None:
+                return None
+            return self._keys.rank((-score, member))
+
+    def zrevrange(self, start, stop, withscores=False):
+        """Members ranked start..stop inclusive (highest score first)."""
+        with self._lock:
+            items = self._keys.slice(max(0, start), stop + 1)
+        if withscores:
+            return [(member, -neg) for neg, member in items]
+        return [member for _, member in items]
+
+    def around(self, member, radius=5):
+        """(start_rank, [(member, score), ...]) for `radius` entries either side of member."""
+        rank = self.zrevrank(member)
+        if rank is None:
+            return None, []
+        start = max(0, rank - radius)
+        return start, self.zrevrange(start, rank + radius, withscores=True)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return dict(self._scores)
+
+    @classmethod
+    def from_dict(cls, scores: dict):
+        """Build a set in O(n log n) — one sort, then a linear skip list build."""
+        board = cls()
+        board._scores = dict(scores)
+        board._keys = _SkipList(sorted((-score, member) for member, score in scores.items()))
+        return board
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+"""
+answer_write_benchmark.py – Load test for answer submission during a live exam.
+
+Simulates many students answering a quiz at once through
+AttemptService.submit_answer, first with every answer committed directly
+(ANSWER_BUFFER=off) and then with the write-behind buffer, and prints
+database commits/sec, answers/sec and p50 / p99 submit latency for each.
+Every run ends by finishing all attempts and checking that no answer was lost.
+
+Usage:
+    python benchmarks/answer_write_benchmark.py
+    python benchmarks/answer_write_benchmark.py --students 64 --questions 50 --modes off sqlite memory
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import event, text
+
+from app import db
+from app.config import Config
+
+
+def build_app(workdir, mode, args):
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(workdir, f"bench-{mode}.db")}'
+    # One pooled connection per student so pool waits don't show up as submit latency
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'connect_args': {'timeout': 60}, 'pool_size': args.students}
+    app.config['ANSWER_BUFFER'] = mode
+    app.config['ANSWER_BUFFER_PATH'] = os.path.join(workdir, f'buffer-{mode}.db')
+    app.config['ANSWER_BUFFER_MAX_PENDING'] = args.max_pending
+    db.init_app(app)
+    from app import models  # noqa: F401 — register tables
+    return app
+
+
+def seed(num_students, num_questions):
+    from app.models.quiz import Quiz
+    from app.models.question import Question
+    from app.models.attempt import Attempt
+
+    db.session.execute(text('PRAGMA journal_mode=WAL'))
+    db.session.execute(text(
+        "INSERT INTO users (id, username, email) VALUES (1, 'teacher', 'teacher@example.com')"
+    ))
+    db.session.execute(text('INSERT INTO users (id, username, email) VALUES (:id, :u, :e)'), [
+        {'id': i, 'u': f'student{i}', 'e': f'student{i}@example.com'} for i in range(2, num_students + 2)
+    ])
+    quiz = Quiz(title='Live exam', creator_id=1, status='active', question_count=num_questions)
+    db.session.add(quiz)
+    db.session.flush()
+    db.session.add_all([
+        Question(quiz_id=quiz.id, question_text=f'Q{i}', option_a='a', option_b='b',
+                 option_c='c', option_d='d', correct_option='A')
+        for i in range(num_questions)
+    ])
+    attempts = [Attempt(user_id=i, quiz_id=quiz.id) for i in range(2, num_students + 2)]
+    db.session.add_all(attempts)
+    db.session.commit()
+    question_ids = [q.id for q in Question.query.order_by(Question.id)]
+    return [(a.id, a.user_id) for a in attempts], question_ids
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    k = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[k]
+
+
+def run(mode, workdir, args):
+    from app.models.attempt import Answer
+    from app.services.attempt_service import AttemptService
+    from app.services.answer_buffer_service import AnswerBufferService
+
+    app = build_app(workdir, mode, args)
+    with app.app_context():
+        db.create_all()
+        attempts, question_ids = seed(args.students, args.questions)
+
+        commits = [0]
+        lock = threading.Lock()
+
+        @event.listens_for(db.engine, 'commit')
+        def count_commit(conn):
+            with lock:
+                commits[0] += 1
+
+    latencies = []
+    errors = []
+
+    def student(attempt_id, user_id, seed_value):
+        rng = random.Random(seed_value)
+        samples = []
+        with app.app_context():
+            for question_id in question_ids:
+                time.sleep(rng.uniform(0, args.think_ms) / 1000)
+                start = time.perf_counter()
+                ok, error = AttemptService.submit_answer(attempt_id, user_id, question_id, rng.choice('ABCD'))
+                samples.append((time.perf_counter() - start) * 1000)
+                if not ok:
+                    errors.append(error)
+            db.session.remove()
+        with lock:
+            latencies.extend(samples)
+
+    threads = [threading.Thread(target=student, args=(aid, uid, i)) for i, (aid, uid) in enumerate(attempts)]
+    commits[0] = 0
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    answer_commits = commits[0]
+
+    # Finish everything (flushes the buffer) and check nothing was lost
+    with app.app_context():
+        for attempt_id, user_id in attempts:
+            AttemptService.finish_attempt(attempt_id, user_id)
+        stored = Answer.query.count()
+        leftover = AnswerBufferService.flush_all() if AnswerBufferService.enabled() else 0
+        db.engine.dispose()
+
+    expected = len(attempts) * len(question_ids)
+    return {
+        'mode': mode,
+        'answers': len(latencies),
+        'elapsed': elapsed,
+        'commits': answer_commits,
+        'p50': percentile(latencies, 50),
+        'p99': percentile(latencies, 99),
+        'mean': statistics.mean(latencies),
+        'complete': stored == expected and leftover == 0 and not errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test answer submission with and without write-behind.')
+    parser.add_argument('--students', type=int, default=32, help='Concurrent students (default: 32)')
+    parser.add_argument('--questions', type=int, default=40, help='Questions per quiz (default: 40)')
+    parser.add_argument('--think-ms', type=float, default=5, help='Max pause between answers (default: 5)')
+    parser.add_argument('--max-pending', type=int, default=Config.ANSWER_BUFFER_MAX_PENDING,
+                        help='Inline flush threshold per attempt (default: ANSWER_BUFFER_MAX_PENDING)')
+    parser.add_argument('--modes', nargs='+', default=['off', 'sqlite', 'memory'],
+                        help='ANSWER_BUFFER modes to compare (default: off sqlite memory)')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='quiz-answer-bench-')
+    print(f'🧑‍🎓 {args.students} students × {args.questions} questions')
+    results = [run(mode, workdir, args) for mode in args.modes]
+
+    print()
+    print(f'{"buffer":<8} {"answers/s":>10} {"commits/s":>10} {"p50 ms":>8} {"p99 ms":>8} {"mean ms":>8}  complete')
+    for r in results:
+        print(f'{r["mode"]:<8} {r["answers"] / r["elapsed"]:>10.0f} {r["commits"] / r["elapsed"]:>10.0f} '
+              f'{r["p50"]:>8.2f} {r["p99"]:>8.2f} {r["mean"]:>8.2f}  {"yes" if r["complete"] else "NO"}')
+
+
+if __name__ == '__main__':
+    main()
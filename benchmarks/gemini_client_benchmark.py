@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+"""
+gemini_client_benchmark.py – Per-call overhead of Gemini calls: fresh client vs pooled client.
+
+Starts a local stub of the generateContent endpoint (HTTP/1.1 keep-alive,
+canned quiz response, optional --latency), then calls it through
+AIQuizService._generate_with_model the old way — a new genai.Client per call —
+and through the client pool, sequentially and from --threads threads.  Prints
+p50 / p99 per-call latency and how many TCP connections the stub accepted.
+
+The stub speaks plain HTTP, so the numbers leave out the TLS handshake a
+fresh client also pays against the real API on every call.
+
+Usage:
+    python benchmarks/gemini_client_benchmark.py
+    python benchmarks/gemini_client_benchmark.py --calls 500 --threads 8 --latency 0.005
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from google import genai
+from google.genai import types
+
+from app.config import Config
+from app.services import gemini_client_pool
+from app.services.ai_quiz_service import AIQuizService
+
+API_KEY = 'bench-key'
+MODEL = 'gemini-2.5-flash'
+
+QUIZ = {
+    'title': 'Benchmark Quiz',
+    'description': 'Canned stub response',
+    'questions': [
+        {'question': f'Question {i}?', 'options': ['A', 'B', 'C', 'D'],
+         'correct_index': i % 4, 'explanation': 'Because.'}
+        for i in range(10)
+    ],
+}
+
+
+# ── Stub server ──────────────────────────────────────────────────────
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real endpoint
+    disable_nagle_algorithm = True  # headers and body go out separately; don't let them wait on ACKs
+    body = json.dumps({
+        'candidates': [{
+            'content': {'role': 'model', 'parts': [{'text': json.dumps(QUIZ)}]},
+            'finishReason': 'STOP',
+            'index': 0,
+        }],
+        'usageMetadata': {'promptTokenCount': 300, 'candidatesTokenCount': 900, 'totalTokenCount': 1200},
+    }).encode()
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.headers.get('x-goog-api-key') != API_KEY:
+            self.send_error(401)
+            return
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub(latency):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.connections = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ── Call paths ───────────────────────────────────────────────────────
+
+def fresh_call(base_url, prompt, timeout):
+    """The pre-pool _generate_with_model: a new client, and new connections, per call."""
+    client = genai.Client(api_key=API_KEY, http_options=types.HttpOptions(base_url=base_url))
+    response = client.models.generate_content(model=MODEL, contents=prompt)
+    data = json.loads(AIQuizService._strip_code_fences(response.text.strip()))
+    AIQuizService._validate_quiz(data)
+    return data
+
+
+def pooled_call(base_url, prompt, timeout):
+    return AIQuizService._generate_with_model(API_KEY, MODEL, prompt, timeout)
+
+
+MODES = {'fresh': fresh_call, 'pooled': pooled_call}
+
+
+def run(app, server, mode, calls, threads):
+    call = MODES[mode]
+    base_url = f'http://127.0.0.1:{server.server_port}/'
+    prompt = AIQuizService._build_prompt('benchmarks', '', 10, 'medium')
+    timeout = app.config['GEMINI_TIMEOUT']
+    # Fresh pool per run, so its first call pays for building the client like a new worker would
+    gemini_client_pool._pool = None
+
+    def one(_):
+        with app.app_context():
+            started = time.perf_counter()
+            call(base_url, prompt, timeout)
+            return time.perf_counter() - started
+
+    with server.lock:
+        server.connections = 0
+    started = time.perf_counter()
+    if threads == 1:
+        latencies = [one(i) for i in range(calls)]
+    else:
+        with ThreadPoolExecutor(threads) as pool:
+            latencies = list(pool.map(one, range(calls)))
+    elapsed = time.perf_counter() - started
+    with app.app_context():
+        if gemini_client_pool._pool is not None:
+            gemini_client_pool._pool.close()
+
+    latencies.sort()
+    return {
+        'calls/s': calls / elapsed,
+        'p50 ms': statistics.median(latencies) * 1000,
+        'p99 ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        'connections': server.connections,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=300)
+    parser.add_argument('--threads', type=int, default=4, help='concurrent callers for the parallel run')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds the stub waits before answering')
+    parser.add_argument('--modes', nargs='+', choices=sorted(MODES), default=['fresh', 'pooled'])
+    args = parser.parse_args()
+
+    server = start_stub(args.latency)
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config['GEMINI_BASE_URL'] = f'http://127.0.0.1:{server.server_port}/'
+
+    # Warm up imports and the stub
+    run(app, server, 'pooled', 5, 1)
+
+    print(f'{args.calls} calls, stub latency {args.latency * 1000:.1f} ms\n')
+    print(f'{"mode":<8} {"threads":>7} {"calls/s":>9} {"p50 ms":>8} {"p99 ms":>8} {"connections":>12}')
+    for threads in sorted({1, args.threads}):
+        for mode in args.modes:
+            result = run(app, server, mode, args.calls, threads)
+            print(f'{mode:<8} {threads:>7} {result["calls/s"]:>9.0f} {result["p50 ms"]:>8.2f} '
+                  f'{result["p99 ms"]:>8.2f} {result["connections"]:>12}')
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+"""
+search_benchmark.py – Compare explore-page search latency: ilike scan vs indexed search.
+
+Builds a synthetic quiz catalog in a throwaway SQLite database, then times the
+original `title ilike '%q%' OR description ilike '%q%'` filter against the
+SearchService backend and prints p50 / p99 latency for each.
+
+Usage:
+    python benchmarks/search_benchmark.py
+    python benchmarks/search_benchmark.py --quizzes 100000 --queries 200
+"""
+
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import text
+
+from app import db
+from app.config import Config
+
+TOPICS = (
+    'python flask database algebra geometry calculus history empire revolution '
+    'biology genetics cell chemistry molecule physics quantum gravity astronomy '
+    'planet galaxy music jazz guitar painting renaissance literature poetry novel '
+    'football cricket tennis olympics geography river mountain ocean capital '
+    'economics market finance startup marketing design typography animation film '
+    'cinema cooking baking spices nutrition fitness yoga medicine anatomy virus '
+    'network security encryption linux kernel compiler javascript react cloud'
+).split()
+
+SYLLABLES = 'ka lo mi ren tor vas qui pel dra sen ut bor lin fa go za mer nix ol pra'.split()
+
+
+def build_vocabulary(rng, size=20000):
+    """Topic words plus synthetic terms, so term frequencies look like real text."""
+    words = set(TOPICS)
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def build_app(db_path):
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {}
+    app.config['SEARCH_BACKEND'] = 'auto'
+    db.init_app(app)
+    from app import models  # noqa: F401 — register tables
+    return app
+
+
+def sentence(rng, vocab, cum_weights, n):
+    return ' '.join(rng.choices(vocab, cum_weights=cum_weights, k=n))
+
+
+def seed(num_quizzes, rng, vocab, weights):
+    db.session.execute(text(
+        "INSERT INTO users (id, username, email) VALUES (1, 'bench', 'bench@example.com')"
+    ))
+    batch = []
+    for i in range(1, num_quizzes + 1):
+        batch.append({
+            'id': i,
+            'title': sentence(rng, vocab, weights, 4).title(),
+            'description': sentence(rng, vocab, weights, 18),
+            'status': 'active',
+        })
+        if len(batch) == 10000:
+            _insert(batch)
+            batch = []
+    if batch:
+        _insert(batch)
+    db.session.commit()
+
+
+def _insert(rows):
+    db.session.execute(text(
+        "INSERT INTO quizzes (id, title, description, creator_id, status, created_at) "
+        "VALUES (:id, :title, :description, 1, :status, CURRENT_TIMESTAMP)"
+    ), rows)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    k = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[k]
+
+
+def time_queries(fn, queries):
+    samples = []
+    for q in queries:
+        start = time.perf_counter()
+        fn(q)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark quiz search latency.')
+    parser.add_argument('--quizzes', type=int, default=500_000, help='Synthetic catalog size (default: 500000)')
+    parser.add_argument('--queries', type=int, default=100, help='Queries per strategy (default: 100)')
+    parser.add_argument('--limit', type=int, default=24, help='Rows fetched per query (default: 24)')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocab = build_vocabulary(rng)
+    # Zipf-like term frequencies: a few very common words, a long tail of rare ones
+    weights = [1 / (rank + 1) for rank in range(len(vocab))]
+    rng.shuffle(weights)
+    weights = list(itertools.accumulate(weights))
+    tmpdir = tempfile.mkdtemp(prefix='quiz-search-bench-')
+    app = build_app(os.path.join(tmpdir, 'bench.db'))
+
+    from app.models.quiz import Quiz
+    from app.services.search_service import SearchService
+
+    with app.app_context():
+        db.create_all()
+        print(f'🌱 Seeding {args.quizzes:,} quizzes…')
+        t0 = time.perf_counter()
+        seed(args.quizzes, rng, vocab, weights)
+        print(f'   done in {time.perf_counter() - t0:.1f}s')
+
+        t0 = time.perf_counter()
+        SearchService.rebuild_index()
+        print(f'🔎 Indexed in {time.perf_counter() - t0:.1f}s')
+
+        # Mix of full words, prefixes (typing in progress) and two-word queries
+        queries = []
+        for _ in range(args.queries):
+            word = rng.choice(vocab)
+            kind = rng.random()
+            if kind < 0.4:
+                queries.append(word)
+            elif kind < 0.8:
+                queries.append(word[:max(3, len(word) // 2)])
+            else:
+                queries.append(f'{word} {rng.choice(vocab)}')
+
+        base = Quiz.query.filter_by(status='active')
+
+        def ilike_path(q):
+            (base.filter(Quiz.title.ilike(f'%{q}%') | Quiz.description.ilike(f'%{q}%'))
+                 .order_by(Quiz.created_at.desc())
+                 .limit(args.limit).all())
+            db.session.expunge_all()
+
+        def indexed_path(q):
+            query, rank_order = SearchService.search(base, q)
+            query.order_by(rank_order, Quiz.created_at.desc()).limit(args.limit).all()
+            db.session.expunge_all()
+
+        results = {
+            'ilike scan': time_queries(ilike_path, queries),
+            'indexed search': time_queries(indexed_path, queries),
+        }
+
+    print()
+    print(f'{"strategy":<16} {"p50 ms":>10} {"p99 ms":>10} {"mean ms":>10}')
+    for name, samples in results.items():
+        print(f'{name:<16} {percentile(samples, 50):>10.2f} {percentile(samples, 99):>10.2f} '
+              f'{statistics.mean(samples):>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -45,6 +45,22 @@ target_db = current_app.extensions['migrate'].db
 # ... etc.
 
 
+# Search index objects managed outside the ORM models (see
+# app/services/search_service.py) — keep autogenerate from dropping them.
+UNMANAGED_TABLE_PREFIXES = ('quiz_search',)
+UNMANAGED_COLUMNS = {('quizzes', 'search_vector')}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == 'table' and name.startswith(UNMANAGED_TABLE_PREFIXES):
+        return False
+    if type_ == 'column' and (object.table.name, name) in UNMANAGED_COLUMNS:
+        return False
+    if type_ == 'index' and name == 'ix_quizzes_search_vector':
+        return False
+    return True
+
+
 def get_metadata():
     if hasattr(target_db, 'metadatas'):
         return target_db.metadatas[None]
@@ -65,7 +81,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_object=include_object
     )
 
     with context.begin_transaction():
@@ -93,6 +110,7 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    conf_args.setdefault("include_object", include_object)
 
     connectable = get_engine()
 
@@ -0,0 +1,50 @@
+"""add quiz search index
+
+Revision ID: 3f8c1d2e9a47
+Revises: 93eb444bdeea
+Create Date: 2026-10-18 10:12:03.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '3f8c1d2e9a47'
+down_revision = '93eb444bdeea'
+branch_labels = None
+depends_on = None
+
+
+VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.add_column('quizzes', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+        op.execute(f'UPDATE quizzes SET search_vector = {VECTOR_SQL}')
+        op.create_index('ix_quizzes_search_vector', 'quizzes', ['search_vector'],
+                        unique=False, postgresql_using='gin')
+    elif bind.dialect.name == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS quiz_search "
+            "USING fts5(title, description, tokenize='porter unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        op.execute(
+            "INSERT INTO quiz_search (rowid, title, description) "
+            "SELECT id, title, coalesce(description, '') FROM quizzes"
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.drop_index('ix_quizzes_search_vector', table_name='quizzes')
+        op.drop_column('quizzes', 'search_vector')
+    elif bind.dialect.name == 'sqlite':
+        op.execute('DROP TABLE IF EXISTS quiz_search')
@@ -0,0 +1,43 @@
+"""add denormalized quiz counters
+
+Revision ID: c41d7e05b8f2
+Revises: 7b2e4c91d0a3
+Create Date: 2026-10-18 11:47:15.230948
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d7e05b8f2'
+down_revision = '7b2e4c91d0a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('quizzes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('question_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('attempt_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('completion_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill from the source tables
+    op.execute(
+        "UPDATE quizzes SET "
+        "question_count = (SELECT count(*) FROM questions WHERE questions.quiz_id = quizzes.id), "
+        "attempt_count = (SELECT count(*) FROM attempts WHERE attempts.quiz_id = quizzes.id), "
+        "completion_count = (SELECT count(*) FROM attempts "
+        "WHERE attempts.quiz_id = quizzes.id AND attempts.submitted_at IS NOT NULL)"
+    )
+
+    with op.batch_alter_table('quizzes', schema=None) as batch_op:
+        batch_op.create_index('ix_quizzes_status_attempt_count_id', ['status', 'attempt_count', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('quizzes', schema=None) as batch_op:
+        batch_op.drop_index('ix_quizzes_status_attempt_count_id')
+        batch_op.drop_column('completion_count')
+        batch_op.drop_column('attempt_count')
+        batch_op.drop_column('question_count')
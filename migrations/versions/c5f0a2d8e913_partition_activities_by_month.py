@@ -0,0 +1,116 @@
+"""partition activities by month (postgres) and make activities.timestamp NOT NULL
+
+Revision ID: c5f0a2d8e913
+Revises: 4e8b1d6a3f25
+Create Date: 2026-10-18 20:31:47.260153
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5f0a2d8e913'
+down_revision = '4e8b1d6a3f25'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = {
+    'ix_activities_timestamp_id': '("timestamp", id)',
+    'ix_activities_action_type_timestamp_id': '(action_type, "timestamp", id)',
+    'ix_activities_user_id_timestamp_id': '(user_id, "timestamp", id)',
+}
+
+# Partitions created ahead of the current month; `flask activity-archive` keeps extending them
+MONTHS_AHEAD = 2
+
+
+def _add_months(month, n):
+    index = month.year * 12 + month.month - 1 + n
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def _create_indexes(table):
+    for name, columns in INDEXES.items():
+        op.execute(f'CREATE INDEX {name} ON {table} {columns}')
+
+
+def upgrade():
+    op.execute('UPDATE activities SET "timestamp" = CURRENT_TIMESTAMP WHERE "timestamp" IS NULL')
+
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        with op.batch_alter_table('activities', schema=None) as batch_op:
+            batch_op.alter_column('timestamp', existing_type=sa.DateTime(), nullable=False)
+        return
+
+    # Rebuild as a table range-partitioned by month. The partition key has to be
+    # part of the primary key, so it becomes (id, timestamp); ids stay unique via the sequence.
+    op.execute('ALTER TABLE activities RENAME TO activities_unpartitioned')
+    op.execute('ALTER TABLE activities_unpartitioned RENAME CONSTRAINT activities_pkey TO activities_unpartitioned_pkey')
+    for name in INDEXES:
+        op.execute(f'DROP INDEX {name}')
+
+    op.execute("""
+        CREATE TABLE activities (
+            id INTEGER NOT NULL DEFAULT nextval('activities_id_seq'),
+            user_id INTEGER NOT NULL REFERENCES users (id),
+            action_type VARCHAR(50) NOT NULL,
+            description VARCHAR(255),
+            "timestamp" TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            CONSTRAINT activities_pkey PRIMARY KEY (id, "timestamp")
+        ) PARTITION BY RANGE ("timestamp")
+    """)
+    op.execute('ALTER SEQUENCE activities_id_seq OWNED BY activities.id')
+    op.execute('CREATE TABLE activities_default PARTITION OF activities DEFAULT')
+
+    this_month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    oldest = bind.execute(sa.text('SELECT min("timestamp") FROM activities_unpartitioned')).scalar()
+    month = min(oldest.replace(day=1, hour=0, minute=0, second=0, microsecond=0), this_month) if oldest else this_month
+    while month <= _add_months(this_month, MONTHS_AHEAD):
+        op.execute(
+            f"CREATE TABLE activities_p{month:%Y%m} PARTITION OF activities "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{_add_months(month, 1):%Y-%m-%d}')"
+        )
+        month = _add_months(month, 1)
+    _create_indexes('activities')
+
+    op.execute(
+        'INSERT INTO activities (id, user_id, action_type, description, "timestamp") '
+        'SELECT id, user_id, action_type, description, "timestamp" FROM activities_unpartitioned'
+    )
+    op.execute('DROP TABLE activities_unpartitioned')
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        with op.batch_alter_table('activities', schema=None) as batch_op:
+            batch_op.alter_column('timestamp', existing_type=sa.DateTime(), nullable=True)
+        return
+
+    op.execute('ALTER TABLE activities RENAME TO activities_partitioned')
+    op.execute('ALTER TABLE activities_partitioned RENAME CONSTRAINT activities_pkey TO activities_partitioned_pkey')
+    for name in INDEXES:
+        op.execute(f'DROP INDEX {name}')
+
+    op.execute("""
+        CREATE TABLE activities (
+            id INTEGER NOT NULL DEFAULT nextval('activities_id_seq'),
+            user_id INTEGER NOT NULL REFERENCES users (id),
+            action_type VARCHAR(50) NOT NULL,
+            description VARCHAR(255),
+            "timestamp" TIMESTAMP WITHOUT TIME ZONE,
+            CONSTRAINT activities_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute('ALTER SEQUENCE activities_id_seq OWNED BY activities.id')
+    op.execute(
+        'INSERT INTO activities (id, user_id, action_type, description, "timestamp") '
+        'SELECT id, user_id, action_type, description, "timestamp" FROM activities_partitioned'
+    )
+    op.execute('DROP TABLE activities_partitioned')
+    _create_indexes('activities')
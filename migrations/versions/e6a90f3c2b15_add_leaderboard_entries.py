@@ -0,0 +1,44 @@
+"""add leaderboard_entries table
+
+Revision ID: e6a90f3c2b15
+Revises: c41d7e05b8f2
+Create Date: 2026-10-18 12:31:52.664019
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6a90f3c2b15'
+down_revision = 'c41d7e05b8f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('leaderboard_entries',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('attempt_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('accuracy_sum', sa.Float(), server_default='0', nullable=False),
+    sa.Column('avg_accuracy', sa.Float(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    with op.batch_alter_table('leaderboard_entries', schema=None) as batch_op:
+        batch_op.create_index('ix_leaderboard_entries_rank', ['avg_accuracy', 'attempt_count'], unique=False)
+
+    # Backfill from submitted attempts
+    op.execute(
+        "INSERT INTO leaderboard_entries (user_id, attempt_count, accuracy_sum, avg_accuracy, updated_at) "
+        "SELECT user_id, count(id), coalesce(sum(accuracy), 0), coalesce(avg(accuracy), 0), CURRENT_TIMESTAMP "
+        "FROM attempts WHERE submitted_at IS NOT NULL GROUP BY user_id"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('leaderboard_entries', schema=None) as batch_op:
+        batch_op.drop_index('ix_leaderboard_entries_rank')
+
+    op.drop_table('leaderboard_entries')
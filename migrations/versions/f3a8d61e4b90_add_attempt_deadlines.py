@@ -0,0 +1,43 @@
+"""add attempts.deadline_at and the open-deadline index for the expiry sweeper
+
+Revision ID: f3a8d61e4b90
+Revises: b27f90d4c6e3
+Create Date: 2026-10-18 16:05:44.281937
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a8d61e4b90'
+down_revision = 'b27f90d4c6e3'
+branch_labels = None
+depends_on = None
+
+OPEN_TIMED = 'submitted_at IS NULL AND deadline_at IS NOT NULL'
+
+
+def upgrade():
+    with op.batch_alter_table('attempts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('deadline_at', sa.DateTime(), nullable=True))
+
+    # Backfill deadlines of open attempts on timed quizzes
+    if op.get_bind().dialect.name == 'postgresql':
+        deadline = "attempts.started_at + quizzes.time_limit * interval '1 minute'"
+    else:
+        deadline = "datetime(attempts.started_at, '+' || quizzes.time_limit || ' minutes')"
+    op.execute(
+        f"UPDATE attempts SET deadline_at = (SELECT {deadline} FROM quizzes "
+        "WHERE quizzes.id = attempts.quiz_id AND quizzes.time_limit > 0) "
+        "WHERE submitted_at IS NULL"
+    )
+
+    op.create_index('ix_attempts_open_deadline', 'attempts', ['deadline_at'], unique=False,
+                    postgresql_where=sa.text(OPEN_TIMED), sqlite_where=sa.text(OPEN_TIMED))
+
+
+def downgrade():
+    op.drop_index('ix_attempts_open_deadline', table_name='attempts')
+    with op.batch_alter_table('attempts', schema=None) as batch_op:
+        batch_op.drop_column('deadline_at')
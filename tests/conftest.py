@@ -0,0 +1,20 @@
+import pytest
+from flask import Flask
+
+from app import db
+from app.config import Config
+
+
+@pytest.fixture
+def app():
+    """Bare app on in-memory SQLite with every table created (no blueprints)."""
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://', SQLALCHEMY_ENGINE_OPTIONS={}, TESTING=True)
+    db.init_app(app)
+    from app import models  # noqa: F401 — register every table
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
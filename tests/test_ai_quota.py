@@ -0,0 +1,64 @@
+"""
+AI quota reservations: in-flight generations count against the daily limit,
+and each reservation expires on its own so a stale one never releases (or
+is released by) the others.
+"""
+
+from datetime import datetime, timedelta
+
+from app import db
+from app.models.ai_usage import AIQuotaReservation
+from app.models.user import User
+from app.services.ai_quota_service import AIQuotaService, _reservation_ttl
+
+
+def make_user(app, limit):
+    app.config['AI_DAILY_LIMIT'] = limit
+    user = User(username='maker', email='maker@example.com')
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def expire(reservation):
+    row = db.session.get(AIQuotaReservation, reservation.id)
+    row.expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+
+
+def test_reservations_count_until_committed_or_refunded(app):
+    user_id = make_user(app, limit=2)
+    first = AIQuotaService.reserve(user_id)
+    second = AIQuotaService.reserve(user_id)
+    assert first and second
+    assert AIQuotaService.reserve(user_id) is None
+    assert AIQuotaService.usage(user_id) == (2, 0)
+
+    AIQuotaService.refund(first)
+    AIQuotaService.commit(second)
+    assert AIQuotaService.usage(user_id) == (1, 1)
+
+
+def test_stale_reservation_expires_without_releasing_the_others(app):
+    user_id = make_user(app, limit=2)
+    stale = AIQuotaService.reserve(user_id)
+    running = AIQuotaService.reserve(user_id)
+    expire(stale)
+
+    # Only the stale slot is freed; the running generation keeps its hold
+    assert AIQuotaService.reserve(user_id) is not None
+    assert AIQuotaService.reserve(user_id) is None
+
+    # Releasing a swept reservation leaves the live ones alone
+    AIQuotaService.refund(stale)
+    assert AIQuotaService.usage(user_id) == (2, 0)
+    AIQuotaService.commit(running)
+    assert AIQuotaService.usage(user_id) == (2, 0)
+
+
+def test_ttl_defaults_to_longest_generation(app):
+    app.config.update(AI_QUOTA_RESERVATION_TTL=None, GEMINI_TIMEOUT=60,
+                      GEMINI_MODELS=['a', 'b', 'c', 'd'], GEMINI_MAX_RETRIES=3)
+    assert _reservation_ttl() == 720
+    app.config['AI_QUOTA_RESERVATION_TTL'] = 30
+    assert _reservation_ttl() == 30
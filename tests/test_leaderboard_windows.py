@@ -0,0 +1,57 @@
+"""
+Windowed leaderboards are cached across requests.  The cache must hold plain
+totals, not ORM rows: a cached User outlives its session (DetachedInstanceError
+on the next request) and would keep showing a stale name or a suspended user.
+"""
+
+import pytest
+
+from app import db
+from app.models.user import User
+from app.services.leaderboard_service import LeaderboardService
+
+
+@pytest.fixture(autouse=True)
+def empty_window_cache():
+    LeaderboardService.invalidate_windows()
+    yield
+    LeaderboardService.invalidate_windows()
+
+
+def seed():
+    users = [User(username=f'player{i}', email=f'player{i}@example.com') for i in range(3)]
+    db.session.add_all(users)
+    db.session.commit()
+    for i, user in enumerate(users):
+        LeaderboardService.record_attempt(user.id, 50.0 + i * 10)
+    db.session.commit()
+    return [user.id for user in users]
+
+
+def end_request():
+    db.session.remove()
+
+
+def test_cached_window_survives_the_session_that_filled_it(app):
+    ids = seed()
+    first = LeaderboardService.top_window('week')
+    assert [e.user_id for e in first] == ids[::-1]
+    end_request()
+
+    db.session.get(User, ids[0]).username = 'renamed'
+    db.session.commit()
+    end_request()
+
+    second = LeaderboardService.top_window('week')
+    assert [e.user.username for e in second] == ['player2', 'player1', 'renamed']
+    assert second[0].avg_accuracy == pytest.approx(70.0)
+
+
+def test_suspended_users_leave_a_cached_window(app):
+    ids = seed()
+    LeaderboardService.top_window('day')
+    db.session.get(User, ids[2]).is_suspended = True
+    db.session.commit()
+    end_request()
+
+    assert [e.user_id for e in LeaderboardService.top_window('day')] == ids[1::-1]
@@ -0,0 +1,100 @@
+"""
+List pages built from listing projections must cost a fixed number of
+queries, however many rows they show.  Each test seeds a small and a large
+data set in in-memory SQLite, counts the statements a page issues with a
+before_cursor_execute listener and expects the same count for both sizes.
+"""
+
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.models.attempt import Attempt
+from app.models.quiz import Quiz
+from app.models.support import SupportReply, SupportTicket
+from app.models.user import User
+from app.services.listing_service import AttemptListing, QuizListing, TicketListing
+
+SMALL, LARGE = 3, 30
+
+
+def seed(n):
+    """n creators, each with a quiz, a ticket with two replies, and an attempt by the viewer."""
+    viewer = User(username='viewer', email='viewer@example.com')
+    db.session.add(viewer)
+    for i in range(n):
+        user = User(username=f'user{i}', email=f'user{i}@example.com')
+        quiz = Quiz(title=f'Quiz {i}', creator=user, status='active')
+        ticket = SupportTicket(user=user, subject=f'Ticket {i}', message='Help')
+        db.session.add_all([
+            user, quiz, ticket,
+            SupportReply(ticket=ticket, user=user, message='More detail'),
+            SupportReply(ticket=ticket, user=viewer, message='Answer'),
+            Attempt(user=viewer, quiz=quiz, score=i),
+        ])
+    db.session.commit()
+    viewer_id = viewer.id
+    # Start each page from an empty identity map, as a fresh request would
+    db.session.expunge_all()
+    return viewer_id
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def queries_for(n, render):
+    viewer_id = seed(n)
+    with count_queries() as statements:
+        rows = render(viewer_id)
+    assert len(rows) == n
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    return len(statements)
+
+
+def render_quizzes(viewer_id):
+    quizzes = QuizListing.wrap(QuizListing.query().order_by(Quiz.id).all(), viewer_id=viewer_id)
+    return [(q.title, q.creator.username, q.question_count, q.attempt_count, q.my_attempts) for q in quizzes]
+
+
+def render_tickets(viewer_id):
+    tickets = TicketListing.wrap(TicketListing.query().order_by(SupportTicket.id).all())
+    return [(t.subject, t.user.username, t.reply_count) for t in tickets]
+
+
+def render_attempts(viewer_id):
+    attempts = AttemptListing.query().filter_by(user_id=viewer_id).order_by(Attempt.id).all()
+    return [(a.score, a.quiz.title) for a in attempts]
+
+
+@pytest.mark.parametrize('render', [render_quizzes, render_tickets, render_attempts],
+                         ids=['quizzes', 'tickets', 'attempts'])
+def test_query_count_is_independent_of_page_size(app, render):
+    assert queries_for(SMALL, render) == queries_for(LARGE, render)
+
+
+def test_my_attempts_counts_only_the_viewer(app):
+    viewer_id = seed(SMALL)
+    other = db.session.get(User, viewer_id + 1)
+    quiz = Quiz.query.order_by(Quiz.id).first()
+    db.session.add(Attempt(user=other, quiz=quiz))
+    db.session.commit()
+
+    listing = QuizListing.wrap([quiz], viewer_id=viewer_id)[0]
+    assert listing.my_attempts == 1
+    assert QuizListing.wrap([quiz])[0].my_attempts == 0
@@ -0,0 +1,80 @@
+"""
+The database model-state store keeps routing bookkeeping out of the request's
+unit of work: it reads and writes on its own connections, so recording an
+outcome neither commits nor discards what the request has pending.
+"""
+
+import threading
+
+import pytest
+from flask import Flask
+from sqlalchemy import func, select
+
+from app import db
+from app.config import Config
+from app.models.ai_usage import AIModelHealth
+from app.models.user import User
+from app.services.model_router import DatabaseModelStateStore
+
+
+@pytest.fixture
+def app(tmp_path):
+    """File-backed SQLite: in-memory SQLite would share one connection between engine and session."""
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path}/state.db',
+                      SQLALCHEMY_ENGINE_OPTIONS={'connect_args': {'timeout': 30}}, TESTING=True)
+    db.init_app(app)
+    from app import models  # noqa: F401 — register every table
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def committed_users():
+    with db.engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(User.__table__)).scalar()
+
+
+def count_call(health):
+    health.calls += 1
+    return health.calls
+
+
+def test_update_leaves_the_request_session_alone(app):
+    store = DatabaseModelStateStore()
+    user = User(username='pending', email='pending@example.com')
+    db.session.add(user)
+
+    assert store.update('m', count_call)[0] == 1
+    assert user in db.session.new
+    assert committed_users() == 0  # not committed by the store
+
+    def broken(health):
+        raise ValueError('bad change')
+
+    with pytest.raises(ValueError):
+        store.update('m', broken)
+    assert user in db.session.new
+    db.session.commit()  # not rolled back by the store either
+    assert committed_users() == 1
+    assert store.load()['m'].calls == 1
+
+
+def test_concurrent_updates_are_not_lost(app):
+    store = DatabaseModelStateStore()
+
+    def worker():
+        with app.app_context():
+            for _ in range(10):
+                store.update('m', count_call)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert store.load()['m'].calls == 40
+    assert db.session.get(AIModelHealth, 'm').version == 40
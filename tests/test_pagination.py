@@ -0,0 +1,75 @@
+"""
+Keyset cursors are client input: a cursor that was tampered with, or carried
+over from another sort order, must be rejected with InvalidCursor before any
+of its values reach the database.
+"""
+
+import base64
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models.quiz import Quiz
+from app.models.user import User
+from app.services.quiz_service import QuizService
+from app.utils.pagination import InvalidCursor
+
+
+def seed(n=5):
+    user = User(username='creator', email='creator@example.com')
+    start = datetime(2026, 1, 1)
+    db.session.add(user)
+    db.session.add_all([
+        Quiz(title=f'Quiz {i}', creator=user, status='active',
+             created_at=start + timedelta(hours=i), attempt_count=i * 10)
+        for i in range(n)
+    ])
+    db.session.commit()
+
+
+def test_pages_follow_their_own_cursor(app):
+    seed()
+    first = QuizService.explore_page(sort_by='newest', per_page=2)
+    second = QuizService.explore_page(sort_by='newest', cursor=first.next_cursor, per_page=2)
+    assert [q.title for q in first.items + second.items] == ['Quiz 4', 'Quiz 3', 'Quiz 2', 'Quiz 1']
+
+
+@pytest.mark.parametrize('made_for, replayed_on', [('popular', 'newest'), ('newest', 'popular')])
+def test_cross_sort_cursor_is_rejected(app, made_for, replayed_on):
+    seed()
+    cursor = QuizService.explore_page(sort_by=made_for, per_page=2).next_cursor
+    assert cursor is not None
+    with pytest.raises(InvalidCursor):
+        QuizService.explore_page(sort_by=replayed_on, cursor=cursor, per_page=2)
+
+
+def raw_cursor(payload):
+    """Encode a cursor payload as-is, the way a client could forge one."""
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+DT = {'$dt': '2026-01-01T00:00:00'}
+
+
+@pytest.mark.parametrize('payload', [
+    ['2026-01-01T00:00:00', 3],   # datetime sent as a plain string
+    [{'$dt': 'not a date'}, 3],
+    [{'x': 1}, 3],
+    [DT, '3'],                    # id as a string
+    [DT, True],
+    [DT, 3, 4],
+    [],
+    {'created_at': DT},
+])
+def test_tampered_cursor_is_rejected(app, payload):
+    seed()
+    with pytest.raises(InvalidCursor):
+        QuizService.explore_page(sort_by='newest', cursor=raw_cursor(payload), per_page=2)
+
+
+def test_forged_but_well_typed_cursor_is_accepted(app):
+    seed()
+    page = QuizService.explore_page(sort_by='newest', cursor=raw_cursor([DT, 0]), per_page=2)
+    assert page.items == []
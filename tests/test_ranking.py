@@ -0,0 +1,55 @@
+"""SortedScoreSet against a plain sorted list, through random writes and reads."""
+
+import random
+
+import pytest
+
+from app.utils.ranking import SortedScoreSet
+
+
+def expected_order(scores):
+    return [member for _, member in sorted((-score, member) for member, score in scores.items())]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_a_sorted_list(seed):
+    rng = random.Random(seed)
+    scores = {m: rng.randint(0, 50) for m in range(rng.randint(0, 200))}
+    board = SortedScoreSet.from_dict(scores)
+
+    for step in range(2000):
+        member = rng.randint(0, 300)
+        action = rng.random()
+        if action < 0.5:
+            score = rng.randint(0, 50)
+            board.zadd(member, score)
+            scores[member] = score
+        elif action < 0.6:
+            score = rng.randint(0, 50)
+            board.zadd_max(member, score)
+            scores[member] = max(score, scores.get(member, score))
+        elif action < 0.8:
+            board.zrem(member)
+            scores.pop(member, None)
+        else:
+            order = expected_order(scores)
+            assert board.zcard() == len(order)
+            assert board.zrevrank(member) == (order.index(member) if member in scores else None)
+            start = rng.randint(0, len(order) + 2)
+            stop = start + rng.randint(-1, 12)
+            assert board.zrevrange(start, stop) == order[start:stop + 1]
+
+    order = expected_order(scores)
+    assert board.zrevrange(0, len(order)) == order
+    assert [board.zrevrank(m) for m in order] == list(range(len(order)))
+    assert board.to_dict() == scores
+
+
+def test_around_and_scores():
+    board = SortedScoreSet.from_dict({i: i * 10 for i in range(20)})
+    assert board.zrevrange(0, 2, withscores=True) == [(19, 190), (18, 180), (17, 170)]
+    start, entries = board.around(10, radius=2)
+    assert start == 7
+    assert [member for member, _ in entries] == [12, 11, 10, 9, 8]
+    assert board.around(99) == (None, [])
+    assert SortedScoreSet().zrevrange(0, 10) == []